@@ -0,0 +1,15 @@
+class Import:
+    """
+    Import times in fresh interpreters, e.g. of worker processes.
+    """
+
+    timeout = 120
+
+    def timeraw_import(self):
+        return "import scop"
+
+    def timeraw_import_worker(self):
+        return "from scop import Param, func_comp"
+
+    def timeraw_import_all(self):
+        return "import scop; [getattr(scop, name) for name in scop.__all__]"
@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import scop
+
+from .synthetic import synthetic_dataset
+
+
+class DumpLoad:
+    params = ([100, 10000], [10, 100], [(), (10,)], ["zarr", "netcdf"])
+    param_names = ["n_designs", "n_vars", "shape", "format"]
+    timeout = 120
+
+    def setup(self, n_designs, n_vars, shape, format):
+        self.ds = synthetic_dataset(
+            n_designs=n_designs, n_vars=n_vars, shape=shape, discrete_types=(int, bool)
+        )
+        self.dump = getattr(scop, f"dump_{format}")
+        self.load = getattr(scop, f"load_{format}")
+        self.kwargs = {"mode": "w"} if format == "zarr" else {}
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path = self.tmp_dir / "dump.scop"
+        self.dump(self.ds, self.path, **self.kwargs)
+
+    def teardown(self, *args):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_dump(self, *args):
+        self.dump(self.ds, self.tmp_dir / "time_dump.scop", **self.kwargs)
+
+    def time_load(self, *args):
+        self.load(self.path).load()
+
+    def track_nbytes(self, *args):
+        return self.ds.nbytes
+
+    track_nbytes.unit = "bytes"
+
+
+class ThreadedDumpLoad:
+    """
+    Throughput of dumping and loading many-variable datasets with threads.
+    """
+
+    params = ([None, 2, 4, 8], ["zarr", "netcdf"])
+    param_names = ["n_threads", "format"]
+    timeout = 120
+
+    def setup(self, n_threads, format):
+        self.ds = synthetic_dataset(
+            n_designs=10000, n_vars=500, shape=(10,), discrete_types=(int, bool)
+        )
+        self.dump = getattr(scop, f"dump_{format}")
+        self.load = getattr(scop, f"load_{format}")
+        self.kwargs = {"mode": "w"} if format == "zarr" else {}
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path = self.tmp_dir / "dump.scop"
+        self.dump(self.ds, self.path, **self.kwargs)
+
+    def teardown(self, *args):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_dump(self, n_threads, format):
+        # netCDF files are always dumped by one thread, as a baseline
+        kwargs = {**self.kwargs, "n_threads": n_threads} if format == "zarr" else {}
+        self.dump(self.ds, self.tmp_dir / "time_dump.scop", **kwargs)
+
+    def time_load(self, n_threads, format):
+        self.load(self.path, n_threads=n_threads).load()
+
+    def track_dump_throughput(self, n_threads, format):
+        start = time.perf_counter()
+        self.time_dump(n_threads, format)
+        return self.ds.nbytes / (time.perf_counter() - start)
+
+    track_dump_throughput.unit = "bytes/s"
+
+    def track_load_throughput(self, n_threads, format):
+        start = time.perf_counter()
+        self.time_load(n_threads, format)
+        return self.ds.nbytes / (time.perf_counter() - start)
+
+    track_load_throughput.unit = "bytes/s"
@@ -0,0 +1,30 @@
+import openmdao.api as om
+
+import scop
+
+
+class Params:
+    params = [1000, 100_000]
+    param_names = ["n_params"]
+    timeout = 120
+
+    def setup(self, n_params):
+        self.params = [
+            scop.Param(name=f"x{idx}", default=0.0, units="m")
+            for idx in range(n_params)
+        ]
+
+    def time_build(self, n_params):
+        # New names, so that nothing is interned yet
+        [scop.Param(name=f"y{idx}", default=0.0, units="m") for idx in range(n_params)]
+
+    def peakmem_build(self, n_params):
+        [scop.Param(name=f"y{idx}", default=0.0, units="m") for idx in range(n_params)]
+
+    def time_override(self, n_params):
+        [param.override(units="mm") for param in self.params]
+
+    def time_register(self, n_params):
+        comp = om.ExplicitComponent()
+        for param in self.params:
+            scop.add_input_param(comp, param)
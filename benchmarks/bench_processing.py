@@ -0,0 +1,31 @@
+import scop
+from scop.processing import constraint_violations
+
+from .synthetic import synthetic_dataset
+
+
+class Processing:
+    params = ([100, 1000, 10000], [2, 3])
+    param_names = ["n_designs", "n_objectives"]
+    timeout = 120
+
+    def setup(self, n_designs, n_objectives):
+        self.ds = synthetic_dataset(
+            n_designs=n_designs, n_vars=10, n_objectives=n_objectives
+        )
+        self.pareto_ds = scop.pareto_subset(self.ds)
+
+    def time_pareto_subset(self, *args):
+        scop.pareto_subset(self.ds)
+
+    def time_feasible_subset(self, *args):
+        scop.feasible_subset(self.ds)
+
+    def time_constraint_violations(self, *args):
+        constraint_violations(self.ds)
+
+    def time_hypervolume(self, *args):
+        scop.hypervolume(self.pareto_ds)
+
+    def track_pareto_size(self, *args):
+        return len(self.pareto_ds[scop.DESIGN_ID])
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from scop import DESIGN_ID
+
+from .synthetic import synthetic_problem
+
+
+class Recording:
+    params = ([1, 10, 100], [(), (10,), (10, 10)], [(), (int, bool, str)])
+    param_names = ["n_vars", "shape", "discrete_types"]
+
+    def setup(self, n_vars, shape, discrete_types):
+        self.prob, self.recorder = synthetic_problem(n_vars, shape, discrete_types)
+        self.driver = self.prob.driver
+        self.data = {
+            "input": {},
+            "output": {
+                **{f"indeps.x{idx}": np.ones(shape) for idx in range(n_vars)},
+                **{f"indeps.{type_.__name__}": type_(1) for type_ in discrete_types},
+            },
+        }
+        self.recorder._iteration_coordinate = "rank0:DOEDriver_List|0"
+
+    def teardown(self, *args):
+        self.prob.cleanup()
+
+    def time_record_iteration(self, *args):
+        self.recorder.record_iteration_driver(
+            self.driver,
+            self.data,
+            {"name": "", "timestamp": time.perf_counter(), "success": 1, "msg": ""},
+        )
+
+
+class Assembly:
+    params = ([100, 1000], [1, 10], [(), (10,)])
+    param_names = ["n_designs", "n_vars", "shape"]
+    timeout = 120
+
+    def setup(self, n_designs, n_vars, shape):
+        self.prob, self.recorder = synthetic_problem(n_vars, shape)
+        self.driver = self.prob.driver
+        data = {
+            "input": {},
+            "output": {f"indeps.x{idx}": np.ones(shape) for idx in range(n_vars)},
+        }
+        for idx in range(n_designs):
+            self.recorder._iteration_coordinate = f"rank0:DOEDriver_List|{idx}"
+            self.recorder.record_iteration_driver(
+                self.driver,
+                data,
+                {"name": "", "timestamp": time.perf_counter(), "success": 1, "msg": ""},
+            )
+
+    def teardown(self, *args):
+        self.prob.cleanup()
+
+    def time_assemble_dataset(self, *args):
+        self.recorder.assemble_dataset(self.driver)
+
+    def peakmem_assemble_dataset(self, *args):
+        self.recorder.assemble_dataset(self.driver)
+
+    def time_assemble_dataset_chunked(self, *args):
+        self.recorder.assemble_dataset(self.driver, chunk_size=100)
+
+    def peakmem_assemble_dataset_chunked(self, *args):
+        self.recorder.assemble_dataset(self.driver, chunk_size=100)
+
+    def track_n_designs(self, n_designs, *args):
+        return len(self.recorder.assemble_dataset(self.driver)[DESIGN_ID])
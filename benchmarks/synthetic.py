@@ -0,0 +1,125 @@
+"""
+Synthetic datasets, shaped like the ones assembled by `DatasetRecorder`.
+"""
+
+import numpy as np
+import openmdao.api as om
+import xarray as xr
+
+from scop import DESIGN_ID
+
+# OpenMDAO's default for unbounded constraints
+INF_BOUND = 1e30
+
+
+def _meta(shape, discrete=False, **types):
+    return {
+        "units": None,
+        "shape": shape,
+        "desc": "",
+        "tags": set(),
+        "discrete": discrete,
+        "explicit": True,
+        "param": None,
+        "type": {"output": {}, **types},
+    }
+
+
+def _var(name, values, meta):
+    extra_dims = [f"{name}_{idx}" for idx in range(values.ndim - 1)]
+    return xr.DataArray(values, dims=[DESIGN_ID, *extra_dims], attrs=meta)
+
+
+def synthetic_dataset(
+    n_designs=100,
+    n_vars=10,
+    shape=(),
+    discrete_types=(),
+    n_objectives=2,
+    n_constraints=1,
+    seed=0,
+):
+    """
+    Generates a dataset with ``n_vars`` continuous design variables of the given
+    (per-design) ``shape``, one discrete design variable per type in
+    ``discrete_types``, and scalar objectives and constraints.
+    """
+    rng = np.random.default_rng(seed)
+    data_vars = {
+        "meta.timestamp": xr.DataArray(
+            np.datetime64("2023-01-01", "ns")
+            + np.arange(n_designs).astype("timedelta64[ms]"),
+            dims=[DESIGN_ID],
+        ),
+        "meta.success": xr.DataArray(np.ones(n_designs, dtype=bool), dims=[DESIGN_ID]),
+        "meta.msg": xr.DataArray(np.full(n_designs, ""), dims=[DESIGN_ID]),
+    }
+
+    for idx in range(n_vars):
+        name = f"indeps.x{idx}"
+        data_vars[name] = _var(
+            name,
+            rng.random((n_designs, *shape)),
+            _meta(shape, desvar={"lower": 0.0, "upper": 1.0}),
+        )
+
+    for type_ in discrete_types:
+        name = f"indeps.{type_.__name__}"
+        data_vars[name] = _var(
+            name,
+            rng.integers(0, 2, n_designs).astype(type_),
+            _meta((), discrete=True, desvar={}),
+        )
+
+    for idx in range(n_objectives):
+        name = f"model.f{idx}"
+        data_vars[name] = _var(
+            name,
+            rng.random(n_designs),
+            _meta((1,), objective={"scaler": None, "adder": None}),
+        )
+
+    for idx in range(n_constraints):
+        name = f"model.g{idx}"
+        data_vars[name] = _var(
+            name,
+            rng.random(n_designs),
+            _meta((1,), constraint={"lower": -INF_BOUND, "upper": 0.9, "equals": None}),
+        )
+
+    ds = xr.Dataset(
+        data_vars,
+        coords={DESIGN_ID: [f"rank0:Synthetic|{idx}" for idx in range(n_designs)]},
+        attrs={"start_timestamp": np.datetime64("2023-01-01", "ns")},
+    )
+
+    return ds
+
+
+def synthetic_problem(n_vars=10, shape=(), discrete_types=()):
+    """
+    Sets up a problem with a DOE driver and a `DatasetRecorder`, having the same
+    design variables as `synthetic_dataset`.
+    """
+    from scop import DatasetRecorder
+
+    prob = om.Problem(reports=None)
+    indeps = prob.model.add_subsystem("indeps", om.IndepVarComp())
+    for idx in range(n_vars):
+        indeps.add_output(f"x{idx}", np.zeros(shape))
+        prob.model.add_design_var(
+            f"indeps.x{idx}", lower=np.zeros(shape), upper=np.ones(shape)
+        )
+    for type_ in discrete_types:
+        indeps.add_discrete_output(type_.__name__, type_(0))
+    prob.model.add_objective("indeps.x0", index=0 if shape else None)
+
+    prob.driver = driver = om.DOEDriver(om.ListGenerator([]))
+    recorder = DatasetRecorder()
+    driver.recording_options["includes"] = ["*"]
+    driver.add_recorder(recorder)
+    prob.setup()
+    # Starts up the recorder
+    prob.final_setup()
+
+    return prob, recorder
@@ -19,4 +19,10 @@ setup(
         "xarray",
         "zarr",
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+    },
+    entry_points={
+        "console_scripts": ["scop=scop.cli:main"],
+    },
 )
@@ -1,25 +1,168 @@
-from .components import func_comp  # noqa
+"""
+Submodules are imported lazily on first attribute access, so that e.g. worker
+processes only using `func_comp` and `Param` don't pay for importing xarray,
+pandas, pygmo and friends.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
 from .constants import DESIGN_ID  # noqa
-from .io import dump, dump_netcdf, dump_zarr, load, load_netcdf, load_zarr  # noqa
-from .modelling import (  # noqa
-    EnumSpace,
-    InnumSpace,
-    IntegerSpace,
-    Param,
-    ParamSet,
-    RealSpace,
-    Space,
-    add_input_param,
-    add_output_param,
-    bool_space,
-)
-from .processing import (  # noqa
-    constraint_space,
-    design_space,
-    feasible_subset,
-    hv_ref_point,
-    hypervolume,
-    objective_space,
-    pareto_subset,
-)
-from .recording import DatasetRecorder  # noqa
+
+_LAZY_ATTRS = {
+    "WarmStartCache": "cache",
+    "index_catalog": "catalog",
+    "open_catalog": "catalog",
+    "func_comp": "components",
+    "ResultsCache": "fingerprinting",
+    "fingerprint": "fingerprinting",
+    "FullFactorialGenerator": "doe",
+    "HaltonGenerator": "doe",
+    "LatinHypercubeGenerator": "doe",
+    "ParallelDOEDriver": "doe",
+    "SobolGenerator": "doe",
+    "SpaceGenerator": "doe",
+    "append": "io",
+    "append_zarr": "io",
+    "dump": "io",
+    "dump_arrow": "io",
+    "dump_netcdf": "io",
+    "dump_parquet": "io",
+    "dump_zarr": "io",
+    "load": "io",
+    "load_arrow": "io",
+    "load_netcdf": "io",
+    "load_parquet": "io",
+    "load_zarr": "io",
+    "decode_jacobian": "jacobian",
+    "encode_jacobians": "jacobian",
+    "jacobian_block": "jacobian",
+    "EnumSpace": "modelling",
+    "InnumSpace": "modelling",
+    "IntegerSpace": "modelling",
+    "Param": "modelling",
+    "ParamLayout": "modelling",
+    "ParamSet": "modelling",
+    "RealSpace": "modelling",
+    "Space": "modelling",
+    "add_input_param": "modelling",
+    "add_output_param": "modelling",
+    "bool_space": "modelling",
+    "clip_to_space": "processing",
+    "constraint_space": "processing",
+    "convert_units": "processing",
+    "design_space": "processing",
+    "feasible_subset": "processing",
+    "hv_ref_point": "processing",
+    "hypervolume": "processing",
+    "hypervolume_subset": "processing",
+    "knee_subset": "processing",
+    "objective_space": "processing",
+    "pareto_subset": "processing",
+    "space_mask": "processing",
+    "space_subset": "processing",
+    "spread_subset": "processing",
+    "Profiler": "profiling",
+    "DesignIndex": "query",
+    "concat_designs": "ragged",
+    "decode_ragged": "ragged",
+    "encode_ragged": "ragged",
+    "DatasetRecorder": "recording",
+    "RunStatistics": "recording",
+    "read_run_statistics": "recording",
+    "SurrogateComp": "surrogate",
+    "dump_surrogate": "surrogate",
+    "load_surrogate": "surrogate",
+    "surrogate_comp": "surrogate",
+}
+
+_SUBMODULES = set(_LAZY_ATTRS.values())
+
+__all__ = ["DESIGN_ID", *_LAZY_ATTRS]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        # Importing a submodule also sets it as an attribute of the package
+        return importlib.import_module(f".{name}", __name__)
+    try:
+        module_name = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache it, so that __getattr__ isn't called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
+
+if TYPE_CHECKING:
+    from .cache import WarmStartCache  # noqa
+    from .catalog import index_catalog, open_catalog  # noqa
+    from .components import func_comp  # noqa
+    from .doe import (  # noqa
+        FullFactorialGenerator,
+        HaltonGenerator,
+        LatinHypercubeGenerator,
+        ParallelDOEDriver,
+        SobolGenerator,
+        SpaceGenerator,
+    )
+    from .fingerprinting import ResultsCache, fingerprint  # noqa
+    from .io import (  # noqa
+        append,
+        append_zarr,
+        dump,
+        dump_arrow,
+        dump_netcdf,
+        dump_parquet,
+        dump_zarr,
+        load,
+        load_arrow,
+        load_netcdf,
+        load_parquet,
+        load_zarr,
+    )
+    from .jacobian import decode_jacobian, encode_jacobians, jacobian_block  # noqa
+    from .modelling import (  # noqa
+        EnumSpace,
+        InnumSpace,
+        IntegerSpace,
+        Param,
+        ParamLayout,
+        ParamSet,
+        RealSpace,
+        Space,
+        add_input_param,
+        add_output_param,
+        bool_space,
+    )
+    from .processing import (  # noqa
+        clip_to_space,
+        constraint_space,
+        convert_units,
+        design_space,
+        feasible_subset,
+        hv_ref_point,
+        hypervolume,
+        hypervolume_subset,
+        knee_subset,
+        objective_space,
+        pareto_subset,
+        space_mask,
+        space_subset,
+        spread_subset,
+    )
+    from .profiling import Profiler  # noqa
+    from .query import DesignIndex  # noqa
+    from .ragged import concat_designs, decode_ragged, encode_ragged  # noqa
+    from .recording import DatasetRecorder, RunStatistics, read_run_statistics  # noqa
+    from .surrogate import (  # noqa
+        SurrogateComp,
+        dump_surrogate,
+        load_surrogate,
+        surrogate_comp,
+    )
@@ -0,0 +1,180 @@
+import numpy as np
+import xarray as xr
+
+from .constants import DESIGN_ID
+from .modelling import _transfer_inputs
+from .processing import design_space
+
+
+def _design_keys(columns):
+    """
+    Splits (designs, size) arrays of design variable values into exact keys
+    (the values of non-float variables) and float vectors, to be matched within
+    a tolerance.
+    """
+    n_designs = len(columns[0]) if columns else 0
+    exact_columns = [column.tolist() for column in columns if column.dtype.kind != "f"]
+    float_columns = [column for column in columns if column.dtype.kind == "f"]
+
+    exact_keys = (
+        [tuple(map(tuple, row)) for row in zip(*exact_columns)]
+        if exact_columns
+        else [()] * n_designs
+    )
+    floats = (
+        np.concatenate(float_columns, axis=1)
+        if float_columns
+        else np.empty((n_designs, 0))
+    )
+    return exact_keys, floats
+
+
+class _Group:
+    """
+    Designs sharing the same exact key, with their float vectors indexed in a
+    k-d tree for tolerance-based lookups.
+    """
+
+    def __init__(self):
+        self.floats = []
+        self.designs = []
+        self.tree = None
+
+    def add(self, floats, design):
+        self.floats.append(floats)
+        self.designs.append(design)
+
+    def build(self):
+        from scipy.spatial import cKDTree
+
+        self.floats = np.array(self.floats)
+        self.tree = cKDTree(self.floats) if self.floats.shape[1] else None
+
+    def find(self, floats, atol):
+        if self.tree is None:
+            return self.designs[0]
+        distance, idx = self.tree.query(floats, distance_upper_bound=atol, p=np.inf)
+        if np.isinf(distance):
+            return None
+        return self.designs[idx]
+
+
+class WarmStartCache:
+    """
+    A cache of previously evaluated designs, to skip evaluating them again.
+
+    Successful designs of the given datasets are indexed by a hash of the
+    values of their design variables (see `design_space`). Values of float
+    variables match if they differ by at most ``atol``. When attached to a
+    problem, evaluations of the model at a known design are short-circuited:
+    the recorded values of all other outputs are written back into the model
+    and transferred to the inputs, and the driver (and its recorders) carries
+    on as usual. The datasets must have been recorded with ``includes=["*"]``
+    from the same model.
+    """
+
+    def __init__(self, datasets, atol=1e-12):
+        if isinstance(datasets, xr.Dataset):
+            datasets = [datasets]
+        self.datasets = list(datasets)
+        self.atol = atol
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._problem = None
+
+        for ds_idx, ds in enumerate(self.datasets):
+            if "meta.success" in ds:
+                ds = ds.isel({DESIGN_ID: ds["meta.success"].values.astype(bool)})
+                self.datasets[ds_idx] = ds
+            names = tuple(sorted(design_space(ds).data_vars))
+            groups = self._index.setdefault(names, {})
+            exact_keys, floats = _design_keys(
+                [
+                    ds[name]
+                    .transpose(DESIGN_ID, ...)
+                    .values.reshape((ds.sizes[DESIGN_ID], -1))
+                    for name in names
+                ]
+            )
+            for pos, (exact_key, floats_i) in enumerate(zip(exact_keys, floats)):
+                groups.setdefault(exact_key, _Group()).add(floats_i, (ds_idx, pos))
+
+        for groups in self._index.values():
+            for group in groups.values():
+                group.build()
+
+    def __len__(self):
+        return sum(
+            len(group.designs)
+            for groups in self._index.values()
+            for group in groups.values()
+        )
+
+    def attach(self, prob):
+        """
+        Makes the model of a set up problem skip evaluations of cached designs.
+        """
+        model = prob.model
+        desvar_names = tuple(
+            sorted(meta["source"] for meta in prob.driver._designvars.values())
+        )
+        self._desvar_names = desvar_names
+        self._run_solve_nonlinear = model.run_solve_nonlinear
+        self._problem = prob
+        model.run_solve_nonlinear = self._cached_run_solve_nonlinear
+        return self
+
+    def detach(self):
+        """
+        Makes the model evaluate all designs again.
+        """
+        if self._problem is not None:
+            del self._problem.model.run_solve_nonlinear
+            self._problem = None
+
+    def lookup(self, values: dict):
+        """
+        Returns the cached design (a dataset with no design dimension) with
+        the given design variable values, keyed by absolute source name, or
+        None.
+        """
+        names = tuple(sorted(values))
+        groups = self._index.get(names, None)
+        if groups is None:
+            return None
+        (exact_key,), (floats,) = _design_keys(
+            [np.reshape(values[name], (1, -1)) for name in names]
+        )
+        group = groups.get(exact_key, None)
+        if group is None:
+            return None
+        design = group.find(floats, self.atol)
+        if design is None:
+            return None
+        ds_idx, pos = design
+        return self.datasets[ds_idx].isel({DESIGN_ID: pos})
+
+    def _cached_run_solve_nonlinear(self):
+        model = self._problem.model
+        design = self.lookup(
+            {name: model._abs_get_val(name) for name in self._desvar_names}
+        )
+        if design is None:
+            self.misses += 1
+            return self._run_solve_nonlinear()
+
+        self.hits += 1
+        desvar_names = set(self._desvar_names)
+        for name, var in design.data_vars.items():
+            if name in desvar_names:
+                # Keep the values set by the driver
+                continue
+            elif name in model._var_allprocs_abs2meta["output"]:
+                model._outputs.set_var(
+                    name, var.values.reshape(model._outputs[name].shape)
+                )
+            elif name in model._var_allprocs_discrete["output"]:
+                model._discrete_outputs[name] = var.values.item()
+
+        _transfer_inputs(model)
@@ -0,0 +1,240 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from xarray.core import indexing
+
+from .constants import DESIGN_ID
+from .io import load_zarr
+from .ragged import (
+    concat_designs,
+    ragged_companion_names,
+    ragged_names,
+    with_ragged_companions,
+)
+
+CATALOG_INDEX_NAME = "scop-catalog.json"
+CURRENT_CATALOG_VERSION = 0
+
+RUN = "run"
+
+
+def _store_mtime(path: Path):
+    # Consolidated metadata is rewritten on every dump or append, also when
+    # only chunk files deeper down change
+    return max(
+        (path / name).stat().st_mtime
+        for name in (".zmetadata", ".zattrs", ".zgroup")
+        if (path / name).exists()
+    )
+
+
+def _index_store(path: Path):
+    ds = load_zarr(path)
+    start_timestamp = ds.attrs.get("start_timestamp", None)
+
+    return {
+        "mtime": _store_mtime(path),
+        "n_designs": ds.sizes.get(DESIGN_ID, 0),
+        "start_timestamp": (
+            None if start_timestamp is None else str(np.datetime64(start_timestamp))
+        ),
+        "variables": {
+            name: {
+                "dims": list(var.dims),
+                "shape": list(var.shape),
+                "dtype": var.dtype.str,
+                "roles": sorted((var.attrs.get("type", None) or {}).keys()),
+            }
+            for name, var in ds.variables.items()
+        },
+    }
+
+
+def index_catalog(directory, pattern="*.scop"):
+    """
+    Indexes the Scop Zarr stores in a directory into a sidecar file, and
+    returns the index.
+
+    The index holds the schema, number of designs, variable roles (desvar,
+    objective, constraint etc.) and start timestamp of each store, keyed by its
+    path relative to the directory. Only stores that changed since the last
+    indexing are read.
+    """
+    directory = Path(directory)
+    index_path = directory / CATALOG_INDEX_NAME
+    try:
+        old_index = json.loads(index_path.read_text())
+    except FileNotFoundError:
+        old_index = {}
+    if old_index.get("version", None) != CURRENT_CATALOG_VERSION:
+        old_index = {}
+    old_stores = old_index.get("stores", {})
+
+    stores = {}
+    for path in sorted(directory.glob(pattern)):
+        key = path.relative_to(directory).as_posix()
+        old_store = old_stores.get(key, None)
+        if old_store is not None and old_store["mtime"] == _store_mtime(path):
+            stores[key] = old_store
+        else:
+            stores[key] = _index_store(path)
+
+    index = {"version": CURRENT_CATALOG_VERSION, "stores": stores}
+    if index != old_index:
+        index_path.write_text(json.dumps(index, indent=2))
+
+    return index
+
+
+def _run_name(key):
+    return key.rsplit(".", 1)[0]
+
+
+class _ConcatenatedArray(xr.backends.BackendArray):
+    """
+    Variables concatenated along their first dimension, read on indexing.
+    Only the parts of the variables that are indexed are read.
+    """
+
+    def __init__(self, variables):
+        self.variables = variables
+        lengths = [var.shape[0] for var in variables]
+        self.offsets = np.cumsum([0] + lengths)
+        self.shape = (int(self.offsets[-1]), *variables[0].shape[1:])
+        self.dtype = np.result_type(*(var.dtype for var in variables))
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.OUTER, self._getitem
+        )
+
+    def _getitem(self, key):
+        positions = np.arange(self.shape[0])[key[0]]
+        scalar = positions.ndim == 0
+        positions = np.atleast_1d(positions)
+        var_idxs = np.searchsorted(self.offsets, positions, side="right") - 1
+        parts = [
+            self.variables[var_idx][
+                (positions[var_idxs == var_idx] - self.offsets[var_idx], *key[1:])
+            ].values
+            for var_idx in (np.unique(var_idxs) if len(positions) else [0])
+        ]
+        # The parts are in order of variable, not of the key
+        values = np.concatenate(parts).astype(self.dtype, copy=False)[
+            np.argsort(np.argsort(var_idxs, kind="stable"))
+        ]
+        return values[0] if scalar else values
+
+
+def _concat_lazily(variables):
+    return xr.Variable(
+        variables[0].dims,
+        indexing.LazilyIndexedArray(_ConcatenatedArray(variables)),
+        attrs=variables[0].attrs,
+    )
+
+
+def _can_concat_lazily(variables):
+    dims, shape = variables[0].dims, variables[0].shape[1:]
+    return dims[:1] == (DESIGN_ID,) and all(
+        var.dims == dims and var.shape[1:] == shape for var in variables
+    )
+
+
+def open_catalog(
+    directory, variables=None, roles=None, runs=None, pattern="*.scop", **kwargs
+):
+    """
+    Opens the stores in a directory as one dataset, concatenated along
+    `DESIGN_ID`.
+
+    Each design gets a ``run`` coordinate with the name of its store, and its
+    design id is prefixed with ``<run>/`` to keep them unique. Only the given
+    ``variables`` and/or variables with any of the given ``roles`` are read,
+    from the given ``runs`` (defaults to all). Without any selection, the
+    variables that all runs have in common are used. The earliest start
+    timestamp is used for the whole dataset. Keyword arguments are passed on to
+    `load_zarr`.
+
+    Apart from ragged variables and ones that are shaped differently in
+    different runs, the values of the designs are only read from the stores
+    when indexed, also without dask.
+    """
+    stores = index_catalog(directory, pattern=pattern)["stores"]
+    if runs is not None:
+        stores = {key: store for key, store in stores.items() if _run_name(key) in runs}
+    if not stores:
+        raise ValueError(f"No runs found in {directory}.")
+
+    common_names = set.intersection(
+        *(set(store["variables"]) for store in stores.values())
+    )
+    if variables is None and roles is None:
+        names = common_names
+    else:
+        names = set(variables or [])
+        for store in stores.values():
+            names.update(
+                name
+                for name, var in store["variables"].items()
+                if roles and set(roles) & set(var["roles"])
+            )
+        if not names <= common_names:
+            raise ValueError(
+                f"Variables not present in all runs: {sorted(names - common_names)}."
+            )
+
+    datasets = []
+    for key, store in stores.items():
+        run = _run_name(key)
+        ds = load_zarr(Path(directory) / key, **kwargs)
+        # Keep the order of the store
+        ds = with_ragged_companions(
+            ds, ds[[name for name in ds.data_vars if name in names]]
+        )
+        datasets.append(
+            ds.assign_coords(
+                {
+                    DESIGN_ID: [f"{run}/{design}" for design in ds[DESIGN_ID].values],
+                    RUN: (DESIGN_ID, np.full(store["n_designs"], run)),
+                }
+            )
+        )
+
+    # Ragged variables (and ones that become ragged) are concatenated in
+    # memory, all others as they are indexed
+    ragged = {
+        ragged_name
+        for ds in datasets
+        for name in ragged_names(ds)
+        for ragged_name in [name, *ragged_companion_names(name)]
+    }
+    lazy_names = [
+        name
+        for name in datasets[0].data_vars
+        if name not in ragged
+        and _can_concat_lazily([ds[name].variable for ds in datasets])
+    ]
+    ds = concat_designs(
+        [ds.drop_vars(lazy_names) for ds in datasets], join="outer"
+    ).assign(
+        {
+            name: _concat_lazily([ds[name].variable for ds in datasets])
+            for name in lazy_names
+        }
+    )
+    # Keep the order of the stores
+    order = {name: idx for idx, name in enumerate(datasets[0].data_vars)}
+    ds = ds[sorted(ds.data_vars, key=lambda name: order.get(name, len(order)))]
+
+    start_timestamps = [
+        np.datetime64(store["start_timestamp"])
+        for store in stores.values()
+        if store["start_timestamp"] is not None
+    ]
+    if start_timestamps:
+        ds.attrs["start_timestamp"] = min(start_timestamps)
+
+    return ds
@@ -0,0 +1,293 @@
+"""
+The ``scop`` command-line tool, for inspecting, slicing and converting stores
+without loading them as a whole.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import jsonpickle
+import numpy as np
+
+from . import io
+from .constants import DESIGN_ID
+from .ragged import compact_ragged, with_ragged_companions
+
+FORMATS_BY_SUFFIX = {
+    ".nc": "netcdf",
+    ".h5": "netcdf",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+}
+TABULAR_FORMATS = ("parquet", "arrow")
+
+
+def _format(path):
+    # Zarr stores are directories, with any or no suffix
+    return FORMATS_BY_SUFFIX.get(Path(path).suffix, "zarr")
+
+
+def _load(path, variables=None):
+    fmt = _format(path)
+    if fmt in TABULAR_FORMATS:
+        return getattr(io, f"load_{fmt}")(path, variables=variables)
+    ds = getattr(io, f"load_{fmt}")(path)
+    if variables is not None:
+        ds = with_ragged_companions(ds, ds[variables])
+    return ds
+
+
+class _Progress:
+    def __init__(self, total, verb, quiet):
+        self.total = total
+        self.verb = verb
+        self.quiet = quiet
+        self.done = 0
+
+    def update(self, n):
+        self.done += n
+        if not self.quiet:
+            print(
+                f"\r{self.verb} {self.done}/{self.total} designs",
+                end="",
+                file=sys.stderr,
+                flush=True,
+            )
+
+    def close(self):
+        if not self.quiet:
+            print(file=sys.stderr)
+
+
+def _without_encoding(ds):
+    # The chunking etc. of the source doesn't necessarily fit the batches
+    ds = ds.copy(deep=False)
+    for var in ds.variables.values():
+        var.encoding = {}
+    return ds
+
+
+def _write(ds, path, args, append=False, on_collision="raise", existing_ids=None):
+    """
+    Writes the designs of a (lazily loaded) dataset to a store, at most
+    ``args.batch_size`` designs at a time. When appending to a Zarr store
+    several times, pass a set of its design ids as ``existing_ids`` (updated
+    with the written ones), to not read them all again for every batch.
+    """
+    fmt = _format(path)
+    n_designs = ds.sizes.get(DESIGN_ID, 0)
+    progress = _Progress(n_designs, f"Writing {path}:", args.quiet)
+
+    if fmt == "zarr":
+        if existing_ids is None:
+            existing_ids = (
+                set(io.load_zarr(path)[DESIGN_ID].values.tolist()) if append else set()
+            )
+        for start in range(0, max(n_designs, 1), args.batch_size):
+            batch = ds.isel({DESIGN_ID: slice(start, start + args.batch_size)})
+            batch = _without_encoding(compact_ragged(batch).load())
+            if append or start > 0:
+                io.append_zarr(
+                    batch, path, on_collision=on_collision, existing_ids=existing_ids
+                )
+            else:
+                io.dump_zarr(batch, path)
+                existing_ids.update(batch[DESIGN_ID].values.tolist())
+            progress.update(batch.sizes.get(DESIGN_ID, 0))
+    elif append:
+        raise ValueError(f"Can only append to Zarr stores, not {fmt}.")
+    elif fmt == "netcdf":
+        # Can't be appended to, so all designs are written at once
+        if n_designs > args.batch_size:
+            raise ValueError(
+                f"netCDF files are written at once, so the {n_designs} designs "
+                f"don't fit in a batch of {args.batch_size}. Pass a larger "
+                "--batch-size or write to a Zarr store."
+            )
+        io.dump_netcdf(_without_encoding(compact_ragged(ds)), path)
+        progress.update(n_designs)
+    elif fmt == "parquet":
+        # Streamed in batches by the dump functions themselves
+        io.dump_parquet(ds, path, row_group_size=args.batch_size)
+        progress.update(n_designs)
+    else:
+        io.dump_arrow(ds, path, batch_size=args.batch_size)
+        progress.update(n_designs)
+
+    progress.close()
+
+
+def _tabular_info(path, fmt):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        schema = pq.read_schema(path)
+        n_designs = pq.read_metadata(path).num_rows
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        schema = reader.schema
+        n_designs = sum(
+            reader.get_batch(idx).num_rows for idx in range(reader.num_record_batches)
+        )
+    layout = json.loads(schema.metadata[b"scop"])
+    variables = [
+        (
+            name,
+            var_layout["dims"],
+            np.dtype(var_layout["dtype"]),
+            jsonpickle.decode(var_layout["attrs"]),
+        )
+        for name, var_layout in layout["variables"].items()
+    ]
+    return n_designs, jsonpickle.decode(layout["attrs"]), variables
+
+
+def _info(path):
+    fmt = _format(path)
+    if fmt in TABULAR_FORMATS:
+        n_designs, attrs, variables = _tabular_info(path, fmt)
+    else:
+        ds = _load(path)
+        n_designs = ds.sizes.get(DESIGN_ID, 0)
+        attrs = ds.attrs
+        variables = [
+            (name, var.dims, var.dtype, var.attrs) for name, var in ds.variables.items()
+        ]
+
+    lines = [f"{path} ({fmt}, {n_designs} designs)"]
+    if "start_timestamp" in attrs:
+        lines.append(f"start_timestamp: {attrs['start_timestamp']}")
+    rows = [
+        (
+            name,
+            f"({', '.join(dims)})",
+            str(dtype),
+            ", ".join(attrs.get("type") or {}),
+        )
+        for name, dims, dtype, attrs in variables
+    ]
+    widths = [max((len(row[idx]) for row in rows), default=0) for idx in range(3)]
+    lines.extend(
+        "  "
+        + "  ".join(value.ljust(width) for value, width in zip(row, widths))
+        + f"  {row[3]}".rstrip()
+        for row in rows
+    )
+    return "\n".join(lines)
+
+
+def cmd_info(args):
+    for path in args.paths:
+        print(_info(path))
+
+
+def cmd_convert(args):
+    _write(_load(args.source), args.destination, args)
+
+
+def cmd_subset(args):
+    ds = _load(args.source, variables=args.variables)
+    ds = ds.isel({DESIGN_ID: slice(args.start, args.stop, args.step)})
+    _write(ds, args.destination, args)
+
+
+def cmd_pareto(args):
+    # Imports pygmo, so only when needed
+    from .processing import pareto_subset
+
+    # Only the objectives are loaded to find the Pareto front
+    _write(pareto_subset(_load(args.source)), args.destination, args)
+
+
+def cmd_merge(args):
+    first_source, *sources = args.sources
+    if sources and _format(args.destination) != "zarr":
+        raise ValueError("Can only merge stores into a Zarr store.")
+    # The design ids written so far, to check collisions against
+    existing_ids = set()
+    _write(_load(first_source), args.destination, args, existing_ids=existing_ids)
+    for source in sources:
+        _write(
+            _load(source),
+            args.destination,
+            args,
+            append=True,
+            on_collision=args.on_collision,
+            existing_ids=existing_ids,
+        )
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="scop",
+        description="Inspects, slices and converts Scop stores. The format of a "
+        "store is given by its suffix: .nc or .h5 (netCDF), .parquet, .arrow or "
+        "anything else (Zarr).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10_000,
+        help="Number of designs to read and write at a time. NetCDF files are "
+        "written at once, so they can have at most this many designs (default: "
+        "%(default)s)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Don't report progress"
+    )
+    subparsers = parser.add_subparsers(required=True, metavar="COMMAND")
+
+    info = subparsers.add_parser("info", help="Summarize stores")
+    info.add_argument("paths", nargs="+", metavar="PATH")
+    info.set_defaults(func=cmd_info)
+
+    convert = subparsers.add_parser("convert", help="Convert a store")
+    convert.add_argument("source")
+    convert.add_argument("destination")
+    convert.set_defaults(func=cmd_convert)
+
+    subset = subparsers.add_parser(
+        "subset", help="Write a range of designs and/or some variables of a store"
+    )
+    subset.add_argument("source")
+    subset.add_argument("destination")
+    subset.add_argument("--start", type=int)
+    subset.add_argument("--stop", type=int)
+    subset.add_argument("--step", type=int)
+    subset.add_argument("-v", "--variables", nargs="+", metavar="NAME")
+    subset.set_defaults(func=cmd_subset)
+
+    pareto = subparsers.add_parser(
+        "pareto", help="Write the Pareto-efficient designs of a store"
+    )
+    pareto.add_argument("source")
+    pareto.add_argument("destination")
+    pareto.set_defaults(func=cmd_pareto)
+
+    merge = subparsers.add_parser(
+        "merge", help="Concatenate the designs of stores into a new Zarr store"
+    )
+    merge.add_argument("sources", nargs="+", metavar="SOURCE")
+    merge.add_argument("destination")
+    merge.add_argument(
+        "--on-collision",
+        choices=["raise", "drop", "rename"],
+        default="raise",
+        help="How to handle designs ids that already exist (default: %(default)s)",
+    )
+    merge.set_defaults(func=cmd_merge)
+
+    return parser
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (ValueError, KeyError, FileNotFoundError) as e:
+        parser.exit(1, f"scop: error: {e}\n")
+    return 0
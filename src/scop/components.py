@@ -1,5 +1,6 @@
 from functools import wraps
 
+import numpy as np
 import openmdao.api as om
 
 from .modelling import Param, add_input_param, add_output_param
@@ -11,6 +12,13 @@ class FuncComp(om.ExplicitComponent):
         self.options.declare("func")
         self.options.declare("inputs", types=list)
         self.options.declare("outputs", types=list)
+        self.options.declare(
+            "space_check",
+            default=None,
+            values=[None, "raise", "clip"],
+            desc="What to do with inputs and outputs outside the spaces of their "
+            "params: nothing, raise an AnalysisError or clip them.",
+        )
 
     def setup(self):
         self.input_params = {}
@@ -29,6 +37,10 @@ class FuncComp(om.ExplicitComponent):
             name: discrete_inputs[name] if param.discrete else inputs[name]
             for name, param in self.input_params.items()
         }
+        kwargs = {
+            name: self._check_space(param, val, "Input")
+            for (name, val), param in zip(kwargs.items(), self.input_params.values())
+        }
         # TODO: inspect the function signature and support non-kwargs
         output = self.func(**kwargs)
         # TODO: add safety checks!
@@ -40,14 +52,33 @@ class FuncComp(om.ExplicitComponent):
             else:
                 val = output
 
+            val = self._check_space(param, val, "Output")
             if param.discrete:
                 discrete_outputs[name] = val
             else:
                 outputs[name] = val
 
+    def _check_space(self, param, val, kind):
+        space_check = self.options["space_check"]
+        if space_check is None or param.space is None:
+            return val
+        if space_check == "raise":
+            if not np.all(param.space.contains(val)):
+                raise om.AnalysisError(
+                    f"{kind} {param.name!r} of {self.pathname} is outside its "
+                    f"space: {val!r}"
+                )
+            return val
+
+        clipped = param.space.clip(val)
+        # Keep scalar discrete values as they are
+        if isinstance(val, np.ndarray) or clipped.ndim:
+            return clipped
+        return clipped.item()
+
 
-def func_comp(inputs: list[Param], outputs: list[Param]):
+def func_comp(inputs: list[Param], outputs: list[Param], **options):
     def decorator(func):
-        return FuncComp(func=func, inputs=inputs, outputs=outputs)
+        return FuncComp(func=func, inputs=inputs, outputs=outputs, **options)
 
     return decorator
@@ -0,0 +1,451 @@
+import concurrent.futures
+import itertools
+import math
+import multiprocessing as mp
+import os
+import time
+import traceback
+
+import numpy as np
+import openmdao.api as om
+from openmdao.core.constants import INF_BOUND, _SetupStatus
+from openmdao.core.driver import RecordingDebugging
+from openmdao.drivers.doe_generators import DOEGenerator
+from openmdao.utils.mpi import MPI
+
+from .modelling import EnumSpace, IntegerSpace, RealSpace, _transfer_inputs
+from .recording import _gen_abs_names_to_params
+
+REAL = "real"
+INTEGER = "integer"
+ENUM = "enum"
+
+
+def _desvar_param(model, name, source):
+    if model is None:
+        return None
+    abs_names = [source, *model._var_allprocs_prom2abs_list["input"].get(name, [])]
+    for _, param in _gen_abs_names_to_params(model, abs_names):
+        if param is not None:
+            return param
+    return None
+
+
+def _broadcast(value, size):
+    return np.broadcast_to(np.asarray(value, dtype=float), (size,))
+
+
+class _DesignSpace:
+    """
+    The design variables of a problem, flattened into one dimension per element
+    and sampled in the spaces of their params. Design variables without params
+    are sampled as real numbers within their bounds.
+    """
+
+    def __init__(self, design_vars, model=None):
+        discrete_names = (
+            set() if model is None else model._var_allprocs_discrete["output"].keys()
+        )
+        self.design_vars = []
+        self.kinds = []
+        self.lower = []
+        self.upper = []
+        self.codebooks = []
+        for name, meta in design_vars.items():
+            source = meta.get("source", name)
+            param = _desvar_param(model, meta.get("name", name), source)
+            space = RealSpace() if param is None else param.space
+            discrete = source in discrete_names
+            size = 1 if discrete else meta["size"]
+            scaler = None if discrete else meta.get("total_scaler", None)
+            adder = None if discrete else meta.get("total_adder", None)
+
+            # Design variable bounds are scaled, while spaces are not
+            lower = _broadcast(meta.get("lower", -INF_BOUND), size)
+            upper = _broadcast(meta.get("upper", INF_BOUND), size)
+            if scaler is not None:
+                lower, upper = lower / scaler, upper / scaler
+                lower, upper = np.minimum(lower, upper), np.maximum(lower, upper)
+            if adder is not None:
+                lower, upper = lower - adder, upper - adder
+            lower = np.where(np.abs(lower) >= INF_BOUND, -np.inf, lower)
+            upper = np.where(np.abs(upper) >= INF_BOUND, np.inf, upper)
+
+            if isinstance(space, EnumSpace):
+                kind = ENUM
+                codebook = list(space.values)
+                if not codebook:
+                    raise ValueError(f"The space of design variable {name!r} is empty.")
+                lower = np.zeros(size)
+                upper = np.full(size, len(codebook) - 1.0)
+            elif isinstance(space, (RealSpace, IntegerSpace)):
+                kind = INTEGER if isinstance(space, IntegerSpace) else REAL
+                codebook = None
+                if space.lower is not None:
+                    lower = np.maximum(lower, space.lower)
+                if space.upper is not None:
+                    upper = np.minimum(upper, space.upper)
+                if kind == INTEGER:
+                    lower, upper = np.ceil(lower), np.floor(upper)
+                if not (np.isfinite(lower).all() and np.isfinite(upper).all()):
+                    raise ValueError(
+                        f"Design variable {name!r} needs finite bounds to be sampled."
+                    )
+                if (lower > upper).any():
+                    raise ValueError(
+                        f"The bounds of design variable {name!r} don't overlap "
+                        "with its space."
+                    )
+            else:
+                raise TypeError(
+                    f"Can't sample the space of design variable {name!r}: {space!r}"
+                )
+
+            start = len(self.kinds)
+            self.design_vars.append(
+                (name, slice(start, start + size), discrete, scaler, adder)
+            )
+            self.kinds.extend([kind] * size)
+            self.lower.extend(lower)
+            self.upper.extend(upper)
+            self.codebooks.extend([codebook] * size)
+
+        self.lower = np.array(self.lower, dtype=float)
+        self.upper = np.array(self.upper, dtype=float)
+        self.real = np.array([kind == REAL for kind in self.kinds], dtype=bool)
+
+    @property
+    def n_dims(self):
+        return len(self.kinds)
+
+    def n_levels(self, levels):
+        """
+        Number of distinct values of each dimension, using the given number of
+        levels (an int, or a dict keyed by design variable name) for real ones.
+        """
+        n_levels = (self.upper - self.lower + 1).astype(int)
+        for name, idxs, *_ in self.design_vars:
+            n = levels if isinstance(levels, int) else levels.get(name, 2)
+            n_levels[idxs] = np.where(self.real[idxs], n, n_levels[idxs])
+        return n_levels
+
+    def from_unit(self, samples):
+        """
+        Maps samples in the unit hypercube to values of each dimension. Discrete
+        dimensions are divided into equally sized bins, one per value.
+        """
+        values = self.lower + samples * (self.upper - self.lower)
+        discrete = ~self.real
+        values[:, discrete] = np.minimum(
+            np.floor(
+                self.lower[discrete]
+                + samples[:, discrete] * (self.upper - self.lower + 1)[discrete]
+            ),
+            self.upper[discrete],
+        )
+        return values
+
+    def from_codes(self, codes, n_levels):
+        """
+        Maps value indices (or level indices, for real dimensions) to values of
+        each dimension.
+        """
+        steps = (self.upper - self.lower) / np.maximum(n_levels - 1, 1)
+        return self.lower + codes * np.where(self.real, steps, 1)
+
+    def gen_cases(self, values):
+        """
+        Generates DOE cases from a (samples, dimensions) matrix of values.
+        """
+        columns = []
+        for name, idxs, discrete, scaler, adder in self.design_vars:
+            block = values[:, idxs]
+            codebook = self.codebooks[idxs.start]
+            if codebook is not None:
+                codes = block.astype(int)
+                if discrete:
+                    columns.append([codebook[code] for code in codes[:, 0].tolist()])
+                    continue
+                block = np.asarray(codebook, dtype=float)[codes]
+            elif discrete:
+                column = block[:, 0]
+                if self.kinds[idxs.start] == INTEGER:
+                    column = column.astype(int)
+                columns.append(column.tolist())
+                continue
+
+            if adder is not None:
+                block = block + adder
+            if scaler is not None:
+                block = block * scaler
+            columns.append(block)
+
+        names = [name for name, *_ in self.design_vars]
+        for row in zip(*columns):
+            yield list(zip(names, row))
+
+
+class SpaceGenerator(DOEGenerator):
+    """
+    Base class for DOE generators that sample the spaces of the params of the
+    design variables. Samples are generated in vectorized batches and yielded
+    lazily as cases, so the whole DOE is never held in memory. Don't use this
+    directly.
+    """
+
+    def __init__(self, n_samples, batch_size=1024, seed=None):
+        super().__init__()
+        self.n_samples = n_samples
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def _gen_unit_batches(self, n_dims, rng):
+        raise NotImplementedError
+
+    def _gen_value_batches(self, space):
+        rng = np.random.default_rng(self.seed)
+        for samples in self._gen_unit_batches(space.n_dims, rng):
+            yield space.from_unit(samples)
+
+    def __call__(self, design_vars, model=None):
+        space = _DesignSpace(design_vars, model)
+        for values in self._gen_value_batches(space):
+            yield from space.gen_cases(values)
+
+
+class LatinHypercubeGenerator(SpaceGenerator):
+    """
+    Generates a Latin hypercube design, with one sample in each of the
+    `n_samples` equally probable bins of every dimension. The bin permutations
+    take `n_samples` integers per dimension, the samples themselves are
+    generated in batches.
+    """
+
+    def _gen_unit_batches(self, n_dims, rng):
+        dtype = np.uint32 if self.n_samples <= np.iinfo(np.uint32).max else np.uint64
+        bins = np.empty((n_dims, self.n_samples), dtype=dtype)
+        for bins_i in bins:
+            bins_i[:] = rng.permutation(self.n_samples)
+        for start in range(0, self.n_samples, self.batch_size):
+            batch_bins = bins[:, start : start + self.batch_size].T
+            yield (batch_bins + rng.random(batch_bins.shape)) / self.n_samples
+
+
+class _QMCGenerator(SpaceGenerator):
+    def __init__(self, n_samples, batch_size=1024, seed=None, scramble=True):
+        super().__init__(n_samples, batch_size=batch_size, seed=seed)
+        self.scramble = scramble
+
+    def _engine(self, n_dims, rng):
+        raise NotImplementedError
+
+    def _gen_unit_batches(self, n_dims, rng):
+        engine = self._engine(n_dims, rng)
+        for start in range(0, self.n_samples, self.batch_size):
+            yield engine.random(min(self.batch_size, self.n_samples - start))
+
+
+class SobolGenerator(_QMCGenerator):
+    """
+    Generates a (scrambled) Sobol' sequence. Its balance properties require
+    `n_samples` and `batch_size` to be powers of two.
+    """
+
+    def _engine(self, n_dims, rng):
+        from scipy.stats import qmc
+
+        return qmc.Sobol(n_dims, scramble=self.scramble, seed=rng)
+
+
+class HaltonGenerator(_QMCGenerator):
+    """
+    Generates a (scrambled) Halton sequence.
+    """
+
+    def _engine(self, n_dims, rng):
+        from scipy.stats import qmc
+
+        return qmc.Halton(n_dims, scramble=self.scramble, seed=rng)
+
+
+class FullFactorialGenerator(SpaceGenerator):
+    """
+    Generates all combinations of the values of integer and enum spaces, and of
+    `levels` evenly spaced values of real spaces. `levels` is either an int or
+    a dict keyed by design variable name (defaulting to 2).
+    """
+
+    def __init__(self, levels=2, batch_size=1024):
+        super().__init__(None, batch_size=batch_size)
+        self.levels = levels
+
+    def _gen_value_batches(self, space):
+        n_levels = space.n_levels(self.levels)
+        n_samples = math.prod(n_levels.tolist())
+        for start in range(0, n_samples, self.batch_size):
+            flat_codes = np.arange(start, min(start + self.batch_size, n_samples))
+            codes = np.stack(np.unravel_index(flat_codes, n_levels), axis=-1)
+            yield space.from_codes(codes, n_levels)
+
+
+# The problem of a worker process of ParallelDOEDriver
+_worker_problem = None
+
+
+def _init_worker(problem_factory):
+    global _worker_problem
+    prob = problem_factory()
+    if (
+        prob._metadata is None
+        or prob._metadata["setup_status"] < _SetupStatus.POST_SETUP
+    ):
+        prob.setup()
+    prob.final_setup()
+    _worker_problem = prob
+
+
+def _evaluate_case(case):
+    prob = _worker_problem
+    model = prob.model
+    for name, value in case:
+        prob.driver.set_design_var(
+            name, value.flatten() if isinstance(value, np.ndarray) else value
+        )
+
+    start = time.perf_counter()
+    try:
+        model.run_solve_nonlinear()
+        success, msg = 1, ""
+    except Exception:
+        success, msg = 0, traceback.format_exc()
+    metadata = {
+        "success": success,
+        "msg": msg,
+        "worker": os.getpid(),
+        "eval_time": time.perf_counter() - start,
+    }
+    profiler = getattr(model, "_scop_profiler", None)
+    if profiler is not None:
+        metadata.update(profiler.pop_case())
+
+    discrete_outputs = {
+        name: model._abs_get_val(name)
+        for name in model._var_allprocs_discrete["output"]
+    }
+    return metadata, model._outputs.asarray().copy(), discrete_outputs
+
+
+def _gen_completed(executor, fn, iterable, max_pending):
+    # Like executor.map(), but yields results in completion order and only
+    # submits max_pending items ahead
+    iterator = iter(iterable)
+    pending = set()
+    while True:
+        for item in itertools.islice(iterator, max_pending - len(pending)):
+            pending.add(executor.submit(fn, item))
+        if not pending:
+            return
+        done, pending = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            yield future.result()
+
+
+class ParallelDOEDriver(om.DOEDriver):
+    """
+    A DOE driver evaluating cases in a pool of local worker processes, without
+    MPI.
+
+    Each worker builds its own problem with ``problem_factory`` (a picklable
+    callable returning a problem with the same model, set up or not, and
+    without recorders). Results are streamed back in completion order and
+    written into the model of the driver, which records them as usual (e.g.
+    with `DatasetRecorder`), with case names numbered in completion order. The
+    worker process id and evaluation time of each case are recorded as the
+    ``worker`` and ``eval_time`` metadata, along with the measurements of a
+    `Profiler` attached to the problems of the workers, if any. With the
+    ``record_derivatives`` recording option, the total derivatives of each case
+    are computed by the driver itself, after receiving its outputs.
+    """
+
+    def _declare_options(self):
+        super()._declare_options()
+        self.options.declare(
+            "problem_factory",
+            default=None,
+            allow_none=True,
+            desc="Picklable callable returning the problem of a worker.",
+        )
+        self.options.declare(
+            "n_workers",
+            default=None,
+            types=int,
+            allow_none=True,
+            desc="Number of worker processes. Defaults to the number of CPUs.",
+        )
+        self.options.declare(
+            "mp_context",
+            default=None,
+            values=[None, "fork", "forkserver", "spawn"],
+            desc="Start method of the worker processes.",
+        )
+        self.options.declare(
+            "cases_per_worker",
+            default=2,
+            types=int,
+            desc="Number of cases queued per worker, to keep them busy.",
+        )
+
+    def run(self):
+        if self.options["problem_factory"] is None:
+            raise ValueError(f"{type(self).__name__} needs a problem_factory.")
+        if MPI:
+            raise RuntimeError(f"{type(self).__name__} doesn't run under MPI.")
+
+        self.iter_count = 0
+        self._set_name()
+        self._indep_list = list(self._designvars)
+        self._quantities = [*self.get_objective_values(), *self._cons]
+
+        model = self._problem().model
+        n_workers = self.options["n_workers"] or os.cpu_count()
+        mp_context = self.options["mp_context"]
+        cases = self.options["generator"](self._designvars, model)
+
+        with concurrent.futures.ProcessPoolExecutor(
+            n_workers,
+            mp_context=None if mp_context is None else mp.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(self.options["problem_factory"],),
+        ) as executor:
+            for metadata, outputs, discrete_outputs in _gen_completed(
+                executor,
+                _evaluate_case,
+                cases,
+                n_workers * self.options["cases_per_worker"],
+            ):
+                self._record_case(metadata, outputs, discrete_outputs)
+                self.iter_count += 1
+
+        return False
+
+    def _record_case(self, metadata, outputs, discrete_outputs):
+        model = self._problem().model
+        model._outputs.set_val(outputs)
+        for name, value in discrete_outputs.items():
+            model._discrete_outputs[name] = value
+        _transfer_inputs(model)
+
+        with RecordingDebugging(self._get_name(), self.iter_count, self):
+            self._metadata = metadata
+
+        if self.recording_options["record_derivatives"]:
+            # Linearized around the transferred outputs of the case, and
+            # recorded like DOEDriver does
+            self._compute_totals(
+                of=self._quantities,
+                wrt=self._indep_list,
+                return_format=self._total_jac_format,
+                driver_scaling=False,
+            )
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+from pydantic import BaseModel
+
+from .modelling import Param
+
+# Fingerprints of stores, keyed by a hash of the sizes and modification times
+# of their files, so that unchanged stores aren't read again
+_store_fingerprints = {}
+
+
+def _update(hasher, obj):
+    """
+    Hashes an object into a hasher, independently of the order of dicts and
+    sets, which is what attrs are made of.
+    """
+    if isinstance(obj, dict):
+        hasher.update(b"dict")
+        for key in sorted(obj, key=repr):
+            _update(hasher, key)
+            _update(hasher, obj[key])
+    elif isinstance(obj, (set, frozenset)):
+        hasher.update(b"set")
+        for digest in sorted(_digest(item) for item in obj):
+            hasher.update(digest)
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(type(obj).__name__.encode())
+        for item in obj:
+            _update(hasher, item)
+    elif isinstance(obj, np.ndarray):
+        hasher.update(f"ndarray{obj.dtype.str}{obj.shape}".encode())
+        if obj.dtype.kind == "O":
+            for item in obj.ravel():
+                _update(hasher, item)
+        else:
+            hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (Param, BaseModel)):
+        hasher.update(type(obj).__name__.encode())
+        _update(hasher, obj.dict())
+    else:
+        hasher.update(repr(obj).encode())
+
+
+def _digest(obj):
+    hasher = hashlib.blake2b(digest_size=16)
+    _update(hasher, obj)
+    return hasher.digest()
+
+
+def _gen_store_files(path):
+    for directory, subdirectories, file_names in os.walk(path):
+        # Walked in a deterministic order
+        subdirectories.sort()
+        for file_name in sorted(file_names):
+            file_path = os.path.join(directory, file_name)
+            yield os.path.relpath(file_path, path).replace(os.sep, "/"), file_path
+
+
+def _store_fingerprint(path):
+    files = list(_gen_store_files(path))
+    stat_hasher = hashlib.blake2b(digest_size=16)
+    for key, file_path in files:
+        stat = os.stat(file_path)
+        stat_hasher.update(f"{key}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    stat_key = (os.path.abspath(path), stat_hasher.hexdigest())
+
+    try:
+        return _store_fingerprints[stat_key]
+    except KeyError:
+        pass
+
+    # The metadata (with the attrs) and the chunks as stored, i.e. without
+    # decompressing them
+    hasher = hashlib.blake2b(digest_size=16)
+    for key, file_path in files:
+        hasher.update(key.encode() + b"\0")
+        with open(file_path, "rb") as file:
+            hasher.update(hashlib.blake2b(file.read(), digest_size=16).digest())
+    fingerprint = _store_fingerprints[stat_key] = hasher.hexdigest()
+    return fingerprint
+
+
+def fingerprint(source) -> str:
+    """
+    Returns a fingerprint of the contents of a dataset, or of a Zarr store
+    given by path. Stores are fingerprinted from their stored (compressed)
+    chunks and metadata including the attrs, without decoding them, and only
+    read again when their files have changed. Datasets are fingerprinted from
+    their values, dims and attrs, which loads them.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.isdir(source):
+            raise ValueError(f"{source} is not a Zarr store.")
+        return _store_fingerprint(source)
+
+    hasher = hashlib.blake2b(digest_size=16)
+    _update(hasher, source.attrs)
+    for name in sorted(source.variables):
+        var = source.variables[name]
+        _update(hasher, (name, var.dims, var.attrs, var.values))
+    return hasher.hexdigest()
+
+
+class ResultsCache:
+    """
+    Caches the results of processing functions (e.g. `pareto_subset`,
+    `hypervolume` or `feasible_subset`) on disk, keyed by the fingerprint of
+    the dataset or store they are applied to, the function and its other
+    arguments. Results are thus invalidated when the data changes. At most
+    ``max_entries`` results are kept, evicting the least recently used ones.
+
+    Call with the function, the dataset or store path and any other arguments
+    of the function. Stores are only loaded when the result isn't cached.
+    Results must be picklable, and datasets are loaded into memory before
+    being cached.
+    """
+
+    def __init__(self, directory, max_entries=128):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    @classmethod
+    def next_to(cls, store_path, **kwargs):
+        """
+        Returns a cache in a directory next to a store, named after it.
+        """
+        store_path = Path(store_path)
+        return cls(store_path.with_name(f"{store_path.name}.cache"), **kwargs)
+
+    def key(self, func, source, *args, **kwargs) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{func.__module__}.{func.__qualname__}\0".encode())
+        hasher.update(fingerprint(source).encode())
+        _update(hasher, (args, kwargs))
+        return hasher.hexdigest()
+
+    def __call__(self, func, source, *args, **kwargs):
+        path = self.directory / f"{self.key(func, source, *args, **kwargs)}.pickle"
+        try:
+            with open(path, "rb") as file:
+                result = pickle.load(file)
+        except FileNotFoundError:
+            pass
+        else:
+            # Marks it as recently used
+            os.utime(path)
+            return result
+
+        if isinstance(source, (str, os.PathLike)):
+            from .io import load_zarr
+
+            source = load_zarr(source)
+        result = func(source, *args, **kwargs)
+        if isinstance(result, (xr.Dataset, xr.DataArray)):
+            result = result.load()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Readers never see a half-written file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+        return result
+
+    def _evict(self):
+        paths = sorted(
+            self.directory.glob("*.pickle"),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+        for path in paths[self.max_entries :]:
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        for path in self.directory.glob("*.pickle"):
+            path.unlink(missing_ok=True)
@@ -1,8 +1,21 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from numbers import Number
 
 import jsonpickle
 import numpy as np
 import xarray as xr
+import zarr
+
+from .constants import DESIGN_ID
+from .ragged import (
+    RAGGED_ATTR,
+    gather_ragged,
+    is_ragged,
+    ragged_companion_names,
+    ragged_names,
+)
 
 CURRENT_ENCODING_VERSION = 0
 
@@ -42,15 +55,40 @@ def jsondecode_attrs(attrs):
     return jsonpickle.decode(attrs["_scop:encoded_attrs"])
 
 
+def _map(func, iterable, n_threads):
+    if not n_threads or n_threads == 1:
+        return list(map(func, iterable))
+    with ThreadPoolExecutor(n_threads) as executor:
+        return list(executor.map(func, iterable))
+
+
+def _encode_var_attrs(enc_ds, n_threads):
+    variables = list(enc_ds.variables.values())
+    for var, attrs in zip(
+        variables,
+        _map(lambda var: jsonencode_attrs(var.attrs), variables, n_threads),
+    ):
+        var.attrs = attrs
+
+
 def dump_netcdf(ds: xr.Dataset, path, default_compression="lzf", **kwargs):
+    """
+    Dumps a dataset to a netCDF4/HDF5 file. Unlike `dump_zarr`, it takes no
+    ``n_threads``, since HDF5 writes one variable at a time.
+    """
+    if "n_threads" in kwargs:
+        raise TypeError(
+            "dump_netcdf does not support n_threads, since HDF5 writes one "
+            "variable at a time. Use dump_zarr for threaded dumps."
+        )
     # Make a shallow copy so we don't mangle the attrs of the ds we're dumping.
     enc_ds = ds.copy(deep=False)
 
     enc_ds.attrs = jsonencode_attrs(enc_ds.attrs)
+    _encode_var_attrs(enc_ds, None)
 
-    for var in enc_ds.variables.values():
-        var.attrs = jsonencode_attrs(var.attrs)
-        if default_compression:
+    if default_compression:
+        for var in enc_ds.variables.values():
             var.encoding.setdefault("compression", default_compression)
 
     enc_ds.attrs["_scop:encoding_version"] = CURRENT_ENCODING_VERSION
@@ -58,11 +96,13 @@ def dump_netcdf(ds: xr.Dataset, path, default_compression="lzf", **kwargs):
     return enc_ds.to_netcdf(path=path, engine="h5netcdf", invalid_netcdf=True, **kwargs)
 
 
-def dump_zarr(ds, path, **kwargs):
+def _dump_zarr_preprocess(ds, n_threads=None):
     # Make a shallow copy so we don't mangle the attrs of the ds we're dumping.
     enc_ds = ds.copy(deep=False)
 
-    _unsafe_var_names = [(name, name.replace(":", ".")) for name in enc_ds.variables if ":" in name]
+    _unsafe_var_names = [
+        (name, name.replace(":", ".")) for name in enc_ds.variables if ":" in name
+    ]
     unsafe_var_names_fw = {orig: new for orig, new in _unsafe_var_names}
     unsafe_var_names_bw = {new: orig for orig, new in _unsafe_var_names}
 
@@ -73,17 +113,95 @@ def dump_zarr(ds, path, **kwargs):
     enc_ds.attrs["_scop:unsafe_var_names"] = unsafe_var_names_bw
 
     enc_ds.attrs = jsonencode_attrs(enc_ds.attrs)
-
-    for var in enc_ds.variables.values():
-        var.attrs = jsonencode_attrs(var.attrs)
+    _encode_var_attrs(enc_ds, n_threads)
 
     enc_ds.attrs["_scop:encoding_version"] = CURRENT_ENCODING_VERSION
 
+    return enc_ds
+
+
+def _move_keys(store, src, dst):
+    # Like zarr's rename(), which mangles the keys of stores without a rename
+    # of their own (e.g. dicts) as of zarr 2.15
+    if isinstance(store, (zarr.storage.DirectoryStore, zarr.storage.MemoryStore)):
+        store.rename(src, dst)
+        return
+    src_prefix = f"{src}/"
+    for key in [key for key in store if key.startswith(src_prefix)]:
+        store[f"{dst}/{key[len(src_prefix):]}"] = store.pop(key)
+
+
+def _dump_zarr_threaded(enc_ds, path, n_threads, consolidated=None, **kwargs):
+    # The coords and attrs are written first. Then each thread encodes,
+    # compresses and writes a batch of data variables into a group of its own
+    # (so that it never sees the half-written arrays of the others), from
+    # which they are moved into place.
+    store = enc_ds.drop_vars(list(enc_ds.data_vars)).to_zarr(
+        path, consolidated=False, **kwargs
+    )
+    # Work on the opened store from here on, whether it was given by path or
+    # not
+    root = store.zarr_group
+    batch_kwargs = {
+        key: value
+        for key, value in kwargs.items()
+        if key not in ("mode", "group", "storage_options")
+    }
+
+    # Largest first, so that the batches get about as many bytes each
+    names = sorted(enc_ds.data_vars, key=lambda name: -enc_ds[name].nbytes)
+    n_batches = min(len(names), 4 * n_threads)
+    batches = {f"_scop_batch.{idx}": names[idx::n_batches] for idx in range(n_batches)}
+
+    def dump_batch(item):
+        batch_group, batch = item
+        xr.Dataset({name: enc_ds.variables[name] for name in batch}).to_zarr(
+            root.store,
+            group=f"{root.path}/{batch_group}" if root.path else batch_group,
+            mode="a",
+            consolidated=False,
+            **batch_kwargs,
+        )
+
+    _map(dump_batch, batches.items(), n_threads)
+
+    # The chunk store defaults to the store itself
+    stores = [root.store]
+    if root.chunk_store is not root.store:
+        stores.append(root.chunk_store)
+    prefix = f"{root.path}/" if root.path else ""
+    for batch_group, batch in batches.items():
+        for name in batch:
+            for zarr_store in stores:
+                _move_keys(
+                    zarr_store, f"{prefix}{batch_group}/{name}", f"{prefix}{name}"
+                )
+        for zarr_store in stores:
+            zarr.storage.rmdir(zarr_store, f"{prefix}{batch_group}")
+    if consolidated is not False:
+        zarr.consolidate_metadata(root.store)
+    return store
+
+
+def dump_zarr(ds, path, n_threads=None, **kwargs):
+    """
+    Dumps a dataset to a Zarr store. With ``n_threads``, the attrs and data
+    variables are encoded, compressed and written by that many threads.
+    """
+    enc_ds = _dump_zarr_preprocess(ds, n_threads)
+
+    if (
+        n_threads
+        and n_threads > 1
+        and enc_ds.data_vars
+        and not {"append_dim", "region", "encoding", "compute"} & set(kwargs)
+    ):
+        return _dump_zarr_threaded(enc_ds, path, n_threads, **kwargs)
     return enc_ds.to_zarr(path, **kwargs)
 
 
-def _load_postprocess(ds):
-    encoding_version = ds.attrs.pop("_scop:encoding_version", None)
+def _check_encoding_version(attrs):
+    encoding_version = attrs.get("_scop:encoding_version", None)
     if encoding_version is None:
         raise ValueError("File cannot be recognized as a Scop dataset.")
     elif encoding_version > CURRENT_ENCODING_VERSION:
@@ -91,28 +209,502 @@ def _load_postprocess(ds):
             f"Dataset has a too new version ({encoding_version}). Maximum supported version is {CURRENT_ENCODING_VERSION}."
         )
 
+
+def _load_postprocess(ds, n_threads=None):
+    _check_encoding_version(ds.attrs)
+    ds.attrs.pop("_scop:encoding_version")
+
     ds.attrs = jsondecode_attrs(ds.attrs)
-    for var in ds.variables.values():
-        var.attrs = jsondecode_attrs(var.attrs)
+    variables = list(ds.variables.values())
+    for var, attrs in zip(
+        variables,
+        _map(lambda var: jsondecode_attrs(var.attrs), variables, n_threads),
+    ):
+        var.attrs = attrs
 
     unsafe_var_names = ds.attrs.pop("_scop:unsafe_var_names", None)
     if unsafe_var_names:
         ds = ds.rename(unsafe_var_names)
 
+    if n_threads:
+        # Loaded in place
+        _map(lambda var: var.load(), list(ds.variables.values()), n_threads)
+
     return ds
 
 
-def load_netcdf(path, **kwargs):
+def load_netcdf(path, n_threads=None, **kwargs):
+    """
+    Loads a dataset dumped with `dump_netcdf`, lazily. With ``n_threads``,
+    attrs are decoded and the variables read eagerly by that many threads,
+    although HDF5 reads one variable at a time.
+    """
     ds = xr.open_dataset(path, engine="h5netcdf", **kwargs)
 
-    return _load_postprocess(ds)
+    return _load_postprocess(ds, n_threads)
 
 
-def load_zarr(path, **kwargs):
+def load_zarr(path, n_threads=None, **kwargs):
+    """
+    Loads a dataset dumped with `dump_zarr`, lazily. With ``n_threads``, attrs
+    are decoded and the variables read and decompressed eagerly by that many
+    threads.
+    """
     ds = xr.open_zarr(path, **kwargs)
 
-    return _load_postprocess(ds)
+    return _load_postprocess(ds, n_threads)
+
+
+def _attrs_equal(a, b):
+    if type(a) is not type(b):
+        return False
+    elif isinstance(a, dict):
+        return a.keys() == b.keys() and all(_attrs_equal(a[k], b[k]) for k in a)
+    elif isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_attrs_equal(x, y) for x, y in zip(a, b))
+    elif isinstance(a, np.ndarray):
+        return a.shape == b.shape and np.array_equal(
+            a, b, equal_nan=a.dtype.kind in "fc"
+        )
+    elif hasattr(a, "__dict__"):
+        # Params, Spaces and other plain objects
+        return _attrs_equal(vars(a), vars(b))
+    # Make sure NaN bounds etc. compare equal
+    return bool(a == b) or (a != a and b != b)
+
+
+def _resolve_design_id_collisions(existing_ids: set, new_ids, on_collision):
+    colliding = np.array([id_ in existing_ids for id_ in new_ids.tolist()], dtype=bool)
+    if not colliding.any():
+        return new_ids, np.ones(len(new_ids), dtype=bool)
+
+    if on_collision == "raise":
+        raise ValueError(
+            f"{colliding.sum()} design(s) already exist in the store, "
+            f"e.g. {new_ids[colliding][0]!r}."
+        )
+    elif on_collision == "drop":
+        return new_ids, ~colliding
+    elif on_collision == "rename":
+        if new_ids.dtype.kind not in "UO":
+            raise ValueError(
+                f"Cannot rename colliding design ids of dtype {new_ids.dtype}."
+            )
+        taken = set(new_ids.tolist())
+        renamed = new_ids.astype(object)
+        for idx in np.flatnonzero(colliding):
+            suffix = 1
+            while (
+                f"{new_ids[idx]}#{suffix}" in existing_ids
+                or f"{new_ids[idx]}#{suffix}" in taken
+            ):
+                suffix += 1
+            renamed[idx] = f"{new_ids[idx]}#{suffix}"
+            taken.add(renamed[idx])
+        return renamed.astype(str), np.ones(len(new_ids), dtype=bool)
+    else:
+        raise ValueError(f"Unknown collision handling {on_collision!r}.")
+
+
+def _widen_zarr_strings(group, name, dtype):
+    # Fixed-width strings can't be widened in place, so rewrite this (usually
+    # small) array only.
+    arr = group[name]
+    data, attrs = arr[...].astype(dtype), arr.attrs.asdict()
+    group.create_dataset(
+        name,
+        data=data,
+        chunks=arr.chunks,
+        compressor=arr.compressor,
+        filters=arr.filters,
+        overwrite=True,
+    ).attrs.put(attrs)
+
+
+def append_zarr(
+    ds: xr.Dataset, path, on_collision="raise", existing_ids: set = None, **kwargs
+):
+    """
+    Appends the designs of a dataset to an existing Scop Zarr store, given by
+    path or as a store or mapping, in place.
+
+    The dataset must have the same variables, dimensions and (decoded) attrs
+    as the store. Design ids that already exist in the store are handled
+    according to ``on_collision``: ``"raise"``, ``"drop"`` the new designs or
+    ``"rename"`` them with a ``#<n>`` suffix. The attrs of the store are kept.
+
+    When appending in batches, pass the design ids of the store as a set in
+    ``existing_ids`` to not read them all again for each batch. The set is
+    updated with the appended ids.
+    """
+    if existing_ids is None:
+        stored_ds = xr.open_zarr(path, chunks=None)
+        existing_ids = set(stored_ds[DESIGN_ID].values.tolist())
+        stored_id_var = stored_ds.variables[DESIGN_ID]
+    else:
+        # Opening the store reads its index
+        stored_ds = xr.open_zarr(path, chunks=None, drop_variables=[DESIGN_ID])
+        stored_id_var = None
+    _check_encoding_version(stored_ds.attrs)
+    unsafe_var_names = jsondecode_attrs(stored_ds.attrs).get(
+        "_scop:unsafe_var_names", {}
+    )
+    stored_names = {unsafe_var_names.get(name, name) for name in stored_ds.variables}
+    stored_names.add(DESIGN_ID)
+
+    if stored_names != set(ds.variables):
+        raise ValueError(
+            "Variables differ from the store. "
+            f"Missing: {sorted(stored_names - set(ds.variables))}, "
+            f"unexpected: {sorted(set(ds.variables) - stored_names)}."
+        )
+
+    enc_ds = _dump_zarr_preprocess(ds)
+    widened_strings = {}
+
+    ragged = [
+        name
+        for name, var in enc_ds.data_vars.items()
+        if jsondecode_attrs(var.attrs).get(RAGGED_ATTR, False)
+    ]
+    for name in ragged:
+        # Pad the shapes of the new designs, if they have fewer dimensions
+        _, shape_name = ragged_companion_names(name)
+        shape_var = enc_ds[shape_name]
+        ndim_dim = shape_var.dims[1]
+        n_pad = stored_ds.sizes[ndim_dim] - shape_var.sizes[ndim_dim]
+        if n_pad > 0:
+            enc_ds[shape_name] = shape_var.pad(
+                {ndim_dim: (0, n_pad)}, constant_values=-1
+            ).assign_attrs(shape_var.attrs)
+
+    for name, var in enc_ds.variables.items():
+        if name == DESIGN_ID and stored_id_var is None:
+            # Checked against the metadata of the store below
+            continue
+        stored_var = stored_ds.variables[name]
+        if var.dims != stored_var.dims:
+            raise ValueError(
+                f"Variable {name!r} has dims {var.dims}, but the store has "
+                f"{stored_var.dims}."
+            )
+        if name in ragged:
+            # Appended separately below
+            pass
+        elif DESIGN_ID not in var.dims:
+            if not var.equals(stored_var):
+                raise ValueError(f"Variable {name!r} differs from the store.")
+        elif var.shape[1:] != stored_var.shape[1:]:
+            raise ValueError(
+                f"Variable {name!r} has shape {var.shape[1:]} per design, but the "
+                f"store has {stored_var.shape[1:]}."
+            )
+
+        if not _attrs_equal(
+            jsondecode_attrs(var.attrs), jsondecode_attrs(stored_var.attrs)
+        ):
+            raise ValueError(f"Attrs of variable {name!r} differ from the store.")
+        # Leave the encoded attrs of the store untouched
+        var.attrs = dict(stored_var.attrs)
+
+        if var.dtype != stored_var.dtype:
+            if var.dtype.kind == "U" and stored_var.dtype.kind == "U":
+                if var.dtype.itemsize > stored_var.dtype.itemsize:
+                    widened_strings[name] = var.dtype
+                else:
+                    enc_ds[name] = var.astype(stored_var.dtype)
+            elif np.can_cast(var.dtype, stored_var.dtype, casting="same_kind"):
+                enc_ds[name] = var.astype(stored_var.dtype)
+            else:
+                raise ValueError(
+                    f"Variable {name!r} has dtype {var.dtype}, but the store has "
+                    f"{stored_var.dtype}."
+                )
+
+    design_ids, keep = _resolve_design_id_collisions(
+        existing_ids, enc_ds[DESIGN_ID].values, on_collision
+    )
+    enc_ds = enc_ds.isel({DESIGN_ID: keep}).assign_coords({DESIGN_ID: design_ids[keep]})
+    if not enc_ds.sizes[DESIGN_ID]:
+        return None
+
+    stored_dtype = (
+        zarr.open_group(path, mode="r")[DESIGN_ID].dtype
+        if stored_id_var is None
+        else stored_id_var.dtype
+    )
+    if (
+        design_ids.dtype.kind == "U"
+        and design_ids.dtype.itemsize > stored_dtype.itemsize
+    ):
+        widened_strings[DESIGN_ID] = design_ids.dtype
+
+    if widened_strings:
+        group = zarr.open_group(path, mode="r+")
+        for name, dtype in widened_strings.items():
+            _widen_zarr_strings(group, name, dtype)
+        zarr.consolidate_metadata(group.store)
+
+    enc_ds.attrs = dict(stored_ds.attrs)
+
+    # The flat values of ragged variables are appended to their own
+    # dimension, with the offsets of the new designs shifted past the stored
+    # values
+    ragged_values = {}
+    for name in ragged:
+        offsets_name, _ = ragged_companion_names(name)
+        (values_dim,) = enc_ds[name].dims
+        ragged_values[name] = enc_ds[name].values
+        enc_ds[offsets_name] = (
+            enc_ds[offsets_name] + stored_ds.sizes[values_dim]
+        ).assign_attrs(enc_ds[offsets_name].attrs)
+    enc_ds = enc_ds.drop_vars(ragged)
+
+    store = enc_ds.to_zarr(path, append_dim=DESIGN_ID, **kwargs)
+    if ragged_values:
+        group = store.zarr_group
+        for name, values in ragged_values.items():
+            group[name].append(values.astype(group[name].dtype))
+        zarr.consolidate_metadata(group.store)
+    existing_ids.update(enc_ds[DESIGN_ID].values.tolist())
+    return store
+
+
+def _arrow_layout(ds, flatten):
+    if flatten not in ("columns", "lists"):
+        raise ValueError(f"Unknown flattening {flatten!r}.")
+
+    # Recreated from the offsets of the list columns when loading
+    offsets_names = {ragged_companion_names(name)[0] for name in ragged_names(ds)}
+
+    variables = {}
+    for name, var in ds.variables.items():
+        if name in offsets_names:
+            continue
+        var_layout = variables[name] = {
+            "dims": list(var.dims),
+            "dtype": var.dtype.str,
+            "attrs": jsonpickle.encode(var.attrs),
+        }
+        if is_ragged(var):
+            # Stored as a variable-size list column, regardless of flatten
+            var_layout["ragged"] = True
+            var_layout["columns"] = [name]
+            continue
+        elif DESIGN_ID not in var.dims:
+            # Stored in the schema metadata rather than as columns
+            var_layout["values"] = jsonpickle.encode(var.values.tolist())
+            continue
+        elif var.dims[0] != DESIGN_ID:
+            raise ValueError(
+                f"Variable {name!r} must have {DESIGN_ID!r} as its first dimension."
+            )
+
+        shape = var.shape[1:]
+        var_layout["shape"] = list(shape)
+        if shape and flatten == "columns":
+            var_layout["columns"] = [
+                f"{name}[{','.join(map(str, idx))}]" for idx in np.ndindex(*shape)
+            ]
+        else:
+            var_layout["columns"] = [name]
+
+    return {
+        "encoding_version": CURRENT_ENCODING_VERSION,
+        "flatten": flatten,
+        "attrs": jsonpickle.encode(ds.attrs),
+        "coord_names": list(ds.coords),
+        "variables": variables,
+    }
+
+
+def _ragged_list_array(ds, name):
+    import pyarrow as pa
+
+    values, lengths = gather_ragged(ds, name)
+    return pa.ListArray.from_arrays(
+        pa.array(np.concatenate([[0], np.cumsum(lengths)]), type=pa.int32()),
+        pa.array(values),
+    )
+
+
+def _gen_arrow_batches(ds, layout, batch_size):
+    import pyarrow as pa
+
+    design_vars = {
+        name: var_layout
+        for name, var_layout in layout["variables"].items()
+        if "columns" in var_layout
+    }
+    names = [
+        column
+        for var_layout in design_vars.values()
+        for column in var_layout["columns"]
+    ]
+    schema = None
+    # Always yield at least one (possibly empty) batch, so that we get a schema
+    for start in range(0, max(ds.sizes.get(DESIGN_ID, 0), 1), batch_size):
+        # Only this slice is read if the ds is backed by a store
+        chunk = ds.isel({DESIGN_ID: slice(start, start + batch_size)})
+        arrays = []
+        for name, var_layout in design_vars.items():
+            if var_layout.get("ragged", False):
+                arrays.append(_ragged_list_array(chunk, name))
+                continue
+
+            values = chunk.variables[name].values
+            if not var_layout["shape"]:
+                arrays.append(pa.array(values))
+                continue
+
+            flat = values.reshape(len(values), int(np.prod(var_layout["shape"])))
+            if layout["flatten"] == "columns":
+                arrays.extend(pa.array(flat[:, idx]) for idx in range(flat.shape[1]))
+            else:
+                arrays.append(
+                    pa.FixedSizeListArray.from_arrays(
+                        pa.array(flat.ravel()), flat.shape[1]
+                    )
+                )
+
+        if schema is None:
+            schema = pa.RecordBatch.from_arrays(arrays, names=names).schema
+            schema = schema.with_metadata({"scop": json.dumps(layout)})
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _arrow_to_numpy(chunked_array, dtype):
+    import pyarrow as pa
+
+    # A single chunk can be viewed without copying, as long as it's a
+    # primitive type without nulls
+    array = (
+        chunked_array.chunk(0)
+        if chunked_array.num_chunks == 1
+        else chunked_array.combine_chunks()
+    )
+    if pa.types.is_fixed_size_list(array.type):
+        array = array.flatten()
+    values = array.to_numpy(zero_copy_only=False)
+    return values if values.dtype == dtype else values.astype(dtype)
+
+
+def _arrow_list_to_numpy(chunked_array, dtype):
+    array = chunked_array.combine_chunks()
+    offsets = array.offsets.to_numpy()
+    values = array.flatten().to_numpy(zero_copy_only=False)
+    return values.astype(dtype, copy=False), offsets[:-1] - offsets[0]
+
+
+def _arrow_table_to_dataset(table):
+    layout = json.loads(table.schema.metadata[b"scop"])
+    _check_encoding_version({"_scop:encoding_version": layout["encoding_version"]})
+
+    variables = {}
+    for name, var_layout in layout["variables"].items():
+        dtype = np.dtype(var_layout["dtype"])
+        if "columns" not in var_layout:
+            values = np.asarray(jsonpickle.decode(var_layout["values"]), dtype=dtype)
+        elif var_layout.get("ragged", False):
+            if name not in table.column_names:
+                continue
+            values, offsets = _arrow_list_to_numpy(table.column(name), dtype)
+            variables[ragged_companion_names(name)[0]] = xr.Variable(
+                [DESIGN_ID], offsets
+            )
+        elif var_layout["columns"][0] in table.column_names:
+            columns = [
+                _arrow_to_numpy(table.column(column), dtype)
+                for column in var_layout["columns"]
+            ]
+            values = columns[0] if len(columns) == 1 else np.stack(columns, axis=1)
+            values = values.reshape(len(table), *var_layout["shape"])
+        else:
+            # Not selected when reading
+            continue
+
+        variables[name] = xr.Variable(
+            var_layout["dims"], values, attrs=jsonpickle.decode(var_layout["attrs"])
+        )
+
+    ds = xr.Dataset(variables, attrs=jsonpickle.decode(layout["attrs"]))
+    return ds.set_coords([name for name in layout["coord_names"] if name in ds])
+
+
+def _arrow_columns(schema, variables):
+    if variables is None:
+        return None
+    layout = json.loads(schema.metadata[b"scop"])
+    names = [DESIGN_ID]
+    for name in variables:
+        names.append(name)
+        if layout["variables"][name].get("ragged", False):
+            names.append(ragged_companion_names(name)[1])
+    return [column for name in names for column in layout["variables"][name]["columns"]]
+
+
+def dump_parquet(
+    ds: xr.Dataset, path, flatten="columns", row_group_size=10_000, **kwargs
+):
+    """
+    Dumps a dataset as a flat Parquet table with one row per design.
+
+    Multi-dimensional variables are flattened into one column per element
+    (``flatten="columns"``) or into fixed-size list columns
+    (``flatten="lists"``). Rows are read and written ``row_group_size`` designs
+    at a time, so a lazily loaded store is never loaded as a whole. Requires
+    pyarrow.
+    """
+    import pyarrow.parquet as pq
+
+    layout = _arrow_layout(ds, flatten)
+    batches = _gen_arrow_batches(ds, layout, row_group_size)
+    first_batch = next(batches)
+    with pq.ParquetWriter(path, first_batch.schema, **kwargs) as writer:
+        for batch in chain([first_batch], batches):
+            writer.write_batch(batch)
+
+
+def dump_arrow(ds: xr.Dataset, path, flatten="lists", batch_size=10_000, **kwargs):
+    """
+    Dumps a dataset as an Arrow IPC file with one row per design. See
+    `dump_parquet`.
+    """
+    import pyarrow as pa
+
+    layout = _arrow_layout(ds, flatten)
+    batches = _gen_arrow_batches(ds, layout, batch_size)
+    first_batch = next(batches)
+    with pa.ipc.new_file(str(path), first_batch.schema, **kwargs) as writer:
+        for batch in chain([first_batch], batches):
+            writer.write_batch(batch)
+
+
+def load_parquet(path, variables=None, **kwargs):
+    """
+    Loads a dataset dumped with `dump_parquet`, optionally only the given
+    variables.
+    """
+    import pyarrow.parquet as pq
+
+    columns = _arrow_columns(pq.read_schema(path), variables)
+    return _arrow_table_to_dataset(pq.read_table(path, columns=columns, **kwargs))
+
+
+def load_arrow(path, variables=None):
+    """
+    Loads a dataset dumped with `dump_arrow`, optionally only the given
+    variables. The file is memory-mapped, and numerical list columns written as
+    a single batch are used without copying.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    if variables is not None:
+        table = table.select(_arrow_columns(table.schema, variables))
+    return _arrow_table_to_dataset(table)
 
 
 dump = dump_zarr
 load = load_zarr
+append = append_zarr
@@ -0,0 +1,89 @@
+import numpy as np
+import xarray as xr
+
+from .constants import DESIGN_ID
+
+# Dimensions of the non-zero entries, rows (responses) and columns (design
+# variables) of recorded Jacobians
+JAC_NNZ = "jac_nnz"
+JAC_ROW = "jac_row"
+JAC_COL = "jac_col"
+
+
+def _labels(sizes, dim, prefix):
+    return {
+        f"jac.{prefix}": xr.DataArray(
+            np.repeat(np.array(list(sizes), dtype=str), list(sizes.values())),
+            dims=[dim],
+        ),
+        f"jac.{prefix}_index": xr.DataArray(
+            np.concatenate(
+                [np.arange(size, dtype=np.int64) for size in sizes.values()]
+                or [np.empty(0, dtype=np.int64)]
+            ),
+            dims=[dim],
+        ),
+    }
+
+
+def encode_jacobians(rows: dict, cols: dict, cases: list) -> dict:
+    """
+    Encodes the Jacobians of several cases in a COO layout, with a sparsity
+    pattern shared by all cases: the union of their non-zero entries, in
+    row-major order. ``rows`` and ``cols`` map the names of the responses and
+    design variables to their sizes, in order. Each case is a tuple of the row
+    indices, column indices and values of its non-zero entries. Returns a dict
+    of data arrays, to be assigned to a dataset.
+    """
+    n_cols = sum(cols.values())
+    flat_idxs = [case_rows * n_cols + case_cols for case_rows, case_cols, _ in cases]
+    pattern = np.unique(np.concatenate(flat_idxs or [np.empty(0, dtype=np.int64)]))
+    values = np.zeros((len(cases), len(pattern)))
+    for case_values, flat_idx, (_, _, nonzero_values) in zip(values, flat_idxs, cases):
+        case_values[np.searchsorted(pattern, flat_idx)] = nonzero_values
+
+    return {
+        "jac.values": xr.DataArray(values, dims=[DESIGN_ID, JAC_NNZ]),
+        "jac.row": xr.DataArray(pattern // max(n_cols, 1), dims=[JAC_NNZ]),
+        "jac.col": xr.DataArray(pattern % max(n_cols, 1), dims=[JAC_NNZ]),
+        **_labels(rows, JAC_ROW, "of"),
+        **_labels(cols, JAC_COL, "wrt"),
+    }
+
+
+def decode_jacobian(ds: xr.Dataset, idx: int):
+    """
+    Returns the Jacobian of the design at an index as a `scipy.sparse.csr_array`.
+    Only the values of that design are read.
+    """
+    from scipy.sparse import csr_array
+
+    return csr_array(
+        (ds["jac.values"][idx].values, (ds["jac.row"].values, ds["jac.col"].values)),
+        shape=(ds.sizes[JAC_ROW], ds.sizes[JAC_COL]),
+    )
+
+
+def jacobian_block(ds: xr.Dataset, of: str, wrt: str) -> np.ndarray:
+    """
+    Returns the derivatives of a response with respect to a design variable,
+    of all designs, as a dense array of shape (designs, response size, design
+    variable size). Only the non-zero entries of the block are read.
+    """
+    of_rows = np.flatnonzero(ds["jac.of"].values == of)
+    wrt_cols = np.flatnonzero(ds["jac.wrt"].values == wrt)
+    if not len(of_rows) or not len(wrt_cols):
+        raise KeyError(f"No derivatives of {of!r} with respect to {wrt!r}.")
+
+    row, col = ds["jac.row"].values, ds["jac.col"].values
+    (entries,) = np.nonzero(
+        (row >= of_rows[0])
+        & (row <= of_rows[-1])
+        & (col >= wrt_cols[0])
+        & (col <= wrt_cols[-1])
+    )
+    block = np.zeros((ds.sizes[DESIGN_ID], len(of_rows), len(wrt_cols)))
+    block[:, row[entries] - of_rows[0], col[entries] - wrt_cols[0]] = (
+        ds["jac.values"].isel({JAC_NNZ: entries}).values
+    )
+    return block
@@ -1,9 +1,18 @@
-from typing import Any, Optional
+import weakref
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Optional
 
 import numpy as np
 import openmdao.api as om
 from openmdao.core.component import Component
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+
+from .constants import DESIGN_ID
+
+if TYPE_CHECKING:
+    import xarray as xr
 
 NOT_SET = object()
 
@@ -13,7 +22,24 @@ class Space(BaseModel):
     Base class for representing a space of values. Don't use this directly.
     """
 
-    pass
+    # Not a field, see _freeze()
+    __slots__ = ("_frozen",)
+
+    class Config:
+        allow_mutation = False
+
+    def contains(self, values) -> np.ndarray:
+        """
+        Returns a boolean mask of which (element-wise) values are in the space.
+        """
+        raise NotImplementedError
+
+    def clip(self, values) -> np.ndarray:
+        """
+        Returns the values with the ones outside the space replaced by the
+        closest value in it.
+        """
+        raise NotImplementedError
 
 
 class InnumSpace(Space):
@@ -21,7 +47,11 @@ class InnumSpace(Space):
     A space of innumerable values, such as arbitrary strings or objects.
     """
 
-    pass
+    def contains(self, values) -> np.ndarray:
+        return np.ones(np.shape(values), dtype=bool)
+
+    def clip(self, values) -> np.ndarray:
+        return np.asarray(values)
 
 
 class EnumSpace(Space):
@@ -32,6 +62,35 @@ class EnumSpace(Space):
     values: list[Any] = Field(default_factory=list)
     ordered: bool = Field(default=False)
 
+    def contains(self, values) -> np.ndarray:
+        return np.isin(values, np.asarray(self.values))
+
+    def clip(self, values) -> np.ndarray:
+        """
+        Returns the values with the ones outside the space replaced by the
+        closest value in it. Only numeric values can be snapped, others raise a
+        ValueError if not in the space.
+        """
+        values = np.asarray(values)
+        codebook = np.sort(np.asarray(self.values))
+        if codebook.dtype.kind not in "iuf" or values.dtype.kind not in "iuf":
+            invalid = ~self.contains(values)
+            if np.any(invalid):
+                raise ValueError(
+                    "Values not in the space and not snappable: "
+                    f"{np.unique(values[invalid])!r}"
+                )
+            return values
+
+        upper_idxs = np.searchsorted(codebook, values).clip(1, len(codebook) - 1)
+        lower_values = codebook[upper_idxs - 1]
+        upper_values = codebook[upper_idxs]
+        return np.where(
+            np.abs(values - lower_values) <= np.abs(upper_values - values),
+            lower_values,
+            upper_values,
+        )
+
 
 class BoundedSpace(Space):
     lower: Optional[Any] = Field(default=None)
@@ -43,6 +102,27 @@ class BoundedSpace(Space):
     def __init__(self, lower=None, upper=None, **kwargs):
         super().__init__(lower=lower, upper=upper, **kwargs)
 
+    def contains(self, values) -> np.ndarray:
+        values = np.asarray(values)
+        # Bounds only apply to numbers, e.g. not to strings of a discrete param
+        # left with the default space
+        if values.dtype.kind not in "biuf":
+            return np.ones(values.shape, dtype=bool)
+        mask = ~np.isnan(values)
+        if self.lower is not None:
+            mask &= values >= self.lower
+        if self.upper is not None:
+            mask &= values <= self.upper
+        return mask
+
+    def clip(self, values) -> np.ndarray:
+        values = np.asarray(values)
+        if values.dtype.kind not in "biuf" or (
+            self.lower is None and self.upper is None
+        ):
+            return values
+        return np.clip(values, self.lower, self.upper)
+
 
 class RealSpace(BoundedSpace):
     """
@@ -61,12 +141,26 @@ class IntegerSpace(BoundedSpace):
     lower: Optional[int] = None
     upper: Optional[int] = None
 
+    def contains(self, values) -> np.ndarray:
+        values = np.asarray(values)
+        return super().contains(values) & (np.rint(values) == values)
+
+    def clip(self, values) -> np.ndarray:
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            values = np.rint(values)
+        return super().clip(values)
+
 
 def bool_space():
     return EnumSpace(values=[False, True])
 
 
-class Param(BaseModel):
+class ParamModel(BaseModel):
+    """
+    Schema of `Param`, used for validating values given to it.
+    """
+
     name: str = Field(description="Unique name.")
     label: Optional[str] = Field(description="Short, human-friendly name.")
     desc: Optional[str] = Field(description="Longer description.")
@@ -93,18 +187,223 @@ class Param(BaseModel):
     )
 
     class Config:
-        allow_mutation = False
+        arbitrary_types_allowed = True
+
+
+PARAM_FIELDS = tuple(ParamModel.__fields__)
+
+# Spaces are immutable, so all params can share the same default one
+_DEFAULT_PARAM_FIELDS = {
+    "label": None,
+    "desc": None,
+    "default": None,
+    "units": None,
+    "space": RealSpace(),
+    "discrete": False,
+    "tags": (),
+    "meta": MappingProxyType({}),
+    "parent": None,
+}
+
+_interned_params = weakref.WeakValueDictionary()
+
+_ATOMIC_TYPES = frozenset((int, float, complex))
+_FROZEN_BOOLS = {False: (bool, False), True: (bool, True)}
+_FROZEN_EMPTY = {
+    tuple: (tuple, ()),
+    list: (list, ()),
+    dict: (dict, frozenset()),
+    MappingProxyType: (dict, frozenset()),
+}
+
+
+def _freeze(value):
+    """
+    Makes a hashable representation of a value, for comparing and interning
+    params. Raises TypeError for unhashable values it doesn't know about.
+    """
+    type_ = type(value)
+    if type_ is str or value is None:
+        return value
+    elif type_ is bool:
+        return _FROZEN_BOOLS[value]
+    elif type_ in _FROZEN_EMPTY and not value:
+        # Saves some memory for the most common cases
+        return _FROZEN_EMPTY[type_]
+    elif type_ in _ATOMIC_TYPES:
+        # Include the type, so that e.g. True and 1 aren't considered equal
+        return (type_, value)
+    elif type_ is tuple or type_ is list:
+        return (type_, tuple(_freeze(item) for item in value))
+    elif type_ is MappingProxyType or type_ is dict:
+        return (dict, frozenset((key, _freeze(item)) for key, item in value.items()))
+    elif isinstance(value, Space):
+        # Spaces are immutable, so we can cache this
+        try:
+            return value._frozen
+        except AttributeError:
+            frozen = (type_, _freeze(vars(value)))
+            object.__setattr__(value, "_frozen", frozen)
+            return frozen
+    elif isinstance(value, np.ndarray):
+        return (np.ndarray, value.dtype.str, value.shape, value.tobytes())
+    elif isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_freeze(item) for item in value))
+    elif isinstance(value, BaseModel):
+        return (type_, _freeze(vars(value)))
+    return (type_, hash(value), value)
+
+
+def _normalize_param_fields(fields):
+    # Make the mutable fields immutable
+    fields["tags"] = tuple(fields["tags"])
+    if not isinstance(fields["meta"], MappingProxyType):
+        fields["meta"] = (
+            MappingProxyType(dict(fields["meta"]))
+            if fields["meta"]
+            else _DEFAULT_PARAM_FIELDS["meta"]
+        )
+    if isinstance(fields["default"], np.ndarray) and fields["default"].flags.writeable:
+        fields["default"] = fields["default"].copy()
+        fields["default"].flags.writeable = False
+    return fields
+
+
+def _validate_param_fields(kwargs, base_fields):
+    fields = dict(base_fields)
+    errors = []
+    for key, value in kwargs.items():
+        try:
+            model_field = ParamModel.__fields__[key]
+        except KeyError:
+            raise TypeError(f"Param has no field {key!r}")
+        fields[key], error = model_field.validate(
+            value, fields, loc=key, cls=ParamModel
+        )
+        if error:
+            errors.append(error)
+
+    if "name" not in fields:
+        errors.append(ErrorWrapper(MissingError(), loc="name"))
+    if errors:
+        raise ValidationError(errors, ParamModel)
+
+    return _normalize_param_fields(fields)
+
+
+def _param_key(fields):
+    try:
+        return tuple(
+            # Params are already hashable, and cache their hashes
+            fields[name] if name == "parent" else _freeze(fields[name])
+            for name in PARAM_FIELDS
+        )
+    except TypeError:
+        # Unhashable contents
+        return None
+
+
+def _restore_param(state):
+    return Param._intern(_normalize_param_fields({**_DEFAULT_PARAM_FIELDS, **state}))
+
+
+class _InterningMeta(type):
+    def __call__(cls, **kwargs):
+        return cls._intern(_validate_param_fields(kwargs, _DEFAULT_PARAM_FIELDS))
+
+
+class Param(metaclass=_InterningMeta):
+    """
+    A parameter, i.e. a variable with a name, units, space and other metadata.
+    See `ParamModel` for the fields.
+
+    Params are immutable, hashable and interned, so creating a param equal to an
+    existing one gives back the existing object. Only values given to the
+    constructor or `override` are validated.
+    """
+
+    __slots__ = (*PARAM_FIELDS, "_key", "_hash", "__weakref__")
+
+    @classmethod
+    def _intern(cls, fields):
+        key = _param_key(fields)
+        if key is not None:
+            param = _interned_params.get(key, None)
+            if param is not None:
+                return param
+
+        param = object.__new__(cls)
+        param._set_fields(fields, key)
+        if key is not None:
+            _interned_params[key] = param
+        return param
+
+    def _set_fields(self, fields, key):
+        for name in PARAM_FIELDS:
+            object.__setattr__(self, name, fields[name])
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(
+            self,
+            "_hash",
+            # Fall back to a partial hash and field-wise comparisons
+            hash((self.name, self.units, self.discrete)) if key is None else hash(key),
+        )
+
+    def __setattr__(self, name, value):
+        raise TypeError(
+            f'"{type(self).__name__}" is immutable and does not support item assignment'
+        )
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        elif not isinstance(other, Param) or self._hash != other._hash:
+            return False
+        elif self._key is not None and other._key is not None:
+            return self._key == other._key
+        try:
+            return all(
+                bool(np.all(getattr(self, name) == getattr(other, name)))
+                for name in PARAM_FIELDS
+            )
+        except ValueError:
+            return False
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in PARAM_FIELDS)
+        return f"Param({fields})"
+
+    def __reduce__(self):
+        return (_restore_param, (self.dict(),))
+
+    def __setstate__(self, state):
+        # Params pickled by jsonpickle before they were interned come as
+        # pydantic model states
+        fields = _normalize_param_fields(
+            {**_DEFAULT_PARAM_FIELDS, **state.get("__dict__", state)}
+        )
+        self._set_fields(fields, _param_key(fields))
+
+    def dict(self):
+        return {
+            **{name: getattr(self, name) for name in PARAM_FIELDS},
+            "tags": list(self.tags),
+            "meta": dict(self.meta),
+        }
 
     def override(self, **kwargs):
         # TODO: warn if overriding the unit on a discrete param, as no
         # unit conversion will be automatically performed
+        fields = {name: getattr(self, name) for name in PARAM_FIELDS}
+        return self._intern(_validate_param_fields({**kwargs, "parent": self}, fields))
 
-        # Copy the meta dict if not supplied, so that we don't modify
-        # the original
-        kwargs["meta"] = kwargs.pop("meta", self.meta.copy())
 
-        args = {**self.dict(), **kwargs, "parent": self}
-        return Param(**args)
+ParamModel.update_forward_refs()
 
 
 class ParamSet(dict):
@@ -118,6 +417,208 @@ class ParamSet(dict):
     def add(self, param: Param):
         self[param.name] = param
 
+    def layout(self, names: Optional[list[str]] = None) -> "ParamLayout":
+        """
+        Returns the layout of the params (or of the ones with the given names)
+        in flat vectors.
+        """
+        return ParamLayout(
+            self.values() if names is None else [self[name] for name in names]
+        )
+
+
+class ParamLayout:
+    """
+    Layout of the values of some params in flat float vectors, e.g. for
+    external optimizers and surrogate models.
+
+    Each param takes up as many elements as its default value has, starting at
+    its offset. Values of params in an `EnumSpace` are encoded as their indices
+    in ``space.values``. Vectors can also be stacked into (designs, size)
+    matrices, which all methods accept.
+    """
+
+    def __init__(self, params: list[Param]):
+        self.params = list(params)
+        self.shapes = [np.shape(param.default) for param in self.params]
+        self.sizes = np.array([int(np.prod(shape)) for shape in self.shapes])
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])[:-1]
+        self.size = int(self.sizes.sum())
+        self.codebooks = []
+        self._sorters = []
+        self.dtypes = []
+        for param in self.params:
+            if isinstance(param.space, EnumSpace):
+                codebook = np.asarray(param.space.values)
+                self.codebooks.append(codebook)
+                self._sorters.append(np.argsort(codebook))
+                self.dtypes.append(codebook.dtype)
+            elif isinstance(param.space, IntegerSpace):
+                self.codebooks.append(None)
+                self._sorters.append(None)
+                self.dtypes.append(np.dtype(int))
+            elif isinstance(param.space, (RealSpace, type(None))):
+                self.codebooks.append(None)
+                self._sorters.append(None)
+                self.dtypes.append(np.dtype(float))
+            else:
+                raise TypeError(
+                    f"Param {param.name!r} has a space that can't be packed: "
+                    f"{param.space!r}"
+                )
+
+    def __repr__(self):
+        return f"ParamLayout({[param.name for param in self.params]!r})"
+
+    @property
+    def bounds(self):
+        """
+        Lower and upper bounds of the packed vectors, with infinite bounds for
+        unbounded spaces.
+        """
+        lower = np.full(self.size, -np.inf)
+        upper = np.full(self.size, np.inf)
+        for param, codebook, offset, size in zip(
+            self.params, self.codebooks, self.offsets, self.sizes
+        ):
+            if codebook is not None:
+                bounds = (0, len(codebook) - 1)
+            else:
+                bounds = (
+                    getattr(param.space, "lower", None),
+                    getattr(param.space, "upper", None),
+                )
+            if bounds[0] is not None:
+                lower[offset : offset + size] = bounds[0]
+            if bounds[1] is not None:
+                upper[offset : offset + size] = bounds[1]
+        return lower, upper
+
+    def _encode(self, idx, values):
+        codebook = self.codebooks[idx]
+        if codebook is None:
+            return values
+        sorter = self._sorters[idx]
+        positions = np.searchsorted(codebook, values, sorter=sorter).clip(
+            max=len(codebook) - 1
+        )
+        codes = sorter[positions]
+        invalid = codebook[codes] != values
+        if np.any(invalid):
+            raise ValueError(
+                f"Values not in the space of param {self.params[idx].name!r}: "
+                f"{np.unique(np.asarray(values)[invalid])!r}"
+            )
+        return codes
+
+    def _decode(self, idx, values):
+        codebook = self.codebooks[idx]
+        if codebook is None:
+            if self.dtypes[idx].kind == "i":
+                values = np.rint(values)
+            return values.astype(self.dtypes[idx])
+        return codebook[np.rint(values).astype(int)]
+
+    def pack(self, values: dict) -> np.ndarray:
+        """
+        Packs a dict of values, keyed by param name, into a vector. Values with
+        an extra leading dimension are packed into a matrix, one row per design.
+        """
+        batch_shape = None
+        columns = []
+        for idx, param in enumerate(self.params):
+            value = np.asarray(values[param.name])
+            n_batch_dims = value.ndim - len(self.shapes[idx])
+            if n_batch_dims not in (0, 1) or (
+                batch_shape is not None and value.shape[:n_batch_dims] != batch_shape
+            ):
+                raise ValueError(
+                    f"Param {param.name!r} has values of shape {value.shape}, but "
+                    f"its default has shape {self.shapes[idx]}."
+                )
+            batch_shape = value.shape[:n_batch_dims]
+            columns.append(
+                self._encode(idx, value).reshape((*batch_shape, self.sizes[idx]))
+            )
+
+        if not columns:
+            return np.empty(0)
+        return np.concatenate(columns, axis=-1, dtype=float)
+
+    def unpack(self, vector: np.ndarray) -> dict:
+        """
+        Unpacks a vector (or matrix) into a dict of values, keyed by param name.
+        """
+        vector = np.asarray(vector)
+        batch_shape = vector.shape[:-1]
+        return {
+            param.name: self._decode(idx, vector[..., offset : offset + size]).reshape(
+                (*batch_shape, *shape)
+            )
+            for idx, (param, offset, size, shape) in enumerate(
+                zip(self.params, self.offsets, self.sizes, self.shapes)
+            )
+        }
+
+    def _var_names(self, ds, var_names):
+        var_names = dict(var_names or {})
+        # The first variable of each param wins
+        vars_by_param = {
+            var.attrs.get("param", None): name
+            for name, var in reversed(list(ds.data_vars.items()))
+        }
+        for param in self.params:
+            if param.name in var_names:
+                continue
+            elif param in vars_by_param:
+                var_names[param.name] = vars_by_param[param]
+            elif param.name in ds:
+                var_names[param.name] = param.name
+            else:
+                raise KeyError(f"No variable found for param {param.name!r}")
+        return var_names
+
+    def from_dataset(self, ds: "xr.Dataset", var_names: dict = None) -> np.ndarray:
+        """
+        Packs the designs of a dataset into a (designs, size) matrix.
+
+        The variable of each param is looked up in ``var_names`` (keyed by
+        param name), or otherwise is the first variable with the param in its
+        attrs, or the variable with the same name as the param.
+        """
+        var_names = self._var_names(ds, var_names)
+        return self.pack(
+            {
+                param.name: ds[var_names[param.name]].transpose(DESIGN_ID, ...).values
+                for param in self.params
+            }
+        )
+
+    def to_dataset(self, matrix: np.ndarray, design_ids=None) -> "xr.Dataset":
+        """
+        Unpacks a (designs, size) matrix into a dataset, with one variable per
+        param, dimensioned like the ones recorded by `DatasetRecorder`.
+        """
+        # Imported here, to keep xarray (and pandas) out of worker processes
+        # that only evaluate components
+        import xarray as xr
+
+        values = self.unpack(matrix)
+        data_vars = {}
+        coords = {} if design_ids is None else {DESIGN_ID: design_ids}
+        for param, shape in zip(self.params, self.shapes):
+            extra_coords = {
+                f"{param.name}_{idx}": range(size) for idx, size in enumerate(shape)
+            }
+            data_vars[param.name] = xr.DataArray(
+                values[param.name],
+                dims=[DESIGN_ID, *extra_coords],
+                attrs={"param": param},
+            )
+            coords.update(extra_coords)
+
+        return xr.Dataset(data_vars, coords=coords)
+
 
 def get_scop_meta(comp: Component):
     if not hasattr(comp, "_scop_meta"):
@@ -128,7 +629,7 @@ def get_scop_meta(comp: Component):
 def add_input_param(comp: Component, param: Param):
     if param.discrete:
         comp.add_discrete_input(
-            name=param.name, val=param.default, desc=param.desc, tags=param.tags
+            name=param.name, val=param.default, desc=param.desc, tags=list(param.tags)
         )
     else:
         comp.add_input(
@@ -136,7 +637,7 @@ def add_input_param(comp: Component, param: Param):
             val=param.default,
             units=param.units,
             desc=param.desc,
-            tags=param.tags,
+            tags=list(param.tags),
         )
 
     meta = get_scop_meta(comp)
@@ -146,7 +647,7 @@ def add_input_param(comp: Component, param: Param):
 def add_output_param(comp: Component, param: Param):
     if param.discrete:
         comp.add_discrete_output(
-            name=param.name, val=param.default, desc=param.desc, tags=param.tags
+            name=param.name, val=param.default, desc=param.desc, tags=list(param.tags)
         )
     else:
         comp.add_output(
@@ -154,8 +655,21 @@ def add_output_param(comp: Component, param: Param):
             val=param.default,
             units=param.units,
             desc=param.desc,
-            tags=param.tags,
+            tags=list(param.tags),
         )
 
     meta = get_scop_meta(comp)
     meta["outputs"][param.name] = param
+
+
+def _transfer_inputs(model):
+    """
+    Updates all inputs of a model from the outputs they are connected to, like
+    a run of the model would, with unit conversions and all.
+    """
+    # OpenMDAO has no public API for this. Group._transfer(vec_name, mode,
+    # subsystem) is what the nonlinear solvers call, as of OpenMDAO 3.27
+    for group in model.system_iter(include_self=True, recurse=True, typ=om.Group):
+        # Discrete variables are only transferred to one subsystem at a time
+        for sub in group._subsystems_allprocs:
+            group._transfer("nonlinear", "fwd", sub)
@@ -1,8 +1,12 @@
+import functools
+import heapq
+
 import numpy as np
 import pygmo
 import xarray as xr
 
 from .constants import DESIGN_ID
+from .ragged import is_ragged, ragged_all, ragged_sum, with_ragged_companions
 
 
 def _is_pareto_efficient(costs):
@@ -38,14 +42,22 @@ def is_pareto_efficient(costs):
     return is_efficient
 
 
+def _select_designs(ds, mask):
+    # Index instead of masking with where(), which would broadcast the flat
+    # values of ragged variables over the designs
+    return ds.isel({DESIGN_ID: mask.sel({DESIGN_ID: ds[DESIGN_ID]}).values})
+
+
 def design_space(ds):
-    return ds.filter_by_attrs(type=lambda x: x and "desvar" in x)
+    return with_ragged_companions(
+        ds, ds.filter_by_attrs(type=lambda x: x and "desvar" in x)
+    )
 
 
 def objective_space(ds, scale=False):
     objectives = ds.filter_by_attrs(type=lambda x: x and "objective" in x)
     if not scale:
-        return objectives
+        return with_ragged_companions(ds, objectives)
 
     def _da(name, var, value):
         assert var.dims[0] == DESIGN_ID
@@ -84,11 +96,39 @@ def objective_space(ds, scale=False):
         }
     )
 
-    return objectives * scaler_ds + adder_ds
+    # OpenMDAO's convention, i.e. scaled = (value + adder) * scaler
+    return (objectives + adder_ds) * scaler_ds
 
 
 def constraint_space(ds):
-    return ds.filter_by_attrs(type=lambda x: x and "constraint" in x)
+    return with_ragged_companions(
+        ds, ds.filter_by_attrs(type=lambda x: x and "constraint" in x)
+    )
+
+
+def _ragged_bound(name, var, key):
+    bound = np.asarray(var.attrs["type"]["constraint"][key])
+    if bound.size != 1:
+        raise ValueError(f"Ragged constraint {name!r} must have scalar bounds.")
+    return bound.item()
+
+
+def _split_ragged_constraints(constraints):
+    """
+    Splits off the ragged constraints, whose flat values can't be reduced per
+    design by grouping. Returns the other constraints, and the flat values and
+    lower and upper bounds of the ragged ones, keyed by name.
+    """
+    ragged = {
+        name: (
+            var.values,
+            _ragged_bound(name, var, "lower"),
+            _ragged_bound(name, var, "upper"),
+        )
+        for name, var in constraints.items()
+        if is_ragged(var)
+    }
+    return constraints.drop_vars(list(ragged)), ragged
 
 
 def feasible_subset(ds):
@@ -103,6 +143,15 @@ def feasible_subset(ds):
     if eq_constraints:
         raise NotImplementedError("Equality constraints are not supported yet")
 
+    ineq_constraints, ragged_constraints = _split_ragged_constraints(ineq_constraints)
+    if ragged_constraints:
+        ragged_feasibility_per_design = np.ones(ds.sizes[DESIGN_ID], dtype=bool)
+        for name, (values, lower, upper) in ragged_constraints.items():
+            ragged_feasibility_per_design &= ragged_all(
+                ds, name, (values >= lower) & (values <= upper)
+            )
+        ds = ds.isel({DESIGN_ID: ragged_feasibility_per_design})
+
     if ineq_constraints:
         lower_bound_ds = xr.Dataset(
             {
@@ -126,27 +175,166 @@ def feasible_subset(ds):
             DESIGN_ID
         ).all(...)
 
-        ds = ds.where(ineq_feasibility_per_design, drop=True)
+        ds = _select_designs(ds, ineq_feasibility_per_design)
 
     return ds
 
 
-def pareto_subset(ds):
-    # objectives = ds.filter_by_attrs(role=VariableRole.OBJECTIVE)
-    if len(ds[DESIGN_ID]) < 1:
-        return ds
+def _param_vars(ds):
+    return ds.filter_by_attrs(param=lambda x: x is not None and x.space is not None)
+
+
+def space_mask(ds):
+    """
+    Returns a dataset of boolean masks of which values are in the spaces of
+    their params, for all variables with params.
+    """
+    return xr.Dataset(
+        {
+            name: xr.apply_ufunc(
+                var.attrs["param"].space.contains,
+                var,
+                dask="parallelized",
+                output_dtypes=[bool],
+            )
+            for name, var in _param_vars(ds).items()
+        }
+    )
+
+
+def space_subset(ds):
+    """
+    Returns the designs whose values all are in the spaces of their params.
+    """
+    in_space_per_design = xr.DataArray(
+        np.ones(ds.sizes[DESIGN_ID], dtype=bool), dims=[DESIGN_ID]
+    )
+    for name, var in space_mask(ds).items():
+        if is_ragged(ds[name]):
+            in_space_per_design &= ragged_all(ds, name, var.values)
+            continue
+        # Applies all() on all dimensions except DESIGN_ID
+        in_space_per_design &= var.all([dim for dim in var.dims if dim != DESIGN_ID])
+
+    return ds.isel({DESIGN_ID: in_space_per_design.values})
+
+
+def clip_to_space(ds):
+    """
+    Returns the dataset with the values of all variables with params clipped
+    (or snapped) to the spaces of their params.
+    """
+    return ds.assign(
+        {
+            name: xr.apply_ufunc(
+                var.attrs["param"].space.clip,
+                var,
+                dask="parallelized",
+                output_dtypes=[var.dtype],
+                keep_attrs=True,
+            )
+            for name, var in _param_vars(ds).items()
+        }
+    )
+
 
-    scaled_objectives = (
+@functools.lru_cache(maxsize=None)
+def _unit_conversion(from_units, to_units):
+    from openmdao.utils.units import unit_conversion
+
+    # new = (old + offset) * factor
+    return unit_conversion(from_units, to_units)
+
+
+def _convert_scaling(meta, factor, offset):
+    # Keeps mapping to the same scaled values, with OpenMDAO's convention of
+    # scaled = (value + adder) * scaler
+    meta = dict(meta)
+    for scaler_key, adder_key in [("scaler", "adder"), ("total_scaler", "total_adder")]:
+        if scaler_key not in meta or (
+            # The scaler and adder apply in the units of the driver, if given
+            scaler_key == "scaler"
+            and meta.get("units", None) is not None
+        ):
+            continue
+        scaler = 1.0 if meta[scaler_key] is None else meta[scaler_key]
+        adder = 0.0 if meta[adder_key] is None else meta[adder_key]
+        meta[scaler_key] = scaler / factor
+        meta[adder_key] = (adder - offset) * factor
+    return meta
+
+
+def _convert_attrs(attrs, units, factor, offset):
+    attrs = {**attrs, "units": units}
+    if attrs.get("type", None):
+        attrs["type"] = {
+            role: _convert_scaling(meta, factor, offset) if meta else meta
+            for role, meta in attrs["type"].items()
+        }
+    param = attrs.get("param", None)
+    if param is not None and param.units is not None:
+        attrs["param"] = param.override(units=units)
+    return attrs
+
+
+def convert_units(ds, units: dict):
+    """
+    Returns the dataset with variables converted to other units, given as a
+    dict of target units keyed by variable name or by `Param` (for all
+    variables with the param). The conversion of each variable is a single
+    (lazy, if the dataset is) vectorized operation. The units, params and the
+    scalers and adders of the driver metadata in the attrs are updated to
+    match.
+    """
+    targets = {}
+    for key, to_units in units.items():
+        if isinstance(key, str):
+            targets[key] = to_units
+        else:
+            names = list(ds.filter_by_attrs(param=lambda x: x is key).data_vars)
+            if not names:
+                raise KeyError(f"No variable found for param {key.name!r}")
+            targets.update(dict.fromkeys(names, to_units))
+
+    converted = {}
+    for name, to_units in targets.items():
+        var = ds[name]
+        from_units = var.attrs.get("units", None)
+        if from_units is None:
+            raise ValueError(f"Variable {name!r} has no units to convert from.")
+        factor, offset = _unit_conversion(from_units, to_units)
+        converted[name] = (
+            (var + offset) * factor if offset else var * factor
+        ).assign_attrs(_convert_attrs(var.attrs, to_units, factor, offset))
+
+    return ds.assign(converted)
+
+
+def _objective_matrix(ds):
+    """
+    Returns the scaled objectives as a (designs, objectives) matrix, with
+    multi-element objectives flattened.
+    """
+    return (
         objective_space(ds, scale=True)
         .unstack()
         .to_stacked_array("weights", sample_dims=[DESIGN_ID])
+        .transpose(DESIGN_ID, ...)
+        .values
     )
 
+
+def pareto_subset(ds):
+    # objectives = ds.filter_by_attrs(role=VariableRole.OBJECTIVE)
+    if len(ds[DESIGN_ID]) < 1:
+        return ds
+
     pareto_mask = xr.DataArray(
-        is_pareto_efficient(scaled_objectives.values), dims=[DESIGN_ID]
+        is_pareto_efficient(_objective_matrix(ds)), dims=[DESIGN_ID]
     )
 
-    return ds.where(pareto_mask, drop=True)
+    # Index instead of masking with where(), see _select_designs()
+    return ds.isel({DESIGN_ID: pareto_mask.values})
 
 
 def epsilonify(da: xr.DataArray, eps=np.finfo(float).eps) -> xr.DataArray:
@@ -158,11 +346,31 @@ def epsilonify(da: xr.DataArray, eps=np.finfo(float).eps) -> xr.DataArray:
 def constraint_violations(ds):
     # FIXME: support equality constraints
     # eq_constraints_ds = ds.filter_by_attrs(
-    #     type=lambda x: x and "constraint" in x and x["constraint"]["equals"] is not None
+    #     type=lambda x: x
+    #     and "constraint" in x
+    #     and x["constraint"]["equals"] is not None
     # )
     ineq_constraints_ds = ds.filter_by_attrs(
         type=lambda x: x and "constraint" in x and x["constraint"]["equals"] is None
     )
+    ineq_constraints_ds, ragged_constraints = _split_ragged_constraints(
+        ineq_constraints_ds
+    )
+
+    eps = np.finfo(float).eps
+    ragged_cv_per_design = np.zeros(ds.sizes[DESIGN_ID])
+    for name, (values, lower, upper) in ragged_constraints.items():
+        ragged_cv_per_design += ragged_sum(
+            ds,
+            name,
+            np.fabs(np.fmax(upper, values) / (upper if upper != 0.0 else eps) - 1)
+            + np.fabs(np.fmin(lower, values) / (lower if lower != 0.0 else eps) - 1),
+        )
+    ragged_cv_per_design = xr.DataArray(
+        ragged_cv_per_design, dims=[DESIGN_ID], coords={DESIGN_ID: ds[DESIGN_ID]}
+    )
+    if not ineq_constraints_ds:
+        return ragged_cv_per_design
 
     lower_bound_da = xr.Dataset(
         {
@@ -189,7 +397,10 @@ def constraint_violations(ds):
     )
 
     # Arranges the array in the same order as the input
-    return ineq_feasibility_per_design.sel({DESIGN_ID: ds[DESIGN_ID]})
+    return (
+        ineq_feasibility_per_design.sel({DESIGN_ID: ds[DESIGN_ID]})
+        + ragged_cv_per_design
+    )
 
 
 def annotate_ds_with_constraint_violations(ds):
@@ -217,3 +428,122 @@ def hypervolume(ds, ref_point=None):
     return xr.DataArray(
         hv.compute(ref_point), name="hypervolume", attrs={"units": None}
     )
+
+
+def _normalize(costs):
+    lower = costs.min(axis=0)
+    span = costs.max(axis=0) - lower
+    return (costs - lower) / np.where(span > 0, span, 1.0)
+
+
+def hypervolume_subset(ds, n_designs, ref_point=None, offset_ratio=0.001):
+    """
+    Selects (at most) ``n_designs`` designs that greedily maximize the
+    hypervolume of the scaled objectives, in order of selection. The reference
+    point defaults to the one of `hv_ref_point`.
+
+    As the hypervolume contribution of a design can only shrink as others are
+    selected, contributions are updated lazily: only the design with the
+    largest (possibly outdated) contribution is recomputed in each step.
+    """
+    costs = _objective_matrix(ds)
+    if ref_point is None:
+        nadir_point = costs.max(axis=0)
+        ref_point = nadir_point + np.abs(nadir_point) * offset_ratio
+    ref_point = np.broadcast_to(np.asarray(ref_point, dtype=float), costs.shape[1:])
+
+    # Only designs dominating the reference point contribute
+    candidates = np.flatnonzero((costs < ref_point).all(axis=1))
+    contributions = np.prod(ref_point - costs[candidates], axis=1)
+    # Max-heap of (contribution, design, number of selected designs it's
+    # up to date with)
+    heap = [(-c, idx, 0) for c, idx in zip(contributions, candidates)]
+    heapq.heapify(heap)
+
+    selected = []
+    while heap and len(selected) < n_designs:
+        neg_contribution, idx, n_selected = heapq.heappop(heap)
+        if n_selected == len(selected):
+            if neg_contribution < 0:
+                selected.append(idx)
+            continue
+        # The volume dominated by the design, minus what the selected designs
+        # already dominate of it
+        limited = np.maximum(costs[selected], costs[idx])
+        limited = limited[(limited < ref_point).all(axis=1)]
+        overlap = pygmo.hypervolume(limited).compute(ref_point) if len(limited) else 0.0
+        contribution = np.prod(ref_point - costs[idx]) - overlap
+        heapq.heappush(heap, (-contribution, idx, len(selected)))
+
+    return ds.isel({DESIGN_ID: np.array(selected, dtype=int)})
+
+
+def _maximin_indices(points, n_designs):
+    # Starts with the best design of each objective, then repeatedly adds the
+    # design farthest away from all selected ones
+    selected = list(dict.fromkeys(np.argmin(points, axis=0).tolist()))[:n_designs]
+    min_distances = np.full(len(points), np.inf)
+    for idx in selected:
+        min_distances = np.minimum(
+            min_distances, np.linalg.norm(points - points[idx], axis=1)
+        )
+    while len(selected) < min(n_designs, len(points)):
+        idx = int(np.argmax(min_distances))
+        if min_distances[idx] == 0:
+            # Only duplicates left
+            break
+        selected.append(idx)
+        min_distances = np.minimum(
+            min_distances, np.linalg.norm(points - points[idx], axis=1)
+        )
+    return selected
+
+
+def _kmeans_indices(points, n_designs, seed):
+    from scipy.cluster.vq import kmeans2
+
+    n_clusters = min(n_designs, len(points))
+    centroids, labels = kmeans2(
+        points, n_clusters, minit="++", seed=np.random.default_rng(seed)
+    )
+    # The design closest to the centroid of each (non-empty) cluster
+    distances = np.linalg.norm(points - centroids[labels], axis=1)
+    order = np.lexsort((distances, labels))
+    first_in_cluster = np.ones(len(order), dtype=bool)
+    first_in_cluster[1:] = labels[order][1:] != labels[order][:-1]
+    return order[first_in_cluster].tolist()
+
+
+def spread_subset(ds, n_designs, method="maximin", seed=None):
+    """
+    Selects (at most) ``n_designs`` designs spread evenly over the scaled
+    objectives, normalized to the unit hypercube. With ``method="maximin"``,
+    the best design of each objective is selected first, then the design
+    farthest away from the selected ones, until enough are selected. With
+    ``method="kmeans"``, the objectives are clustered and the design closest
+    to the centroid of each cluster is selected. Requires SciPy.
+    """
+    points = _normalize(_objective_matrix(ds))
+    if not len(points) or n_designs < 1:
+        selected = []
+    elif method == "maximin":
+        selected = _maximin_indices(points, n_designs)
+    elif method == "kmeans":
+        selected = _kmeans_indices(points, n_designs, seed)
+    else:
+        raise ValueError(f"Unknown method {method!r}.")
+
+    return ds.isel({DESIGN_ID: np.array(selected, dtype=int)})
+
+
+def knee_subset(ds, n_designs=1):
+    """
+    Selects the ``n_designs`` designs at the most pronounced knees of a Pareto
+    front, i.e. the ones farthest beyond the hyperplane through the extreme
+    designs, in the scaled objectives normalized to the unit hypercube.
+    """
+    points = _normalize(_objective_matrix(ds))
+    # The hyperplane through the unit vectors
+    distances = (1.0 - points.sum(axis=1)) / np.sqrt(points.shape[1])
+    selected = np.argsort(-distances, kind="stable")[:n_designs]
+    return ds.isel({DESIGN_ID: selected})
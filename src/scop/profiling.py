@@ -0,0 +1,142 @@
+import time
+import tracemalloc
+
+from openmdao.core.constants import _SetupStatus
+
+# Methods that run the computations of a system, directly or through its
+# subsystems
+PROFILED_METHODS = ("_solve_nonlinear", "_apply_nonlinear")
+
+
+class _Timing:
+    __slots__ = ("wall_time", "cpu_time", "peak_memory")
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_memory = 0
+
+
+class Profiler:
+    """
+    Measures the wall and CPU time (and optionally the peak memory use, with
+    tracemalloc) of running each subsystem of a model, e.g. the compute of a
+    `FuncComp`, summed up per case. Times of groups include their subsystems.
+
+    When attached to a set up problem, `DatasetRecorder` records the
+    measurements of each case as ``meta.time.<subsystem>``,
+    ``meta.cpu_time.<subsystem>`` and ``meta.peak_memory.<subsystem>`` (in
+    bytes) variables. So does `ParallelDOEDriver`, if a profiler is attached
+    to the problems of its workers. Unattached, there is no overhead.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self._timings = {}
+        self._systems = []
+        self._model = None
+        # Peak traced memory of each call in progress, before its last reset
+        self._memory_stack = []
+        # The key and measurements of the last case taken with case()
+        self._case_key = None
+        self._case_metadata = {}
+
+    def attach(self, prob):
+        """
+        Starts measuring the subsystems of the model of a set up problem. The
+        problem must not be set up again while attached.
+        """
+        if (
+            prob._metadata is None
+            or prob._metadata["setup_status"] < _SetupStatus.POST_SETUP
+        ):
+            raise ValueError("The problem must be set up before attaching a profiler.")
+
+        self._model = model = prob.model
+        for system in model.system_iter(recurse=True):
+            timing = self._timings[system.pathname] = _Timing()
+            for method_name in PROFILED_METHODS:
+                setattr(
+                    system,
+                    method_name,
+                    self._wrap(getattr(system, method_name), timing),
+                )
+            self._systems.append(system)
+        model._scop_profiler = self
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def detach(self):
+        """
+        Stops measuring.
+        """
+        for system in self._systems:
+            for method_name in PROFILED_METHODS:
+                delattr(system, method_name)
+        self._systems = []
+        if self._model is not None:
+            del self._model._scop_profiler
+            self._model = None
+
+    def _wrap(self, method, timing):
+        if self.memory:
+            return self._wrap_with_memory(method, timing)
+
+        def wrapper(*args, **kwargs):
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timing.wall_time += time.perf_counter() - wall_start
+                timing.cpu_time += time.process_time() - cpu_start
+
+        return wrapper
+
+    def _wrap_with_memory(self, method, timing):
+        def wrapper(*args, **kwargs):
+            # The traced peak is global, so hand the peak so far over to the
+            # calling system before resetting it
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory_stack:
+                self._memory_stack[-1] = max(self._memory_stack[-1], peak)
+            self._memory_stack.append(0)
+            tracemalloc.reset_peak()
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timing.wall_time += time.perf_counter() - wall_start
+                timing.cpu_time += time.process_time() - cpu_start
+                peak = max(tracemalloc.get_traced_memory()[1], self._memory_stack.pop())
+                timing.peak_memory = max(timing.peak_memory, peak - current)
+                if self._memory_stack:
+                    self._memory_stack[-1] = max(self._memory_stack[-1], peak)
+
+        return wrapper
+
+    def pop_case(self) -> dict:
+        """
+        Returns the measurements since the last call as case metadata, and
+        resets them.
+        """
+        metadata = {}
+        for path, timing in self._timings.items():
+            metadata[f"time.{path}"] = timing.wall_time
+            metadata[f"cpu_time.{path}"] = timing.cpu_time
+            if self.memory:
+                metadata[f"peak_memory.{path}"] = timing.peak_memory
+            timing.wall_time = timing.cpu_time = 0.0
+            timing.peak_memory = 0
+        return metadata
+
+    def case(self, key) -> dict:
+        """
+        Returns the measurements of a case as case metadata. They are taken
+        with `pop_case` on the first call with a new key (e.g. the iteration
+        coordinate of the case), so that all recorders of a case get the same.
+        """
+        if key != self._case_key:
+            self._case_metadata = self.pop_case()
+            self._case_key = key
+        return self._case_metadata
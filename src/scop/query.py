@@ -0,0 +1,185 @@
+import numpy as np
+import xarray as xr
+
+from .constants import DESIGN_ID
+
+
+def _value_ranges(sorted_values, condition, end):
+    """
+    Returns the (start, stop) ranges of a sorted array with the values
+    matching a condition. Values from ``end`` on (e.g. NaN) never match.
+    """
+    if isinstance(condition, tuple):
+        lower, upper = condition
+        start = 0 if lower is None else np.searchsorted(sorted_values[:end], lower)
+        stop = (
+            end
+            if upper is None
+            else np.searchsorted(sorted_values[:end], upper, side="right")
+        )
+        return [(start, stop)]
+    values = (
+        condition if isinstance(condition, (list, set, np.ndarray)) else [condition]
+    )
+    return [
+        (
+            np.searchsorted(sorted_values[:end], value),
+            np.searchsorted(sorted_values[:end], value, side="right"),
+        )
+        for value in values
+    ]
+
+
+def _n_comparable(sorted_values):
+    # NaN and NaT are sorted last, and compare false to everything
+    kind = sorted_values.dtype.kind
+    if kind in "fc":
+        return int(np.searchsorted(sorted_values, np.nan))
+    if kind in "mM":
+        return int(np.searchsorted(sorted_values, sorted_values.dtype.type("NaT")))
+    return len(sorted_values)
+
+
+class _SortedIndex:
+    """
+    The positions of the designs, sorted by value.
+    """
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind="stable")
+        self.sorted_values = values[self.order]
+        self.end = _n_comparable(self.sorted_values)
+
+    def positions(self, condition):
+        return np.concatenate(
+            [
+                np.empty(0, dtype=np.intp),
+                *(
+                    self.order[start:stop]
+                    for start, stop in _value_ranges(
+                        self.sorted_values, condition, self.end
+                    )
+                ),
+            ]
+        )
+
+
+class _CodebookIndex:
+    """
+    The sorted unique values of a discrete variable, and the positions of the
+    designs grouped by value.
+    """
+
+    def __init__(self, values):
+        self.codebook, codes = np.unique(values, return_inverse=True)
+        self.order = np.argsort(codes, kind="stable")
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(codes, minlength=len(self.codebook)))]
+        )
+        self.end = _n_comparable(self.codebook)
+
+    def positions(self, condition):
+        return np.concatenate(
+            [
+                np.empty(0, dtype=np.intp),
+                *(
+                    self.order[self.offsets[start] : self.offsets[stop]]
+                    for start, stop in _value_ranges(self.codebook, condition, self.end)
+                ),
+            ]
+        )
+
+
+def _scan(values, condition):
+    if isinstance(condition, tuple):
+        lower, upper = condition
+        # Excludes NaN and NaT, like the indexes
+        mask = values == values
+        if lower is not None:
+            mask &= values >= lower
+        if upper is not None:
+            mask &= values <= upper
+        return mask
+    if isinstance(condition, (list, set, np.ndarray)):
+        return np.isin(values, list(condition))
+    return values == condition
+
+
+def _scalar_values(ds, name):
+    var = ds[name]
+    if var.dims != (DESIGN_ID,):
+        raise ValueError(f"Only scalar variables can be queried, not {name!r}.")
+    return var.values
+
+
+class DesignIndex:
+    """
+    Selects the designs of a dataset by conditions on scalar variables, for
+    repeated queries on large (e.g. lazily loaded) datasets.
+
+    Conditions are given as a dict keyed by variable name or by `Param` (for
+    all variables with the param). A condition is either a ``(lower, upper)``
+    tuple of inclusive bounds (either of which may be None), a list or set of
+    values to match any of, or a single value to match.
+
+    Sorted indexes of the given ``variables`` (by default all scalar ones) are
+    built up front, and codebooks of the unique values of discrete and
+    non-numerical ones. Conditions on indexed variables are answered by binary
+    search, others by scanning the values, and the matches of all conditions
+    are intersected as bitmaps.
+    """
+
+    def __init__(self, ds: xr.Dataset, variables=None):
+        self.ds = ds
+        if variables is None:
+            variables = [
+                name for name, var in ds.data_vars.items() if var.dims == (DESIGN_ID,)
+            ]
+        self.indexes = {}
+        for name in variables:
+            values = _scalar_values(ds, name)
+            self.indexes[name] = (
+                _CodebookIndex(values)
+                if ds[name].attrs.get("discrete", False) or values.dtype.kind in "OUSb"
+                else _SortedIndex(values)
+            )
+
+    def _gen_conditions(self, conditions):
+        for key, condition in conditions.items():
+            if isinstance(key, str):
+                yield key, condition
+                continue
+            names = list(self.ds.filter_by_attrs(param=lambda x: x is key).data_vars)
+            if not names:
+                raise KeyError(f"No variable found for param {key.name!r}")
+            for name in names:
+                yield name, condition
+
+    def positions(self, conditions: dict) -> np.ndarray:
+        """
+        Returns the positions of the designs matching all conditions, in
+        order.
+        """
+        n_designs = self.ds.sizes[DESIGN_ID]
+        mask = np.ones(n_designs, dtype=bool)
+        for name, condition in self._gen_conditions(conditions):
+            index = self.indexes.get(name, None)
+            if index is None:
+                mask &= _scan(_scalar_values(self.ds, name), condition)
+            else:
+                condition_mask = np.zeros(n_designs, dtype=bool)
+                condition_mask[index.positions(condition)] = True
+                mask &= condition_mask
+        return np.flatnonzero(mask)
+
+    def design_ids(self, conditions: dict) -> np.ndarray:
+        """
+        Returns the ids of the designs matching all conditions.
+        """
+        return self.ds[DESIGN_ID].values[self.positions(conditions)]
+
+    def query(self, conditions: dict) -> xr.Dataset:
+        """
+        Returns the designs matching all conditions.
+        """
+        return self.ds.isel({DESIGN_ID: self.positions(conditions)})
@@ -0,0 +1,257 @@
+import numpy as np
+import xarray as xr
+
+from .constants import DESIGN_ID
+
+RAGGED_ATTR = "ragged"
+
+
+def is_ragged(var) -> bool:
+    """
+    Is the variable the flat values of a ragged variable?
+    """
+    return bool(var.attrs.get(RAGGED_ATTR, False))
+
+
+def ragged_names(ds: xr.Dataset) -> list[str]:
+    return [name for name, var in ds.data_vars.items() if is_ragged(var)]
+
+
+def ragged_companion_names(name: str) -> tuple[str, str]:
+    """
+    Names of the variables holding the per-design offsets and shapes of a
+    ragged variable.
+    """
+    return f"{name}.offsets", f"{name}.shape"
+
+
+def ragged_dims(name: str) -> tuple[str, str]:
+    """
+    Names of the dimensions of the flat values and of the shapes of a ragged
+    variable.
+    """
+    return f"{name}_values", f"{name}_ndim"
+
+
+def encode_ragged(name: str, values: list, attrs: dict = None) -> dict:
+    """
+    Encodes a list of per-design values of any shapes as a ragged variable: the
+    flat values of all designs, and the offset into them and shape of each
+    design. Shapes of fewer dimensions than the others are padded with -1.
+    Returns a dict of data arrays, to be assigned to a dataset.
+    """
+    arrays = [np.asarray(value) for value in values]
+    ndim = max((array.ndim for array in arrays), default=0)
+    shapes = np.full((len(arrays), ndim), -1, dtype=np.int64)
+    for idx, array in enumerate(arrays):
+        shapes[idx, : array.ndim] = array.shape
+    lengths = np.array([array.size for array in arrays], dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    flat = np.concatenate([array.ravel() for array in arrays]) if arrays else []
+
+    offsets_name, shape_name = ragged_companion_names(name)
+    values_dim, ndim_dim = ragged_dims(name)
+    return {
+        name: xr.DataArray(
+            flat, dims=[values_dim], attrs={**(attrs or {}), RAGGED_ATTR: True}
+        ),
+        offsets_name: xr.DataArray(offsets, dims=[DESIGN_ID]),
+        shape_name: xr.DataArray(shapes, dims=[DESIGN_ID, ndim_dim]),
+    }
+
+
+def _lengths(shapes):
+    return np.where(shapes < 0, 1, shapes).prod(axis=1, dtype=np.int64)
+
+
+def ragged_lengths(ds: xr.Dataset, name: str) -> np.ndarray:
+    """
+    Number of values of each design of a ragged variable.
+    """
+    return _lengths(ds[ragged_companion_names(name)[1]].values)
+
+
+def gather_ragged(ds: xr.Dataset, name: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the flat values of the designs of a ragged variable, in design
+    order, and the number of values of each design. Only the range of flat
+    values spanned by the designs is read, e.g. after selecting a slice of the
+    designs of a lazily loaded store.
+    """
+    offsets_name, _ = ragged_companion_names(name)
+    starts = ds[offsets_name].values
+    lengths = ragged_lengths(ds, name)
+    list_offsets = np.cumsum(lengths) - lengths
+    idx = np.repeat(starts - list_offsets, lengths) + np.arange(lengths.sum())
+    lo, hi = (idx.min(), idx.max() + 1) if len(idx) else (0, 0)
+    return ds.variables[name][lo:hi].values[idx - lo], lengths
+
+
+def compact_ragged(ds: xr.Dataset) -> xr.Dataset:
+    """
+    Drops the flat values of ragged variables that no design refers to, e.g.
+    after selecting a subset of the designs.
+    """
+    compacted = {}
+    for name in ragged_names(ds):
+        offsets_name, _ = ragged_companion_names(name)
+        values, lengths = gather_ragged(ds, name)
+        compacted[name] = xr.DataArray(values, dims=ds[name].dims, attrs=ds[name].attrs)
+        compacted[offsets_name] = ds[offsets_name].copy(
+            data=np.cumsum(lengths) - lengths
+        )
+    if not compacted:
+        return ds
+    # Dropped first, as the flat dimensions change size
+    return ds.drop_vars(list(compacted)).assign(compacted)[list(ds.data_vars)]
+
+
+def decode_ragged(ds: xr.Dataset, name: str) -> list[np.ndarray]:
+    """
+    Decodes a ragged variable into a list of per-design values.
+    """
+    offsets_name, shape_name = ragged_companion_names(name)
+    flat = ds[name].values
+    shapes = ds[shape_name].values
+    return [
+        flat[offset : offset + length].reshape(tuple(shape[shape >= 0]))
+        for offset, length, shape in zip(
+            ds[offsets_name].values, _lengths(shapes), shapes
+        )
+    ]
+
+
+def ragged_all(ds: xr.Dataset, name: str, mask) -> np.ndarray:
+    """
+    Reduces a boolean mask over the flat values of a ragged variable into one
+    value per design, true if the mask is true for all its values.
+    """
+    offsets = ds[ragged_companion_names(name)[0]].values
+    n_false = np.concatenate([[0], np.cumsum(~np.asarray(mask, dtype=bool))])
+    return n_false[offsets + ragged_lengths(ds, name)] == n_false[offsets]
+
+
+def ragged_sum(ds: xr.Dataset, name: str, values) -> np.ndarray:
+    """
+    Reduces values over the flat values of a ragged variable into one sum per
+    design.
+    """
+    offsets = ds[ragged_companion_names(name)[0]].values
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    return sums[offsets + ragged_lengths(ds, name)] - sums[offsets]
+
+
+def with_ragged_companions(ds: xr.Dataset, subset: xr.Dataset) -> xr.Dataset:
+    """
+    Adds the offsets and shapes of the ragged variables in a subset of the
+    variables of a dataset, e.g. from `filter_by_attrs`.
+    """
+    names = [
+        companion_name
+        for name in ragged_names(subset)
+        for companion_name in ragged_companion_names(name)
+        if companion_name not in subset
+    ]
+    return subset.merge(ds[names]) if names else subset
+
+
+def _design_shape(var):
+    return var.transpose(DESIGN_ID, ...).shape[1:]
+
+
+def _gen_design_values(ds, name):
+    if is_ragged(ds[name]):
+        yield from decode_ragged(ds, name)
+    else:
+        yield from ds[name].transpose(DESIGN_ID, ...).values
+
+
+def concat_designs(datasets, **kwargs) -> xr.Dataset:
+    """
+    Concatenates datasets along `DESIGN_ID`, like `xr.concat`. Variables that
+    are ragged in any of the datasets, or have different shapes in different
+    datasets, are concatenated as ragged variables instead of being padded
+    with NaN.
+    """
+    datasets = list(datasets)
+    names = dict.fromkeys(name for ds in datasets for name in ds.data_vars)
+    companion_names = {
+        companion_name
+        for ds in datasets
+        for name in ragged_names(ds)
+        for companion_name in ragged_companion_names(name)
+    }
+
+    ragged = []
+    for name in names:
+        if name in companion_names:
+            continue
+        variables = [ds[name] for ds in datasets if name in ds.data_vars]
+        if any(is_ragged(var) for var in variables) or (
+            all(DESIGN_ID in var.dims for var in variables)
+            and len({_design_shape(var) for var in variables}) > 1
+        ):
+            ragged.append(name)
+
+    if not ragged:
+        return xr.concat(datasets, dim=DESIGN_ID, **kwargs)
+
+    ragged_vars = {}
+    for name in ragged:
+        attrs = next(ds[name].attrs for ds in datasets if name in ds.data_vars)
+        ragged_vars.update(
+            encode_ragged(
+                name,
+                (
+                    [
+                        value
+                        for ds in datasets
+                        if name in ds.data_vars
+                        for value in _gen_design_values(ds, name)
+                    ]
+                    if all(name in ds.data_vars for ds in datasets)
+                    else [
+                        value
+                        for ds in datasets
+                        for value in (
+                            _gen_design_values(ds, name)
+                            if name in ds.data_vars
+                            # Missing designs are encoded as empty values
+                            else [np.empty(0)] * ds.sizes[DESIGN_ID]
+                        )
+                    ]
+                ),
+                attrs={
+                    key: value for key, value in attrs.items() if key != RAGGED_ATTR
+                },
+            )
+        )
+
+    stripped = []
+    for ds in datasets:
+        drop_names = [
+            drop_name
+            for name in ragged
+            for drop_name in [name, *ragged_companion_names(name)]
+            if drop_name in ds.variables
+        ]
+        ds = ds.drop_vars(drop_names)
+        # Also drop the index coords that only the ragged variables used
+        used_dims = {DESIGN_ID}
+        used_dims.update(dim for var in ds.data_vars.values() for dim in var.dims)
+        ds = ds.drop_vars(
+            [name for name in ds.coords if name in ds.dims and name not in used_dims]
+        )
+        stripped.append(ds)
+
+    concat_ds = xr.concat(stripped, dim=DESIGN_ID, **kwargs)
+    return concat_ds.assign(
+        {
+            name: (
+                var.assign_coords({DESIGN_ID: concat_ds[DESIGN_ID]})
+                if DESIGN_ID in var.dims
+                else var
+            )
+            for name, var in ragged_vars.items()
+        }
+    )
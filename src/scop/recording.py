@@ -1,12 +1,16 @@
 import itertools
+import json
+import os
+import threading
 import time
 import warnings
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from itertools import chain
 
 import numpy as np
 import pandas as pd
 import xarray as xr
+from openmdao.core.constants import INF_BOUND
 from openmdao.core.driver import Driver
 from openmdao.core.group import Group
 from openmdao.core.problem import Problem
@@ -15,7 +19,10 @@ from openmdao.recorders.case_recorder import CaseRecorder
 from openmdao.solvers.solver import Solver
 
 from .constants import DESIGN_ID
+from .io import append_zarr, dump_zarr, load_zarr
+from .jacobian import encode_jacobians
 from .modelling import Param
+from .ragged import concat_designs, encode_ragged
 
 SEMVAR_PREFIX = "semvar:"
 
@@ -193,20 +200,331 @@ def make_data_vars(all_vars, all_meta, design_idx):
         yield ((name, (dims, val, meta)), coords.items())
 
 
+def make_ragged_data_vars(all_vars, all_meta):
+    """
+    Like `make_data_vars`, but with all non-scalar variables encoded ragged
+    (see `encode_ragged`), for a single design.
+    """
+    for name, value in all_vars.items():
+        meta = all_meta[name]
+        val = np.atleast_1d(value).copy()
+        if val.size != 1:
+            yield from encode_ragged(name, [val], attrs=meta).items()
+        else:
+            yield name, xr.DataArray(val, dims=[DESIGN_ID], attrs=meta)
+
+
+def _unscale(value, meta):
+    if value is None:
+        return None
+    value = np.asarray(value, dtype=float)
+    value = np.where(np.abs(value) >= INF_BOUND, np.copysign(np.inf, value), value)
+    if meta.get("total_scaler", None) is not None:
+        value = value / meta["total_scaler"]
+    if meta.get("total_adder", None) is not None:
+        value = value - meta["total_adder"]
+    return value
+
+
+class RunStatistics:
+    """
+    Aggregates of the cases of a run, updated in constant time for every
+    recorded case: the number of (successful and feasible) cases, the
+    evaluation rate, the running minimum and maximum of each objective, and the
+    distribution of the total constraint violation of successful cases.
+
+    Updates and snapshots take a lock, so that snapshots can be written from
+    other threads while recording.
+    """
+
+    # The first bin is for (close to) zero violations
+    VIOLATION_BIN_EDGES = np.concatenate([[0.0], np.logspace(-12, 12, 25), [np.inf]])
+
+    def __init__(self, abs2meta, start_perf_counter, feasibility_tol=1e-6):
+        self.start_perf_counter = start_perf_counter
+        self.feasibility_tol = feasibility_tol
+        self.objectives = {
+            name: (
+                meta["type"]["objective"].get("indices", None),
+                meta["type"]["objective"].get("size", None),
+            )
+            for name, meta in abs2meta.items()
+            if "objective" in meta["type"]
+        }
+        self.constraints = {}
+        for name, meta in abs2meta.items():
+            con_meta = meta["type"].get("constraint", None)
+            if con_meta is None:
+                continue
+            # Constraint bounds are scaled, while recorded values are not
+            lower = _unscale(con_meta.get("lower", None), con_meta)
+            upper = _unscale(con_meta.get("upper", None), con_meta)
+            if lower is not None and upper is not None:
+                # Negative scalers swap the bounds
+                lower, upper = np.minimum(lower, upper), np.maximum(lower, upper)
+            self.constraints[name] = (
+                con_meta.get("indices", None),
+                con_meta.get("size", None),
+                lower,
+                upper,
+                _unscale(con_meta.get("equals", None), con_meta),
+            )
+
+        self.n_cases = 0
+        self.n_successful = 0
+        self.n_feasible = 0
+        self.last_perf_counter = start_perf_counter
+        self.objective_min = {}
+        self.objective_max = {}
+        self.objective_argmin = {}
+        self.violation_mean = 0.0
+        self._violation_m2 = 0.0
+        self.violation_max = 0.0
+        self.violation_counts = np.zeros(len(self.VIOLATION_BIN_EDGES) - 1, dtype=int)
+        self._lock = threading.Lock()
+
+    def _violation(self, name, value):
+        indices, size, lower, upper, equals = self.constraints[name]
+        value = np.ravel(value).astype(float)
+        if indices is not None and value.size != size:
+            value = value[indices.flat()]
+        if equals is not None:
+            violation = np.abs(value - equals)
+        else:
+            violation = np.zeros_like(value)
+            if lower is not None:
+                violation += np.maximum(lower - value, 0.0)
+            if upper is not None:
+                violation += np.maximum(value - upper, 0.0)
+        return violation.sum()
+
+    def update(self, all_vars, design_id, success, perf_counter):
+        with self._lock:
+            self._update(all_vars, design_id, success, perf_counter)
+
+    def _update(self, all_vars, design_id, success, perf_counter):
+        self.n_cases += 1
+        self.last_perf_counter = perf_counter
+        if not success:
+            return
+        self.n_successful += 1
+
+        for name, (indices, size) in self.objectives.items():
+            if name not in all_vars:
+                continue
+            value = np.asarray(all_vars[name], dtype=float)
+            if indices is not None and value.size != size:
+                value = value.ravel()[indices.flat()]
+            if name not in self.objective_min:
+                self.objective_min[name] = value.copy()
+                self.objective_max[name] = value.copy()
+                self.objective_argmin[name] = np.full(
+                    value.shape, design_id, dtype=object
+                )
+                continue
+            improved = value < self.objective_min[name]
+            self.objective_min[name] = np.where(
+                improved, value, self.objective_min[name]
+            )
+            self.objective_argmin[name] = np.where(
+                improved, design_id, self.objective_argmin[name]
+            )
+            self.objective_max[name] = np.maximum(value, self.objective_max[name])
+
+        violation = sum(
+            self._violation(name, all_vars[name])
+            for name in self.constraints
+            if name in all_vars
+        )
+        if violation <= self.feasibility_tol:
+            self.n_feasible += 1
+        # Welford's online algorithm
+        delta = violation - self.violation_mean
+        self.violation_mean += delta / self.n_successful
+        self._violation_m2 += delta * (violation - self.violation_mean)
+        self.violation_max = max(self.violation_max, violation)
+        self.violation_counts[
+            np.searchsorted(self.VIOLATION_BIN_EDGES, violation, side="right") - 1
+        ] += 1
+
+    @property
+    def feasible_fraction(self):
+        return self.n_feasible / self.n_successful if self.n_successful else None
+
+    @property
+    def rate(self):
+        """
+        Evaluated cases per second.
+        """
+        elapsed = self.last_perf_counter - self.start_perf_counter
+        return self.n_cases / elapsed if elapsed > 0 else None
+
+    @property
+    def violation_std(self):
+        return (
+            np.sqrt(self._violation_m2 / self.n_successful)
+            if self.n_successful
+            else None
+        )
+
+    def snapshot(self) -> dict:
+        """
+        Returns the statistics as a JSON serializable dict.
+        """
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        return {
+            "n_cases": self.n_cases,
+            "n_successful": self.n_successful,
+            "n_feasible": self.n_feasible,
+            "feasible_fraction": self.feasible_fraction,
+            "elapsed": self.last_perf_counter - self.start_perf_counter,
+            "rate": self.rate,
+            "objectives": {
+                name: {
+                    "min": self.objective_min[name].tolist(),
+                    "max": self.objective_max[name].tolist(),
+                    "argmin": self.objective_argmin[name].tolist(),
+                }
+                for name in self.objective_min
+            },
+            "constraint_violation": {
+                "mean": self.violation_mean if self.n_successful else None,
+                "std": self.violation_std,
+                "max": self.violation_max if self.n_successful else None,
+                "bin_edges": self.VIOLATION_BIN_EDGES.tolist(),
+                "counts": self.violation_counts.tolist(),
+            },
+        }
+
+
+def _requester_name(recording_requester):
+    # Only drivers are recorded. Problem names are unique, and each problem has
+    # one driver
+    name = recording_requester._get_name() or type(recording_requester).__name__
+    return f"{recording_requester._problem()._name}/{name}"
+
+
+def _jac_offset(sizes, name, size):
+    # Rows or columns of new variables are added at the end
+    if name not in sizes:
+        sizes[name] = size
+    offset = 0
+    for other_name, other_size in sizes.items():
+        if other_name == name:
+            return offset
+        offset += other_size
+
+
+def _gen_case_chunks(datasets, chunk_size, release):
+    # Only the cases recorded so far, in case the requester still is
+    # recording
+    n_cases = len(datasets)
+    chunk_size = chunk_size or max(n_cases, 1)
+    cases = deque(datasets[:n_cases])
+    if release:
+        # Only referenced here from now on, and dropped chunk by chunk
+        del datasets[:n_cases]
+    while cases:
+        yield [cases.popleft() for _ in range(min(chunk_size, len(cases)))]
+
+
+def _write_json_atomically(obj, path):
+    # Readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(obj, file)
+    os.replace(tmp_path, path)
+
+
+def read_run_statistics(path) -> dict:
+    """
+    Reads a snapshot file written by `DatasetRecorder`, keyed by the names of
+    the problem and the recording requester.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+class _RequesterState:
+    """
+    Everything recorded for one recording requester. Each requester only ever
+    touches its own state, so no locking is needed while recording, except for
+    the run statistics that snapshots read.
+    """
+
+    def __init__(self, abs2meta):
+        self.abs2meta = abs2meta
+        self.datasets: list[xr.Dataset] = []
+        self.start_perf_counter = time.perf_counter()
+        self.start_timestamp = pd.Timestamp.utcnow()
+        self.statistics = RunStatistics(abs2meta, self.start_perf_counter)
+        # Sizes of the rows and columns of the recorded Jacobians, by source
+        # name, and the non-zero entries of each derivative case
+        self.jac_rows: dict[str, int] = {}
+        self.jac_cols: dict[str, int] = {}
+        self.derivatives: list[tuple] = []
+
+    def timestamp(self, perf_counter):
+        # To convert OpenMDAO's timestamp (which comes from
+        # time.perf_counter()) to absolute time, we need to do some
+        # gymnastics
+        rel_timestamp = perf_counter - self.start_perf_counter
+        return self.start_timestamp + pd.Timedelta(rel_timestamp, "s")
+
+
 class DatasetRecorder(CaseRecorder):
-    def __init__(self, record_viewer_data=False, semvar_registry=None):
+    """
+    Records the cases of a driver into xarray datasets, one per recording
+    requester, to be assembled with `assemble_dataset`.
+
+    Each recording requester gets its own schema and buffer, so one recorder
+    can serve several drivers (e.g. sub-drivers, or problems run in separate
+    threads) at once. Only starting up a requester, writing snapshots and
+    updating the run statistics they read take a lock.
+
+    Run statistics (see `RunStatistics`) are maintained while recording and
+    can be queried with `statistics`. With a ``snapshot_path``, they are also
+    written to a JSON file at most every ``snapshot_interval`` seconds (and
+    when the run finishes), for other processes to poll.
+
+    Total derivatives are recorded if the ``record_derivatives`` recording
+    option of a driver is set, to be assembled with `assemble_derivatives`.
+    """
+
+    def __init__(
+        self,
+        record_viewer_data=False,
+        semvar_registry=None,
+        snapshot_path=None,
+        snapshot_interval=5.0,
+    ):
         if record_viewer_data:
             raise NotImplementedError(
                 "This recorder does not support recording of metadata for viewing."
             )
         super().__init__(record_viewer_data=record_viewer_data)
-        self.datasets: dict[RecordingRequester, list[xr.DataSet]] = {}
-        self._start_perf_counter: dict[RecordingRequester, float] = {}
-        self._start_timestamp: dict[RecordingRequester, pd.Timestamp] = {}
-        # self._abs2prom = {"input": {}, "output": {}}
-        # self._prom2abs = {"input": {}, "output": {}}
-        self._abs2meta = {}
+        self._states: dict[RecordingRequester, _RequesterState] = {}
+        self._states_lock = threading.Lock()
+        # next() on a count is atomic, unlike += on the base class' _counter
+        self._case_counter = itertools.count(1)
         self.semvar_registry = semvar_registry
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_lock = threading.Lock()
+        self._last_snapshot_perf_counter = -np.inf
+
+    @property
+    def datasets(self) -> dict[RecordingRequester, list[xr.Dataset]]:
+        return {requester: state.datasets for requester, state in self._states.items()}
+
+    @property
+    def run_statistics(self) -> dict[RecordingRequester, RunStatistics]:
+        return {
+            requester: state.statistics for requester, state in self._states.items()
+        }
 
     def startup(self, recording_requester: RecordingRequester, comm=None):
         try:
@@ -214,22 +532,54 @@ class DatasetRecorder(CaseRecorder):
         except TypeError:
             # Backwards compatibility for OpenMDAO < 3.something
             super().startup(recording_requester)
-        self._start_perf_counter[recording_requester] = time.perf_counter()
-        self._start_timestamp[recording_requester] = pd.Timestamp.utcnow()
-        self.datasets[recording_requester] = []
-        self._abs2meta.update(
+        state = _RequesterState(
             generate_abs2meta(recording_requester, semvar_registry=self.semvar_registry)
         )
+        with self._states_lock:
+            # Replace, rather than mutate, so that concurrent readers always
+            # see a consistent dict
+            self._states = {**self._states, recording_requester: state}
+
+    def record_iteration(self, recording_requester, data, metadata, **kwargs):
+        if self._parallel and self._record_on_proc is not True:
+            return
+        self._counter = next(self._case_counter)
+        if not isinstance(recording_requester, Driver):
+            return super().record_iteration(
+                recording_requester, data, metadata, **kwargs
+            )
+        # Not stored on the recorder, where concurrent requesters would
+        # overwrite it
+        iteration_coordinate = (
+            recording_requester._recording_iter.get_formatted_iteration_coordinate()
+        )
+        self._record_iteration_driver(
+            recording_requester, data, metadata, iteration_coordinate
+        )
 
     def record_iteration_driver(self, recording_requester, data, metadata):
+        self._record_iteration_driver(
+            recording_requester, data, metadata, self._iteration_coordinate
+        )
+
+    def _record_iteration_driver(
+        self, recording_requester, data, metadata, iteration_coordinate
+    ):
+        state = self._states[recording_requester]
         all_vars = dict(sorted(chain(data["input"].items(), data["output"].items())))
 
         # hvplot borks of MultiIndex :((
         # design_idx = pd.MultiIndex.from_tuples(
-        #     [(metadata["name"], 0, self._counter - 1, self._iteration_coordinate)],
+        #     [(metadata["name"], 0, self._counter - 1, iteration_coordinate)],
         #     names=("driver", "rank", "counter", "name"),
         # )
-        design_idx = np.array([self._iteration_coordinate])
+        design_idx = np.array([iteration_coordinate])
+
+        profiler = getattr(recording_requester._problem().model, "_scop_profiler", None)
+        if profiler is not None:
+            # Metadata already measured elsewhere, e.g. in workers, takes
+            # precedence
+            metadata = {**profiler.case(iteration_coordinate), **metadata}
 
         # Pass on any non-default metadata
         meta_vars = {
@@ -238,45 +588,77 @@ class DatasetRecorder(CaseRecorder):
             if key not in ["name", "success", "timestamp", "msg"]
         }
 
-        # To convert OpenMDAO's timestamp (which comes from
-        # time.perf_counter()) to absolute time, we need to do some
-        # gymnastics
-        rel_timestamp = (
-            metadata["timestamp"] - self._start_perf_counter[recording_requester]
-        )
-        timestamp = self._start_timestamp[recording_requester] + pd.Timedelta(
-            rel_timestamp, "s"
-        )
+        timestamp = state.timestamp(metadata["timestamp"])
 
+        case_vars = {
+            "meta.timestamp": xr.DataArray([timestamp.to_numpy()], dims=[DESIGN_ID]),
+            "meta.success": xr.DataArray([bool(metadata["success"])], dims=[DESIGN_ID]),
+            "meta.msg": xr.DataArray([metadata["msg"]], dims=[DESIGN_ID]),
+            **meta_vars,
+        }
         data_vars_pairs, coords_pairs = zip(
-            *make_data_vars(all_vars, self._abs2meta, design_idx)
+            *make_data_vars(all_vars, state.abs2meta, design_idx)
         )
         data_vars = dict(data_vars_pairs)
         coords = dict(itertools.chain(*coords_pairs))
 
         try:
+            ds = xr.Dataset(data_vars={**case_vars, **data_vars}, coords=coords)
+        except ValueError:
+            # Dimensions shared by variables of different sizes can't be
+            # aligned, so fall back to recording multi-element variables ragged
             ds = xr.Dataset(
                 data_vars={
-                    "meta.timestamp": xr.DataArray(
-                        [timestamp.to_numpy()], dims=[DESIGN_ID]
-                    ),
-                    "meta.success": xr.DataArray(
-                        [bool(metadata["success"])], dims=[DESIGN_ID]
-                    ),
-                    "meta.msg": xr.DataArray([metadata["msg"]], dims=[DESIGN_ID]),
-                    **meta_vars,
-                    **data_vars,
+                    **case_vars,
+                    **dict(make_ragged_data_vars(all_vars, state.abs2meta)),
                 },
-                coords=coords,
-            )
-        except ValueError as e:
-            # FIXME: we should record this error in the dataset instead
-            warnings.warn(
-                f"Failed to create dataset for iteration {self._iteration_coordinate} with metadata {metadata}",
-                source=e,
+                coords={DESIGN_ID: design_idx},
             )
+        state.datasets.append(ds)
+
+        state.statistics.update(
+            all_vars,
+            iteration_coordinate,
+            bool(metadata["success"]),
+            metadata["timestamp"],
+        )
+        if (
+            self.snapshot_path is not None
+            and metadata["timestamp"] - self._last_snapshot_perf_counter
+            >= self.snapshot_interval
+        ):
+            self._last_snapshot_perf_counter = metadata["timestamp"]
+            self.write_snapshot()
+
+    def statistics(self, recording_requester=None) -> RunStatistics:
+        """
+        Returns the run statistics of a recording requester, by default the
+        only one.
+        """
+        if recording_requester is None:
+            (state,) = self._states.values()
         else:
-            self.datasets[recording_requester].append(ds)
+            state = self._states[recording_requester]
+        return state.statistics
+
+    def write_snapshot(self, path=None):
+        """
+        Writes the run statistics of all recording requesters to a JSON file,
+        keyed by ``<problem name>/<requester name>``.
+        """
+        with self._snapshot_lock:
+            _write_json_atomically(
+                {
+                    _requester_name(requester): state.statistics.snapshot()
+                    for requester, state in self._states.items()
+                },
+                path or self.snapshot_path,
+            )
+
+    def shutdown(self):
+        super().shutdown()
+        if self.snapshot_path is not None and self._states:
+            self.write_snapshot()
 
     def record_iteration_problem(self, recording_requester, data, metadata):
         raise NotImplementedError(
@@ -293,9 +675,54 @@ class DatasetRecorder(CaseRecorder):
             "This recorder does not support recording of systems."
         )
 
+    def record_derivatives(self, recording_requester, data, metadata, **kwargs):
+        if self._parallel and self._record_on_proc is not True:
+            return
+        self._record_derivatives_driver(
+            recording_requester,
+            data,
+            metadata,
+            recording_requester._recording_iter.get_formatted_iteration_coordinate(),
+        )
+
     def record_derivatives_driver(self, recording_requester, data, metadata):
-        raise NotImplementedError(
-            "This recorder does not support recording of derivatives."
+        self._record_derivatives_driver(
+            recording_requester, data, metadata, self._iteration_coordinate
+        )
+
+    def _record_derivatives_driver(
+        self, recording_requester, data, metadata, iteration_coordinate
+    ):
+        state = self._states[recording_requester]
+        # The totals are keyed by promoted names (or aliases), but recorded by
+        # source name like everything else
+        sources = {
+            name: meta["source"]
+            for name, meta in chain(
+                recording_requester._designvars.items(),
+                recording_requester._responses.items(),
+            )
+        }
+
+        rows, cols, values = [], [], []
+        for key, jac in data.items():
+            of, wrt = key.split("!")
+            jac = np.atleast_2d(jac)
+            row_offset = _jac_offset(state.jac_rows, sources[of], jac.shape[0])
+            col_offset = _jac_offset(state.jac_cols, sources[wrt], jac.shape[1])
+            jac_rows, jac_cols = np.nonzero(jac)
+            rows.append(jac_rows + row_offset)
+            cols.append(jac_cols + col_offset)
+            values.append(jac[jac_rows, jac_cols])
+
+        state.derivatives.append(
+            (
+                iteration_coordinate,
+                state.timestamp(metadata["timestamp"]).to_numpy(),
+                np.concatenate(rows or [[]]).astype(np.int64),
+                np.concatenate(cols or [[]]).astype(np.int64),
+                np.concatenate(values or [[]]),
+            )
         )
 
     def record_metadata_solver(self, solver, run_number=None):
@@ -307,11 +734,73 @@ class DatasetRecorder(CaseRecorder):
     def record_viewer_data(self, model_viewer_data):
         pass
 
-    def assemble_dataset(self, recording_requester):
-        ds = xr.concat(self.datasets[recording_requester], dim=DESIGN_ID)
+    def assemble_dataset(
+        self, recording_requester, chunk_size=None, release=False, spill_to=None
+    ):
+        """
+        Assembles the cases recorded for a requester into a dataset.
+
+        With a ``chunk_size``, the cases are concatenated that many at a time,
+        and then the results likewise, to bound the memory used by the
+        concatenation. With ``release``, the cases are dropped from the
+        recorder as they are concatenated, so that they can't be assembled
+        again. With ``spill_to``, the path of a Zarr store, the concatenated
+        chunks are written to the store, and it is returned lazily loaded (and
+        dask-backed, if dask is installed) instead of being kept in memory. All
+        chunks then need the same variables and per-design shapes.
+        """
+        state = self._states[recording_requester]
+        start_timestamp = state.start_timestamp.to_numpy()
+        chunks = (
+            concat_designs(cases)
+            for cases in _gen_case_chunks(state.datasets, chunk_size, release)
+        )
+
+        if spill_to is not None:
+            for idx, chunk_ds in enumerate(chunks):
+                chunk_ds.attrs["start_timestamp"] = start_timestamp
+                if idx == 0:
+                    dump_zarr(chunk_ds, spill_to, mode="w")
+                else:
+                    append_zarr(chunk_ds, spill_to)
+            return load_zarr(spill_to)
+
+        chunk_datasets = list(chunks)
+        # At least pairwise, to get down to one dataset
+        fan_in = max(chunk_size or 0, 2)
+        while len(chunk_datasets) > 1:
+            chunk_datasets = [
+                concat_designs(chunk_datasets[start : start + fan_in])
+                for start in range(0, len(chunk_datasets), fan_in)
+            ]
+        (ds,) = chunk_datasets or [concat_designs([])]
         # For the sake of consistency, convert the start timestamp to
         # NumPy datetime64
-        ds.attrs["start_timestamp"] = self._start_timestamp[
-            recording_requester
-        ].to_numpy()
+        ds.attrs["start_timestamp"] = start_timestamp
+        return ds
+
+    def assemble_derivatives(self, recording_requester) -> xr.Dataset:
+        """
+        Assembles the total derivatives recorded for a requester (with the
+        ``record_derivatives`` recording option of a driver) into a dataset,
+        one design per derivative case. The Jacobians are stored as the driver
+        computed them, i.e. scaled by optimizers but unscaled by DOE drivers,
+        sparsely with a sparsity pattern shared by all cases; see
+        `encode_jacobians` and `decode_jacobian`.
+        """
+        state = self._states[recording_requester]
+        derivatives = list(state.derivatives)
+        coordinates, timestamps, *cases = zip(*derivatives) if derivatives else [[]] * 5
+        ds = xr.Dataset(
+            data_vars={
+                "meta.timestamp": xr.DataArray(
+                    np.array(timestamps, dtype="datetime64[ns]"), dims=[DESIGN_ID]
+                ),
+                **encode_jacobians(
+                    dict(state.jac_rows), dict(state.jac_cols), list(zip(*cases))
+                ),
+            },
+            coords={DESIGN_ID: np.array(coordinates, dtype=str)},
+        )
+        ds.attrs["start_timestamp"] = state.start_timestamp.to_numpy()
         return ds
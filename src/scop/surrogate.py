@@ -0,0 +1,205 @@
+import pickle
+
+import numpy as np
+import openmdao.api as om
+import xarray as xr
+from openmdao.surrogate_models.surrogate_model import SurrogateModel
+
+from .constants import DESIGN_ID
+from .modelling import Param, ParamLayout, add_input_param, add_output_param
+
+CURRENT_SURROGATE_VERSION = 0
+
+
+class ResponseSurface(om.ResponseSurface):
+    """
+    OpenMDAO's second order response surface, with vectorized predictions.
+    """
+
+    def vectorized_predict(self, x):
+        x = np.atleast_2d(x)
+        n = self.n
+        X = np.empty((len(x), ((n + 1) * (n + 2)) // 2))
+        X[:, 0] = 1.0
+        X[:, 1 : n + 1] = x
+        # Same order of the quadratic terms as in train()
+        offset = n + 1
+        for i in range(n):
+            X[:, offset : offset + n - i] = x[:, i : i + 1] * x[:, i:]
+            offset += n - i
+        return X @ self.betas
+
+
+class SurrogateComp(om.ExplicitComponent):
+    """
+    A component that evaluates a trained OpenMDAO surrogate model instead of an
+    expensive function. It has the same params as the component it replaces,
+    packed into flat vectors by `ParamLayout`. Create it with
+    `surrogate_comp`.
+    """
+
+    def initialize(self):
+        self.options.declare("inputs", types=list)
+        self.options.declare("outputs", types=list)
+        self.options.declare("surrogate", types=SurrogateModel)
+        # Built from the options on first use
+        self._input_layout = None
+        self._output_layout = None
+
+    @property
+    def input_layout(self) -> ParamLayout:
+        if self._input_layout is None:
+            self._input_layout = ParamLayout(self.options["inputs"])
+        return self._input_layout
+
+    @property
+    def output_layout(self) -> ParamLayout:
+        if self._output_layout is None:
+            self._output_layout = ParamLayout(self.options["outputs"])
+        return self._output_layout
+
+    def setup(self):
+        # The options may have changed since the layouts were built
+        self._input_layout = self._output_layout = None
+        for input_ in self.options["inputs"]:
+            add_input_param(self, input_)
+        for output in self.options["outputs"]:
+            add_output_param(self, output)
+
+    def _gen_blocks(self, layout):
+        for param, codebook, offset, size in zip(
+            layout.params, layout.codebooks, layout.offsets, layout.sizes
+        ):
+            # Only continuous, non-encoded params are differentiable
+            if not param.discrete and codebook is None:
+                yield param.name, slice(offset, offset + size)
+
+    def setup_partials(self):
+        self._partial_blocks = [
+            (out_name, in_name, out_slice, in_slice)
+            for out_name, out_slice in self._gen_blocks(self.output_layout)
+            for in_name, in_slice in self._gen_blocks(self.input_layout)
+        ]
+        for out_name, in_name, *_ in self._partial_blocks:
+            self.declare_partials(out_name, in_name)
+
+    def _pack_inputs(self, inputs, discrete_inputs):
+        return self.input_layout.pack(
+            {
+                param.name: (
+                    discrete_inputs[param.name]
+                    if param.discrete
+                    # Scalars come as 1-element arrays
+                    else inputs[param.name].reshape(shape)
+                )
+                for param, shape in zip(
+                    self.input_layout.params, self.input_layout.shapes
+                )
+            }
+        )
+
+    def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
+        x = self._pack_inputs(inputs, discrete_inputs)
+        values = self.output_layout.unpack(
+            np.reshape(self.options["surrogate"].predict(x), -1)
+        )
+        for param in self.output_layout.params:
+            if param.discrete:
+                discrete_outputs[param.name] = values[param.name].item()
+            else:
+                outputs[param.name] = values[param.name]
+
+    def compute_partials(self, inputs, partials, discrete_inputs=None):
+        x = self._pack_inputs(inputs, discrete_inputs)
+        jac = np.reshape(
+            self.options["surrogate"].linearize(x),
+            (self.output_layout.size, self.input_layout.size),
+        )
+        for out_name, in_name, out_slice, in_slice in self._partial_blocks:
+            partials[out_name, in_name] = jac[out_slice, in_slice]
+
+    def predict(self, values: dict) -> dict:
+        """
+        Predicts the outputs of a batch of designs, given a dict of input values
+        with a leading design dimension and keyed by param name, without
+        running a model.
+        """
+        x = np.atleast_2d(self.input_layout.pack(values))
+        return self.output_layout.unpack(_predict_batch(self.options["surrogate"], x))
+
+    def predict_dataset(self, ds: xr.Dataset, var_names: dict = None) -> xr.Dataset:
+        """
+        Predicts the outputs of all designs of a dataset, looking up the input
+        variables like `ParamLayout.from_dataset` does.
+        """
+        x = self.input_layout.from_dataset(ds, var_names=var_names)
+        return self.output_layout.to_dataset(
+            _predict_batch(self.options["surrogate"], x), design_ids=ds[DESIGN_ID]
+        )
+
+
+def _predict_batch(surrogate, x):
+    if type(surrogate).vectorized_predict is not SurrogateModel.vectorized_predict:
+        return np.reshape(surrogate.vectorized_predict(x), (len(x), -1))
+    return np.array([np.reshape(surrogate.predict(row), -1) for row in x]).reshape(
+        (len(x), -1)
+    )
+
+
+def surrogate_comp(
+    ds: xr.Dataset,
+    inputs: list[Param],
+    outputs: list[Param],
+    surrogate: SurrogateModel = None,
+    var_names: dict = None,
+) -> SurrogateComp:
+    """
+    Trains a surrogate model on the designs of a recorded dataset, and returns
+    a component evaluating it with the given input and output params. The
+    variables of the params are looked up like `ParamLayout.from_dataset` does,
+    and designs with non-finite values (e.g. failed cases) are skipped.
+    Defaults to a second order response surface.
+    """
+    if surrogate is None:
+        surrogate = ResponseSurface()
+
+    x = ParamLayout(inputs).from_dataset(ds, var_names=var_names)
+    y = ParamLayout(outputs).from_dataset(ds, var_names=var_names)
+    finite = np.isfinite(x).all(axis=1) & np.isfinite(y).all(axis=1)
+    if not finite.any():
+        raise ValueError("No designs with finite values to train on.")
+
+    surrogate.train(x[finite], y[finite])
+    return SurrogateComp(
+        inputs=list(inputs), outputs=list(outputs), surrogate=surrogate
+    )
+
+
+def dump_surrogate(comp: SurrogateComp, path):
+    """
+    Saves a trained surrogate component, to be loaded with `load_surrogate`.
+    """
+    state = {
+        "version": CURRENT_SURROGATE_VERSION,
+        "inputs": comp.options["inputs"],
+        "outputs": comp.options["outputs"],
+        "surrogate": comp.options["surrogate"],
+    }
+    with open(path, "wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_surrogate(path) -> SurrogateComp:
+    """
+    Loads a surrogate component saved with `dump_surrogate`.
+    """
+    with open(path, "rb") as file:
+        state = pickle.load(file)
+    if state.get("version", None) != CURRENT_SURROGATE_VERSION:
+        raise ValueError(
+            f"Unsupported surrogate version {state.get('version', None)!r}, "
+            f"expected {CURRENT_SURROGATE_VERSION}."
+        )
+    return SurrogateComp(
+        inputs=state["inputs"], outputs=state["outputs"], surrogate=state["surrogate"]
+    )
@@ -2,9 +2,42 @@ import os
 
 import hypothesis
 import numpy as np
+import openmdao.api as om
 import pytest
 
+import scop
+
 np.seterr(all="warn")
 
 hypothesis.settings.register_profile("fast", max_examples=5)
 hypothesis.settings.register_profile("debugger", report_multiple_bugs=False)
+
+
+@pytest.fixture(scope="session")
+def record_doe():
+    """
+    Runs the cases of a DOE on a (not set up) problem and returns the dataset
+    recorded by a `DatasetRecorder`. ``includes`` is passed on to the recording
+    options of the driver, and ``before_run`` is called with the problem after
+    its final setup.
+    """
+
+    def record(prob, cases, includes=None, before_run=None):
+        prob.driver = driver = om.DOEDriver(om.ListGenerator(cases))
+        recorder = scop.DatasetRecorder()
+        if includes is not None:
+            driver.recording_options["includes"] = includes
+        driver.add_recorder(recorder)
+
+        try:
+            prob.setup()
+            if before_run is not None:
+                prob.final_setup()
+                before_run(prob)
+            prob.run_driver()
+        finally:
+            prob.cleanup()
+
+        return recorder.assemble_dataset(driver)
+
+    return record
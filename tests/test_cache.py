@@ -0,0 +1,77 @@
+import numpy as np
+import openmdao.api as om
+
+import scop
+from scop import DESIGN_ID
+
+length = scop.Param(name="length", default=1.0)
+count = scop.Param(name="count", default=1, discrete=True)
+mass = scop.Param(name="mass", default=0.0)
+label = scop.Param(name="label", default="", space=scop.InnumSpace(), discrete=True)
+
+
+def run_doe(record_doe, cases, cache=None):
+    calls = []
+
+    def mass_func(length, count):
+        calls.append((length.item(), count))
+        return length * count, f"{count} pieces"
+
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem(
+        "mass",
+        scop.func_comp(inputs=[length, count], outputs=[mass, label])(mass_func),
+        promotes=["*"],
+    )
+    prob.model.add_design_var("length")
+    prob.model.add_design_var("count")
+    prob.model.add_objective("mass")
+    before_run = None if cache is None else cache.attach
+    return record_doe(prob, cases, includes=["*"], before_run=before_run), calls
+
+
+def test_warm_start_cache(tmp_path, record_doe):
+    first_ds, calls = run_doe(
+        record_doe,
+        [
+            [("length", length_), ("count", count_)]
+            for length_ in [1.0, 2.0]
+            for count_ in [1, 2]
+        ],
+    )
+    assert len(calls) == 4
+    scop.dump(first_ds, tmp_path / "first.scop")
+
+    cache = scop.WarmStartCache(scop.load(tmp_path / "first.scop"), atol=1e-6)
+    assert len(cache) == 4
+    cases = [
+        [("length", 1.0 + 1e-9), ("count", 2)],
+        [("length", 3.0), ("count", 1)],
+        [("length", 2.0), ("count", 3)],
+        [("length", 2.0), ("count", 1)],
+        [("length", 1.0 + 1e-3), ("count", 1)],
+    ]
+    second_ds, calls = run_doe(record_doe, cases, cache=cache)
+    assert calls == [(3.0, 1), (2.0, 3), (1.001, 1)]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    expected_ds, _ = run_doe(record_doe, cases)
+    np.testing.assert_allclose(second_ds["mass.mass"], expected_ds["mass.mass"])
+    assert (second_ds["mass.label"] == expected_ds["mass.label"]).all()
+    # Replayed designs keep their own design variable values
+    assert second_ds["mass.length"].values[0] == 1.0 + 1e-9
+    assert len(second_ds[DESIGN_ID]) == len(cases)
+
+    cache.detach()
+
+
+def test_warm_start_cache_discrete_input(record_doe):
+    cases = [[("length", 1.0), ("count", count_)] for count_ in [1, 2]]
+    first_ds, _ = run_doe(record_doe, cases)
+
+    cache = scop.WarmStartCache(first_ds)
+    second_ds, calls = run_doe(record_doe, cases[::-1], cache=cache)
+    assert calls == []
+    # Replayed designs update discrete inputs too
+    np.testing.assert_array_equal(second_ds["mass.count"], [2, 1])
+    cache.detach()
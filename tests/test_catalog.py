@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import openmdao.api as om
+import pytest
+
+import scop
+from scop import DESIGN_ID
+from scop.catalog import CATALOG_INDEX_NAME, index_catalog, open_catalog
+
+
+def run_doe(record_doe, xs):
+    prob = om.Problem()
+    prob.model.add_subsystem("indeps", om.IndepVarComp("x", np.zeros(2)))
+    prob.model.add_subsystem(
+        "passthrough", om.ExecComp(["y1=x[0]", "y2=x[1]"], x=np.zeros(2))
+    )
+    prob.model.connect("indeps.x", "passthrough.x")
+    prob.model.add_design_var("indeps.x", lower=np.zeros(2), upper=np.ones(2))
+    prob.model.add_objective("passthrough.y1")
+    prob.model.add_constraint("passthrough.y2", upper=1.0)
+    return record_doe(prob, [[("indeps.x", np.array(x, dtype=float))] for x in xs])
+
+
+def test_catalog(tmp_path, record_doe):
+    first_ds = run_doe(record_doe, [[0, 0], [1, 0]])
+    second_ds = run_doe(record_doe, [[2, 0], [0.5, 2], [-1, 0]])
+    scop.dump(first_ds, tmp_path / "first.scop")
+    scop.dump(second_ds, tmp_path / "second.scop")
+
+    index = index_catalog(tmp_path)
+    assert json.loads((tmp_path / CATALOG_INDEX_NAME).read_text()) == index
+    assert index["stores"]["second.scop"]["n_designs"] == 3
+    assert index["stores"]["first.scop"]["variables"]["passthrough.y1"]["roles"] == [
+        "objective",
+        "output",
+        "response",
+    ]
+
+    ds = open_catalog(tmp_path, roles=["objective", "constraint"])
+    assert set(ds.data_vars) == {"passthrough.y1", "passthrough.y2"}
+    assert list(ds["run"].values) == ["first"] * 2 + ["second"] * 3
+    assert ds.attrs["start_timestamp"] == first_ds.attrs["start_timestamp"]
+    # Only read when indexed
+    assert not any(var.variable._in_memory for var in ds.data_vars.values())
+    np.testing.assert_array_equal(
+        ds["passthrough.y1"].isel({DESIGN_ID: [4, 0, 2]}).values, [-1, 0, 2]
+    )
+    assert ds["passthrough.y2"][3].item() == 2
+
+    # Cross-run queries
+    pareto_ds = scop.pareto_subset(scop.feasible_subset(ds))
+    assert list(pareto_ds[DESIGN_ID].values) == [
+        "second/" + second_ds[DESIGN_ID].values[2]
+    ]
+
+    second_only_ds = open_catalog(tmp_path, runs=["second"], variables=["indeps.x"])
+    assert set(second_only_ds.data_vars) == {"indeps.x"}
+    assert len(second_only_ds[DESIGN_ID]) == 3
+
+    with pytest.raises(ValueError, match="not present in all runs"):
+        open_catalog(tmp_path, variables=["nonexistent"])
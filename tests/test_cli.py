@@ -0,0 +1,107 @@
+import numpy as np
+import openmdao.api as om
+import pytest
+from xarray.testing import assert_equal
+
+import scop
+from scop import DESIGN_ID
+from scop.cli import main
+
+
+def run_doe(record_doe, xs):
+    prob = om.Problem()
+    prob.model.add_subsystem(
+        "comp", om.ExecComp(["f1=x[0]", "f2=x[1]"], x=np.zeros(2)), promotes=["*"]
+    )
+    prob.model.add_design_var("x", lower=np.zeros(2), upper=np.ones(2))
+    prob.model.add_objective("f1")
+    prob.model.add_objective("f2")
+    return record_doe(prob, [[("x", np.array(x, dtype=float))] for x in xs])
+
+
+def test_convert_subset(tmp_path, capsys, record_doe):
+    ds = run_doe(record_doe, [[idx / 10, 1 - idx / 10] for idx in range(11)])
+    scop.dump_netcdf(ds, tmp_path / "run.nc")
+
+    assert (
+        main(
+            [
+                "-q",
+                "--batch-size",
+                "3",
+                "convert",
+                *map(str, [tmp_path / "run.nc", tmp_path / "run.scop"]),
+            ]
+        )
+        == 0
+    )
+    assert_equal(scop.load(tmp_path / "run.scop"), ds)
+
+    # NetCDF files are written at once
+    with pytest.raises(SystemExit):
+        main(
+            [
+                "-q",
+                "--batch-size",
+                "3",
+                "convert",
+                *map(str, [tmp_path / "run.scop", tmp_path / "too_many.nc"]),
+            ]
+        )
+    assert not (tmp_path / "too_many.nc").exists()
+
+    main(["info", str(tmp_path / "run.scop")])
+    out = capsys.readouterr().out
+    assert "(zarr, 11 designs)" in out
+    assert "comp.f1" in out and "objective" in out
+
+    main(
+        [
+            "-q",
+            "subset",
+            str(tmp_path / "run.scop"),
+            str(tmp_path / "sub.nc"),
+            "--start",
+            "2",
+            "--step",
+            "4",
+            "-v",
+            "comp.f1",
+        ]
+    )
+    subset_ds = scop.load_netcdf(tmp_path / "sub.nc")
+    assert list(subset_ds.data_vars) == ["comp.f1"]
+    assert_equal(
+        subset_ds["comp.f1"], ds["comp.f1"].isel({DESIGN_ID: slice(2, None, 4)})
+    )
+
+
+def test_pareto_merge(tmp_path, record_doe):
+    # The last design is dominated
+    first_ds = run_doe(record_doe, [[0, 1], [1, 0], [1, 1]])
+    second_ds = run_doe(record_doe, [[0.5, 0.5]])
+    for name, ds in [("first", first_ds), ("second", second_ds)]:
+        scop.dump(ds, tmp_path / f"{name}.scop")
+
+    main(["-q", "pareto", str(tmp_path / "first.scop"), str(tmp_path / "pareto.scop")])
+    assert_equal(
+        scop.load(tmp_path / "pareto.scop"), first_ds.isel({DESIGN_ID: [0, 1]})
+    )
+
+    sources = [str(tmp_path / f"{name}.scop") for name in ["first", "second"]]
+    with pytest.raises(SystemExit):
+        main(["-q", "merge", *sources, str(tmp_path / "merged.scop")])
+
+    main(
+        [
+            "-q",
+            "merge",
+            *sources,
+            str(tmp_path / "renamed.scop"),
+            "--on-collision",
+            "rename",
+        ]
+    )
+    merged_ds = scop.load(tmp_path / "renamed.scop")
+    assert merged_ds.sizes[DESIGN_ID] == 4
+    np.testing.assert_array_equal(merged_ds["comp.f1"].values, [0, 1, 1, 0.5])
@@ -0,0 +1,200 @@
+import inspect
+import os
+
+import numpy as np
+import openmdao.api as om
+import pytest
+
+import scop
+from scop import DESIGN_ID
+
+
+def cost_func(length, count, material):
+    return length * count * {"wood": 1.0, "steel": 3.0}[material]
+
+
+def build_problem():
+    length = scop.Param(
+        name="length", default=1.0, space=scop.RealSpace(lower=0.0, upper=2.0)
+    )
+    count = scop.Param(
+        name="count",
+        default=1,
+        space=scop.IntegerSpace(lower=1, upper=3),
+        discrete=True,
+    )
+    material = scop.Param(
+        name="material",
+        default="wood",
+        space=scop.EnumSpace(values=["wood", "steel"]),
+        discrete=True,
+    )
+    cost = scop.Param(name="cost", default=0.0)
+
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem(
+        "cost",
+        scop.func_comp(inputs=[length, count, material], outputs=[cost])(cost_func),
+        promotes=["*"],
+    )
+    # Overlapping with the space, and scaled
+    prob.model.add_design_var("length", lower=1.0, upper=3.0, scaler=2.0)
+    prob.model.add_design_var("count")
+    prob.model.add_design_var("material")
+    prob.model.add_objective("cost")
+    return prob
+
+
+def setup_problem(generator):
+    prob = build_problem()
+    prob.driver = om.DOEDriver(generator)
+    prob.setup()
+    prob.final_setup()
+    return prob
+
+
+@pytest.mark.parametrize(
+    "generator_class",
+    [scop.LatinHypercubeGenerator, scop.SobolGenerator, scop.HaltonGenerator],
+)
+def test_space_filling(generator_class):
+    n_samples = 64
+    generator = generator_class(n_samples, batch_size=16, seed=0)
+    prob = setup_problem(generator)
+    cases = generator(prob.driver._designvars, prob.model)
+    assert inspect.isgenerator(cases)
+
+    cases = [dict(case) for case in cases]
+    assert len(cases) == n_samples
+
+    lengths = np.array([case["length"].item() for case in cases]) / 2.0
+    assert ((lengths >= 1.0) & (lengths <= 2.0)).all()
+    assert {case["count"] for case in cases} == {1, 2, 3}
+    assert {case["material"] for case in cases} == {"wood", "steel"}
+    assert all(type(case["count"]) is int for case in cases)
+
+    if generator_class is scop.LatinHypercubeGenerator:
+        # Exactly one sample per bin
+        bins = np.floor((lengths - 1.0) * n_samples)
+        np.testing.assert_array_equal(np.sort(bins), np.arange(n_samples))
+
+    # Seeded generators are repeatable
+    assert [
+        dict(case)["material"]
+        for case in generator(prob.driver._designvars, prob.model)
+    ] == [case["material"] for case in cases]
+    prob.cleanup()
+
+
+def test_full_factorial():
+    prob = setup_problem(scop.FullFactorialGenerator(levels=3, batch_size=4))
+    recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.driver.recording_options["includes"] = ["*"]
+    prob.run_driver()
+    prob.cleanup()
+
+    ds = recorder.assemble_dataset(prob.driver)
+    assert len(ds[DESIGN_ID]) == 3 * 3 * 2
+    designs = set(
+        zip(
+            ds["cost.length"].values.tolist(),
+            ds["cost.count"].values.tolist(),
+            ds["cost.material"].values.tolist(),
+        )
+    )
+    assert designs == {
+        (length, count, material)
+        for length in [1.0, 1.5, 2.0]
+        for count in [1, 2, 3]
+        for material in ["wood", "steel"]
+    }
+
+
+def test_unbounded():
+    generator = scop.LatinHypercubeGenerator(10)
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem("comp", om.ExecComp("y=x"), promotes=["*"])
+    prob.model.add_design_var("x", lower=0.0)
+    prob.driver = om.DOEDriver(generator)
+    prob.setup()
+    prob.final_setup()
+
+    with pytest.raises(ValueError, match="finite bounds"):
+        next(generator(prob.driver._designvars, prob.model))
+    prob.cleanup()
+
+
+def build_quadratic_problem():
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem(
+        "comp", om.ExecComp("f=sum((x-0.5)**2)", x=np.zeros(2)), promotes=["*"]
+    )
+    prob.model.add_design_var("x", lower=-1.0, upper=1.0)
+    prob.model.add_objective("f")
+    return prob
+
+
+def test_parallel_derivatives():
+    xs = [[0.0, 1.0], [0.5, 0.25], [1.0, -1.0]]
+    prob = build_quadratic_problem()
+    prob.driver = scop.ParallelDOEDriver(
+        om.ListGenerator([[("x", np.array(x))] for x in xs]),
+        problem_factory=build_quadratic_problem,
+        n_workers=2,
+    )
+    prob.driver.recording_options["record_derivatives"] = True
+    recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.setup()
+    prob.run_driver()
+    prob.cleanup()
+
+    ds = recorder.assemble_dataset(prob.driver)
+    jac_ds = recorder.assemble_derivatives(prob.driver)
+    assert jac_ds.sizes[DESIGN_ID] == len(xs)
+    (x_name,) = jac_ds["jac.wrt"].values[:1]
+    # Completed cases may come in any order
+    np.testing.assert_allclose(
+        scop.jacobian_block(jac_ds, "comp.f", x_name)[:, 0],
+        2 * (ds[x_name].values - 0.5),
+    )
+
+
+def test_parallel():
+    prob = build_problem()
+    prob.driver = scop.ParallelDOEDriver(
+        scop.FullFactorialGenerator(levels=3),
+        problem_factory=build_problem,
+        n_workers=2,
+    )
+    recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.driver.recording_options["includes"] = ["*"]
+    prob.setup()
+    prob.run_driver()
+    prob.cleanup()
+
+    ds = recorder.assemble_dataset(prob.driver)
+    assert ds[DESIGN_ID].values.tolist() == [
+        f"rank0:DOEDriver_FullFactorial|{idx}" for idx in range(18)
+    ]
+    designs = list(
+        zip(
+            ds["cost.length"].values.tolist(),
+            ds["cost.count"].values.tolist(),
+            ds["cost.material"].values.tolist(),
+        )
+    )
+    assert set(designs) == {
+        (length, count, material)
+        for length in [1.0, 1.5, 2.0]
+        for count in [1, 2, 3]
+        for material in ["wood", "steel"]
+    }
+    np.testing.assert_allclose(
+        ds["cost.cost"].values, [cost_func(*design) for design in designs]
+    )
+    assert ds["meta.success"].all()
+    assert os.getpid() not in ds["meta.worker"].values
+    assert (ds["meta.timestamp"].diff(DESIGN_ID) >= np.timedelta64(0, "ns")).all()
@@ -0,0 +1,62 @@
+import numpy as np
+import xarray as xr
+
+import scop
+from scop import DESIGN_ID
+
+
+def make_ds(mass):
+    param = scop.Param(name="mass", default=0.0, units="kg")
+    return xr.Dataset(
+        {
+            "mass": (
+                [DESIGN_ID],
+                np.asarray(mass, dtype=float),
+                {"param": param, "type": {"output": {}}, "tags": {"a", "b", "c"}},
+            ),
+            "label": ([DESIGN_ID], np.array(["x"] * len(mass), dtype=object)),
+        },
+        coords={DESIGN_ID: [f"case|{idx}" for idx in range(len(mass))]},
+        attrs={"start_timestamp": np.datetime64("2020-01-01")},
+    )
+
+
+def test_fingerprint():
+    ds = make_ds([1.0, 2.0, 3.0])
+
+    assert scop.fingerprint(ds) == scop.fingerprint(make_ds([1.0, 2.0, 3.0]))
+    assert scop.fingerprint(ds) != scop.fingerprint(make_ds([1.0, 2.0, 4.0]))
+    assert scop.fingerprint(ds) != scop.fingerprint(
+        ds.assign_attrs(start_timestamp=np.datetime64("2021-01-01"))
+    )
+
+
+def test_results_cache(tmp_path):
+    calls = []
+
+    def total_mass(ds, factor=1.0):
+        calls.append(factor)
+        return float(ds["mass"].sum()) * factor
+
+    path = tmp_path / "store.scop"
+    scop.dump_zarr(make_ds([1.0, 2.0, 3.0]), path)
+    fingerprint = scop.fingerprint(path)
+    assert scop.fingerprint(path) == fingerprint
+    cache = scop.ResultsCache.next_to(path, max_entries=2)
+
+    assert cache(total_mass, path) == 6.0
+    assert cache(total_mass, path) == 6.0
+    assert cache(total_mass, scop.load_zarr(path)) == 6.0
+    assert cache(total_mass, path, factor=2.0) == 12.0
+    assert calls == [1.0, 1.0, 2.0]
+    assert len(list((tmp_path / "store.scop.cache").iterdir())) == 2
+
+    # Changed data invalidates the results
+    scop.dump_zarr(make_ds([1.0, 2.0, 4.0]), path, mode="w")
+    assert scop.fingerprint(path) != fingerprint
+    assert cache(total_mass, path) == 7.0
+    assert calls == [1.0, 1.0, 2.0, 1.0]
+
+    cache.clear()
+    assert cache(total_mass, path) == 7.0
+    assert len(calls) == 5
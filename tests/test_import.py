@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+# Microseconds, as reported by -X importtime
+IMPORT_BUDGET = 100_000
+WORKER_IMPORT = "from scop import Param, func_comp"
+HEAVY_MODULES = ["jsonpickle", "pandas", "pygmo", "xarray", "zarr"]
+
+
+def run_python(code, *args):
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def test_import_budget():
+    stderr = run_python("import scop", "-X", "importtime").stderr
+    # The last line is the package itself, with the cumulative time second
+    last_line = stderr.strip().splitlines()[-1]
+    assert last_line.split("|")[-1].strip() == "scop"
+    assert int(last_line.split("|")[1]) < IMPORT_BUDGET
+
+
+def test_lazy_import():
+    stdout = run_python(
+        f"import sys, json; {WORKER_IMPORT}; "
+        "print(json.dumps("
+        f"[name for name in {HEAVY_MODULES!r} if name in sys.modules]"
+        "))"
+    ).stdout
+    assert json.loads(stdout) == []
+
+    import scop
+
+    assert all(getattr(scop, name) is not None for name in scop.__all__)
+    assert scop.io.dump is scop.dump
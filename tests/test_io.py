@@ -0,0 +1,202 @@
+import numpy as np
+import openmdao.api as om
+import pytest
+import zarr
+from xarray.testing import assert_equal
+
+import scop
+from scop import DESIGN_ID
+
+
+def run_doe(record_doe, xs):
+    prob = om.Problem()
+    indeps = prob.model.add_subsystem("indeps", om.IndepVarComp("x", np.zeros(3)))
+    indeps.add_discrete_output("name:unsafe", 0)
+    prob.model.add_subsystem(
+        "passthrough",
+        om.ExecComp(["y1=x[0]", "y2=x[1:3]"], x=np.zeros(3), y2=np.zeros(2)),
+    )
+    prob.model.connect("indeps.x", "passthrough.x")
+    prob.model.add_design_var("indeps.x", lower=np.zeros(3), upper=np.ones(3))
+    prob.model.add_objective("passthrough.y1")
+    return record_doe(
+        prob,
+        [[("indeps.x", np.array(x, dtype=float))] for x in xs],
+        includes=["*"],
+    )
+
+
+def test_append(tmp_path, record_doe):
+    first_ds = run_doe(record_doe, [[0, 0, 0], [1, 0, 0]])
+    # Enough designs to make the design ids longer than in the store
+    second_ds = run_doe(record_doe, [[0.1 * i, 0, 0] for i in range(12)])
+    path = tmp_path / "append.scop"
+
+    scop.dump(first_ds, path)
+
+    with pytest.raises(ValueError, match="already exist"):
+        scop.append(second_ds, path)
+
+    scop.append(second_ds, path, on_collision="rename")
+    loaded_ds = scop.load(path)
+
+    assert len(loaded_ds[DESIGN_ID]) == 14
+    assert len(np.unique(loaded_ds[DESIGN_ID])) == 14
+    assert loaded_ds.attrs == first_ds.attrs
+    assert_equal(
+        loaded_ds.isel({DESIGN_ID: slice(2, None)}).drop_vars(DESIGN_ID),
+        second_ds.drop_vars(DESIGN_ID),
+    )
+    assert loaded_ds["indeps.name:unsafe"].attrs["type"] == {"output": {}}
+
+    # Appending the same designs again should be a no-op
+    scop.append(second_ds, path, on_collision="drop")
+    assert len(scop.load(path)[DESIGN_ID]) == 14
+
+
+def test_append_incompatible(tmp_path, record_doe):
+    path = tmp_path / "append.scop"
+    scop.dump(run_doe(record_doe, [[0, 0, 0]]), path)
+
+    with pytest.raises(ValueError, match="Variables differ"):
+        scop.append(run_doe(record_doe, [[1, 0, 0]]).drop_vars("passthrough.y1"), path)
+
+
+@pytest.mark.parametrize("fmt", ["zarr", "netcdf"])
+def test_dump_load_threaded(tmp_path, record_doe, fmt):
+    dump = getattr(scop.io, f"dump_{fmt}")
+    load = getattr(scop.io, f"load_{fmt}")
+    ds = run_doe(record_doe, [[0, 0, 0], [1, 0, 0], [0.5, 0.5, 0.5]])
+    path = tmp_path / "dump.scop"
+
+    if fmt == "netcdf":
+        with pytest.raises(TypeError, match="n_threads"):
+            dump(ds, path, n_threads=4)
+        dump(ds, path)
+    else:
+        dump(ds, path, n_threads=4)
+    loaded_ds = load(path, n_threads=4)
+
+    assert_equal(loaded_ds, ds)
+    assert loaded_ds.attrs == ds.attrs
+    assert loaded_ds["indeps.x"].attrs["type"].keys() == {"output", "desvar"}
+    # Loaded eagerly
+    assert all(var._in_memory for var in loaded_ds.variables.values())
+
+
+def test_dump_zarr_threaded_store(record_doe):
+    ds = run_doe(record_doe, [[0, 0, 0], [1, 0, 0], [0.5, 0.5, 0.5]])
+    # Not a path, and into a group
+    store = {}
+    scop.io.dump_zarr(
+        ds, store, n_threads=4, group="run", synchronizer=zarr.ThreadSynchronizer()
+    )
+
+    assert not any("_scop_batch" in key for key in store)
+    loaded_ds = scop.io.load_zarr(store, group="run", n_threads=4)
+    assert_equal(loaded_ds, ds)
+    assert loaded_ds.attrs == ds.attrs
+
+
+@pytest.mark.parametrize("flatten", ["columns", "lists"])
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_dump_load_tabular(tmp_path, record_doe, fmt, flatten):
+    pytest.importorskip("pyarrow")
+    dump_tabular = getattr(scop.io, f"dump_{fmt}")
+    load_tabular = getattr(scop.io, f"load_{fmt}")
+    ds = run_doe(
+        record_doe, [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [0.5, 0.5, 0.5]]
+    )
+    path = tmp_path / f"dump.{fmt}"
+    scop.dump(ds, tmp_path / "dump.scop")
+
+    # Stream from a lazily loaded store, a few designs at a time
+    dump_tabular(scop.load(tmp_path / "dump.scop"), path, flatten, 2)
+    loaded_ds = load_tabular(path)
+
+    assert_equal(loaded_ds, ds)
+    assert loaded_ds.attrs == ds.attrs
+    assert loaded_ds["indeps.x"].attrs["type"].keys() == {"output", "desvar"}
+    assert loaded_ds[DESIGN_ID].dtype == ds[DESIGN_ID].dtype
+
+    subset_ds = load_tabular(path, variables=["passthrough.y2"])
+    assert list(subset_ds.data_vars) == ["passthrough.y2"]
+    assert_equal(subset_ds["passthrough.y2"], ds["passthrough.y2"])
+
+
+class PeaksComp(om.ExplicitComponent):
+    def setup(self):
+        self.add_input("x", 0.0)
+        self.add_discrete_output("peaks", np.zeros(0))
+
+    def compute(self, inputs, outputs, discrete_inputs, discrete_outputs):
+        discrete_outputs["peaks"] = np.arange(1.0, inputs["x"][0] + 1)
+
+
+def run_ragged_doe(record_doe, xs):
+    prob = om.Problem()
+    prob.model.add_subsystem("comp", PeaksComp(), promotes=["*"])
+    prob.model.add_design_var("x", lower=0, upper=10)
+    return record_doe(prob, [[("x", x)] for x in xs], includes=["*"])
+
+
+def test_ragged(tmp_path, record_doe):
+    ds = run_ragged_doe(record_doe, [2.0, 0.0, 3.0])
+    peaks = [np.arange(1.0, x + 1) for x in [2.0, 0.0, 3.0]]
+
+    # Not padded with NaN
+    assert ds["comp.peaks"].dims == ("comp.peaks_values",)
+    assert ds.sizes["comp.peaks_values"] == 5
+    for values, expected in zip(scop.decode_ragged(ds, "comp.peaks"), peaks):
+        np.testing.assert_array_equal(values, expected)
+
+    path = tmp_path / "ragged.scop"
+    scop.dump(ds, path)
+    assert_equal(scop.load(path), ds)
+
+    more_ds = run_ragged_doe(record_doe, [1.0, 4.0])
+    scop.append(more_ds, path, on_collision="rename")
+    loaded_ds = scop.load(path)
+    for values, expected in zip(
+        scop.decode_ragged(loaded_ds, "comp.peaks"),
+        peaks + [np.arange(1.0, x + 1) for x in [1.0, 4.0]],
+    ):
+        np.testing.assert_array_equal(values, expected)
+
+    subset_ds = scop.space_subset(loaded_ds.isel({DESIGN_ID: [4, 0]}))
+    for values, expected in zip(
+        scop.decode_ragged(subset_ds, "comp.peaks"), [np.arange(1.0, 5.0), peaks[0]]
+    ):
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_append_store(record_doe):
+    ds = run_ragged_doe(record_doe, [2.0, 0.0])
+    # Enough designs to make the design ids longer than in the store
+    more_ds = run_ragged_doe(record_doe, [1.0 + i for i in range(12)])
+    store = zarr.MemoryStore()
+    scop.io.dump_zarr(ds, store)
+
+    scop.append(more_ds, store, on_collision="rename")
+    loaded_ds = scop.io.load_zarr(store)
+
+    assert len(np.unique(loaded_ds[DESIGN_ID])) == 14
+    for values, x in zip(
+        scop.decode_ragged(loaded_ds, "comp.peaks"),
+        [2.0, 0.0] + [1.0 + i for i in range(12)],
+    ):
+        np.testing.assert_array_equal(values, np.arange(1.0, x + 1))
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_ragged_tabular(tmp_path, record_doe, fmt):
+    pytest.importorskip("pyarrow")
+    ds = run_ragged_doe(record_doe, [2.0, 0.0, 3.0, 1.0])
+    path = tmp_path / f"dump.{fmt}"
+    # A few designs at a time, out of order
+    getattr(scop.io, f"dump_{fmt}")(ds.isel({DESIGN_ID: [3, 2, 0]}), path, "lists", 2)
+    loaded_ds = getattr(scop.io, f"load_{fmt}")(path, variables=["comp.peaks"])
+
+    assert list(loaded_ds[DESIGN_ID].values) == list(ds[DESIGN_ID].values[[3, 2, 0]])
+    for values, x in zip(scop.decode_ragged(loaded_ds, "comp.peaks"), [1.0, 3.0, 2.0]):
+        np.testing.assert_array_equal(values, np.arange(1.0, x + 1))
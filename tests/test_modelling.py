@@ -1,6 +1,11 @@
+import deepdiff
+import jsonpickle
+import numpy as np
 import openmdao.api as om
+import pydantic
 import pytest
 import scop
+from scop import DESIGN_ID
 
 
 def mass_func(length, count):
@@ -85,3 +90,225 @@ def test_params_e2e(tmp_path):
     assert loaded_ds["time.mass"].attrs["param"] == params["mass"]
     assert loaded_ds["time.count"].attrs["param"] == params["count"]
     assert loaded_ds["time.time"].attrs["param"] == params["time"]
+
+
+def test_param_interning():
+    param = scop.Param(name="length", default=1.0, units="m", tags=["a"])
+
+    assert scop.Param(name="length", default=1.0, units="m", tags=["a"]) is param
+    assert scop.Param(name="length", default=1, units="m", tags=["a"]) is not param
+    assert {param: None}.keys() == {param}
+    with pytest.raises(TypeError, match="immutable"):
+        param.units = "mm"
+
+    overridden = param.override(units="mm", space=scop.RealSpace(lower=0.0))
+    assert overridden.parent is param
+    assert overridden.space == scop.RealSpace(lower=0.0)
+    assert param.override(units="mm", space=scop.RealSpace(lower=0.0)) is overridden
+
+    with pytest.raises(pydantic.ValidationError):
+        scop.Param(name="length", discrete="maybe")
+    with pytest.raises(pydantic.ValidationError):
+        param.override(tags="a")
+
+
+def test_param_legacy_decoding():
+    # A param as encoded by jsonpickle when params were pydantic models
+    encoded = '{"param": {"py/object": "scop.modelling.Param", "py/state": {"__dict__": {"name": "count", "label": "C", "desc": null, "default": 1, "units": "m", "space": {"py/object": "scop.modelling.Space", "py/state": {"__dict__": {}, "__fields_set__": {"py/set": []}, "__private_attribute_values__": {}}}, "discrete": true, "tags": ["a"], "meta": {"k": [1, 2]}, "parent": {"py/object": "scop.modelling.Param", "py/state": {"__dict__": {"name": "count", "label": null, "desc": null, "default": 1, "units": null, "space": {"py/object": "scop.modelling.IntegerSpace", "py/state": {"__dict__": {"lower": 0, "upper": 3}, "__fields_set__": {"py/set": ["lower", "upper"]}, "__private_attribute_values__": {}}}, "discrete": true, "tags": ["a"], "meta": {"k": {"py/id": 10}}, "parent": null}, "__fields_set__": {"py/set": ["discrete", "name", "meta", "units", "default", "space", "tags"]}, "__private_attribute_values__": {}}}}, "__fields_set__": {"py/set": ["discrete", "name", "parent", "meta", "units", "label", "default", "desc", "space", "tags"]}, "__private_attribute_values__": {}}}}'  # noqa: E501
+    param = jsonpickle.decode(encoded)["param"]
+
+    assert param.parent == scop.Param(
+        name="count",
+        default=1,
+        space=scop.IntegerSpace(lower=0, upper=3),
+        discrete=True,
+        tags=["a"],
+        meta={"k": [1, 2]},
+    )
+    assert param.units == "m"
+    assert param.label == "C"
+
+
+def test_param_layout():
+    params = scop.ParamSet(
+        [
+            scop.Param(name="length", default=1.0, space=scop.RealSpace(lower=0.5)),
+            scop.Param(name="shape", default=np.zeros((2, 3))),
+            scop.Param(
+                name="material",
+                default="steel",
+                space=scop.EnumSpace(values=["steel", "aluminium"]),
+                discrete=True,
+            ),
+            scop.Param(
+                name="count", default=1, space=scop.IntegerSpace(), discrete=True
+            ),
+        ]
+    )
+    layout = params.layout()
+
+    assert layout.size == 9
+    assert list(layout.offsets) == [0, 1, 7, 8]
+    assert layout.bounds[0][0] == 0.5
+    assert list(layout.bounds[1][7:]) == [1, np.inf]
+
+    values = {
+        "length": 2.0,
+        "shape": np.arange(6.0).reshape(2, 3),
+        "material": "aluminium",
+        "count": 3,
+    }
+    vector = layout.pack(values)
+    assert list(vector) == [2.0, 0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 1.0, 3.0]
+    assert not deepdiff.DeepDiff(
+        layout.unpack(vector),
+        values,
+        ignore_type_in_groups=[(np.ndarray, float, int, str)],
+    )
+
+    batch = layout.pack(
+        {name: np.stack([value, value]) for name, value in values.items()}
+    )
+    assert batch.shape == (2, 9)
+    ds = layout.to_dataset(batch, design_ids=["a", "b"])
+    assert ds["material"].values.tolist() == ["aluminium"] * 2
+    assert ds["shape"].dims == (DESIGN_ID, "shape_0", "shape_1")
+    assert ds["count"].attrs["param"] is params["count"]
+    np.testing.assert_array_equal(layout.from_dataset(ds), batch)
+
+    with pytest.raises(ValueError, match="not in the space"):
+        layout.pack({**values, "material": "wood"})
+
+
+def test_param_layout_recorded():
+    length = scop.Param(name="length", default=1.0, units="m")
+    count = scop.Param(
+        name="count", default=1, space=scop.IntegerSpace(), discrete=True
+    )
+    mass = scop.Param(name="mass", default=0.0, units="kg")
+
+    prob = om.Problem()
+    prob.model.add_subsystem(
+        "mass",
+        scop.func_comp(inputs=[length, count], outputs=[mass])(mass_func),
+        promotes=["*"],
+    )
+    prob.model.add_design_var("length", lower=0.5, upper=1.5)
+    prob.model.add_design_var("count", lower=1, upper=2)
+    prob.driver = driver = om.DOEDriver(
+        om.ListGenerator(
+            [[("length", 0.5), ("count", 1)], [("length", 1.0), ("count", 2)]]
+        )
+    )
+    recorder = scop.DatasetRecorder()
+    driver.add_recorder(recorder)
+    driver.recording_options["includes"] = ["*"]
+    prob.setup()
+    prob.run_driver()
+
+    ds = recorder.assemble_dataset(driver)
+    layout = scop.ParamSet([length, count, mass]).layout()
+
+    np.testing.assert_array_equal(
+        layout.from_dataset(ds), [[0.5, 1, 5.0], [1.0, 2, 20.0]]
+    )
+
+
+def test_space_contains_clip():
+    real = scop.RealSpace(lower=0.0, upper=1.0)
+    np.testing.assert_array_equal(
+        real.contains([-1.0, 0.0, 0.5, 1.0, 2.0, np.nan]),
+        [False, True, True, True, False, False],
+    )
+    np.testing.assert_array_equal(
+        real.clip([[-1.0, 0.5], [1.0, 2.0]]), [[0, 0.5], [1, 1]]
+    )
+
+    integer = scop.IntegerSpace(lower=1)
+    np.testing.assert_array_equal(
+        integer.contains([0, 1, 1.5, 2]), [False, True, False, True]
+    )
+    np.testing.assert_array_equal(integer.clip([0.2, 1.6, 7]), [1, 2, 7])
+
+    enum = scop.EnumSpace(values=[1.0, 10.0, 2.0])
+    np.testing.assert_array_equal(enum.contains([1.0, 3.0, 10.0]), [True, False, True])
+    np.testing.assert_array_equal(enum.clip([-5, 1.4, 1.6, 7, 100]), [1, 1, 2, 10, 10])
+
+    materials = scop.EnumSpace(values=["wood", "steel"])
+    np.testing.assert_array_equal(materials.contains(["steel", "gold"]), [True, False])
+    with pytest.raises(ValueError, match="gold"):
+        materials.clip(["steel", "gold"])
+
+    assert scop.InnumSpace().contains(["anything"]).all()
+
+
+def test_space_check():
+    length = scop.Param(
+        name="length", default=1.0, space=scop.RealSpace(lower=0.0, upper=2.0)
+    )
+    count = scop.Param(
+        name="count", default=1, space=scop.IntegerSpace(lower=1), discrete=True
+    )
+    mass = scop.Param(
+        name="mass", default=0.0, space=scop.RealSpace(upper=25.0), units="kg"
+    )
+
+    def run(space_check, cases):
+        prob = om.Problem()
+        prob.model.add_subsystem(
+            "mass",
+            scop.func_comp(
+                inputs=[length, count], outputs=[mass], space_check=space_check
+            )(mass_func),
+            promotes=["*"],
+        )
+        prob.model.add_design_var("length")
+        prob.model.add_design_var("count")
+        prob.driver = driver = om.DOEDriver(om.ListGenerator(cases))
+        recorder = scop.DatasetRecorder()
+        driver.add_recorder(recorder)
+        driver.recording_options["includes"] = ["*"]
+        prob.setup()
+        prob.run_driver()
+        prob.cleanup()
+        return recorder.assemble_dataset(driver)
+
+    cases = [
+        [("length", 1.0), ("count", 1)],
+        [("length", 3.0), ("count", 1)],
+        [("length", 1.0), ("count", 0)],
+        [("length", 2.0), ("count", 2)],
+    ]
+
+    ds = run(None, cases)
+    np.testing.assert_array_equal(ds["mass.mass"], [10, 30, 0, 40])
+    mask = scop.space_mask(ds)
+    np.testing.assert_array_equal(mask["mass.length"], [True, False, True, True])
+    np.testing.assert_array_equal(mask["mass.mass"], [True, False, True, False])
+    np.testing.assert_array_equal(scop.space_subset(ds)[DESIGN_ID], ds[DESIGN_ID][[0]])
+    clipped_ds = scop.clip_to_space(ds)
+    np.testing.assert_array_equal(clipped_ds["mass.length"], [1, 2, 1, 2])
+    np.testing.assert_array_equal(clipped_ds["mass.count"], [1, 1, 1, 2])
+    assert clipped_ds["mass.mass"].attrs["param"] is mass
+
+    # Failed cases are recorded with the outputs of the last successful one
+    ds = run("raise", cases)
+    np.testing.assert_array_equal(ds["mass.mass"], [10, 10, 10, 10])
+
+    ds = run("clip", cases)
+    np.testing.assert_array_equal(ds["mass.mass"], [10, 20, 10, 25])
+
+
+@pytest.mark.parametrize("space_check", ["raise", "clip"])
+def test_space_check_non_numeric(space_check):
+    # Discrete params default to a RealSpace too
+    label = scop.Param(name="label", default="", discrete=True)
+    comp = scop.func_comp(inputs=[label], outputs=[], space_check=space_check)(
+        lambda label: {}
+    )
+    prob = om.Problem()
+    prob.model.add_subsystem("comp", comp)
+    prob.setup()
+    prob.set_val("comp.label", "steel")
+    prob.run_model()
+    assert comp._check_space(label, "steel", "Output") == "steel"
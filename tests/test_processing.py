@@ -0,0 +1,180 @@
+import numpy as np
+import openmdao.api as om
+import pygmo
+import pytest
+import xarray as xr
+
+import scop
+from scop import DESIGN_ID
+
+
+def test_convert_units(record_doe):
+    temperature = scop.Param(name="temperature", default=0.0, units="degC")
+
+    @scop.func_comp(inputs=[temperature], outputs=[])
+    def comp(temperature):
+        return {}
+
+    prob = om.Problem()
+    prob.model.add_subsystem("comp", comp, promotes=["*"])
+    prob.model.add_subsystem(
+        "length",
+        om.ExecComp("y=2*x", x={"units": "m"}, y={"units": "m", "shape": 2}),
+        promotes=["*"],
+    )
+    prob.model.add_design_var("x", lower=0.0, upper=10.0, scaler=2.0)
+    prob.model.add_design_var("temperature", lower=-10.0, upper=100.0)
+    prob.model.add_objective("y", index=0, scaler=2.0, adder=1.0)
+    ds = record_doe(
+        prob,
+        [[("x", x), ("temperature", 10.0 * x)] for x in range(3)],
+        includes=["*"],
+    )
+
+    (x_name,) = scop.design_space(ds).filter_by_attrs(units="m")
+    converted_ds = scop.convert_units(
+        ds, {"length.y": "mm", x_name: "cm", temperature: "degF"}
+    )
+
+    np.testing.assert_allclose(converted_ds["length.y"], 1000.0 * ds["length.y"])
+    assert converted_ds["length.y"].attrs["units"] == "mm"
+    assert converted_ds["comp.temperature"].attrs["units"] == "degF"
+    assert converted_ds["comp.temperature"].attrs["param"].units == "degF"
+    np.testing.assert_allclose(converted_ds["comp.temperature"], [32.0, 50.0, 68.0])
+    np.testing.assert_allclose(converted_ds[x_name], 100.0 * ds[x_name])
+    # Unconverted
+    assert converted_ds["length.x"].equals(ds["length.x"])
+
+    # The driver scaling still maps to the same scaled values
+    def scaled(var):
+        meta = var.attrs["type"]["objective"]
+        return (var + meta["total_adder"]) * meta["total_scaler"]
+
+    np.testing.assert_allclose(scaled(converted_ds["length.y"]), scaled(ds["length.y"]))
+    xr.testing.assert_allclose(
+        scop.objective_space(converted_ds, scale=True),
+        scop.objective_space(ds, scale=True),
+    )
+    # The design variable is scaled by 2, and the objective is (y + 1) * 2
+    np.testing.assert_allclose(
+        scop.objective_space(ds, scale=True)["length.y"], [[2, 2], [4, 4], [6, 6]]
+    )
+
+    with pytest.raises(ValueError, match="no units"):
+        scop.convert_units(ds, {"meta.success": "m"})
+
+
+def test_space_subset_discrete_string(record_doe):
+    # Discrete params default to a RealSpace too
+    material = scop.Param(name="material", default="steel", discrete=True)
+    length = scop.Param(name="length", default=0.5, space=scop.RealSpace(upper=1.0))
+
+    @scop.func_comp(inputs=[material, length], outputs=[])
+    def comp(material, length):
+        return {}
+
+    prob = om.Problem()
+    prob.model.add_subsystem("comp", comp, promotes=["*"])
+    prob.model.add_design_var("length")
+    ds = record_doe(
+        prob,
+        [[("length", length)] for length in [0.5, 2.0, 1.0]],
+        includes=["*"],
+    )
+
+    mask = scop.space_mask(ds)
+    np.testing.assert_array_equal(mask["comp.material"], [True, True, True])
+    np.testing.assert_array_equal(mask["comp.length"], [True, False, True])
+    subset_ds = scop.space_subset(ds)
+    np.testing.assert_array_equal(subset_ds["comp.length"], [0.5, 1.0])
+    np.testing.assert_array_equal(subset_ds["comp.material"], ["steel", "steel"])
+    clipped_ds = scop.clip_to_space(ds)
+    np.testing.assert_array_equal(clipped_ds["comp.length"], [0.5, 1.0, 1.0])
+    assert clipped_ds["comp.material"].equals(ds["comp.material"])
+
+
+@pytest.fixture(scope="module")
+def front_ds(record_doe):
+    prob = om.Problem()
+    prob.model.add_subsystem(
+        "comp", om.ExecComp(["f1=x", "f2=(1-x)**2"]), promotes=["*"]
+    )
+    prob.model.add_design_var("x", lower=0.0, upper=1.0)
+    prob.model.add_objective("f1")
+    prob.model.add_objective("f2")
+    return record_doe(prob, [[("x", x)] for x in np.linspace(0.0, 1.0, 41)])
+
+
+def _costs(ds):
+    return np.stack([ds["comp.f1"].values, ds["comp.f2"].values], axis=1)
+
+
+def test_hypervolume_subset(front_ds):
+    costs = _costs(front_ds)
+    ref_point = costs.max(axis=0) + 0.1
+
+    subset_ds = scop.hypervolume_subset(front_ds, 5, ref_point=ref_point)
+
+    # Same as a greedy selection recomputing all contributions in each step
+    selected = []
+    for _ in range(5):
+        gains = [
+            (
+                -np.inf
+                if idx in selected
+                else pygmo.hypervolume(costs[selected + [idx]]).compute(ref_point)
+            )
+            for idx in range(len(costs))
+        ]
+        selected.append(int(np.argmax(gains)))
+    assert subset_ds[DESIGN_ID].values.tolist() == (
+        front_ds[DESIGN_ID].values[selected].tolist()
+    )
+    assert scop.hypervolume_subset(front_ds, 100).sizes[DESIGN_ID] == 41
+    # The extremes don't dominate this reference point
+    assert scop.hypervolume_subset(front_ds, 100, [1.0, 1.0]).sizes[DESIGN_ID] == 39
+
+
+@pytest.mark.parametrize("method", ["maximin", "kmeans"])
+def test_spread_subset(front_ds, method):
+    subset_ds = scop.spread_subset(front_ds, 5, method=method, seed=0)
+    x = subset_ds["comp.f1"].values
+
+    assert len(np.unique(x)) == 5
+    if method == "maximin":
+        # Starts with the extremes
+        assert x[:2].tolist() == [0.0, 1.0]
+    assert np.diff(np.sort(x)).min() > 0.1
+
+    with pytest.raises(ValueError, match="Unknown method"):
+        scop.spread_subset(front_ds, 5, method="random")
+
+
+def test_knee_subset(front_ds):
+    # x + (1 - x)**2 is the smallest at 0.5
+    (x,) = scop.knee_subset(front_ds)["comp.f1"].values
+    assert x == 0.5
+
+
+def test_ragged_constraints(record_doe):
+    def run(size, xs):
+        prob = om.Problem()
+        prob.model.add_subsystem("indeps", om.IndepVarComp("x", 0.0))
+        prob.model.add_subsystem(
+            "comp", om.ExecComp("g=x*c", g=np.zeros(size), c=np.ones(size))
+        )
+        prob.model.connect("indeps.x", "comp.x")
+        prob.model.add_design_var("indeps.x")
+        prob.model.add_objective("indeps.x")
+        prob.model.add_constraint("comp.g", upper=1.0)
+        return record_doe(prob, [[("indeps.x", x)] for x in xs])
+
+    # Constraints of different sizes in different runs are concatenated as
+    # ragged
+    ds = scop.concat_designs([run(2, [0.5, 2.0]), run(3, [0.0, 1.5])])
+    assert scop.ragged.is_ragged(ds["comp.g"])
+
+    assert list(scop.feasible_subset(ds)["indeps.x"].values) == [0.5, 0.0]
+    np.testing.assert_allclose(
+        scop.processing.constraint_violations(ds), [0.0, 2.0, 0.0, 1.5]
+    )
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import scop
+from scop import DESIGN_ID
+
+
+@pytest.fixture
+def ds():
+    rng = np.random.default_rng(0)
+    n_designs = 1000
+    material = scop.Param(
+        name="material",
+        default="steel",
+        space=scop.EnumSpace(values=["steel", "wood", "glass"]),
+        discrete=True,
+    )
+    mass = rng.uniform(0.0, 10.0, n_designs)
+    mass[:10] = np.nan
+    return xr.Dataset(
+        {
+            "mass": ([DESIGN_ID], mass, {"discrete": False}),
+            "stress": ([DESIGN_ID], rng.normal(size=n_designs), {"discrete": False}),
+            "count": ([DESIGN_ID], rng.integers(0, 5, n_designs), {"discrete": True}),
+            "material": (
+                [DESIGN_ID],
+                rng.choice(["steel", "wood", "glass"], n_designs).astype(object),
+                {"discrete": True, "param": material},
+            ),
+            "shape": ([DESIGN_ID, "shape_0"], np.zeros((n_designs, 2))),
+        },
+        coords={DESIGN_ID: [f"case|{idx}" for idx in range(n_designs)]},
+    )
+
+
+@pytest.mark.parametrize("variables", [None, ["mass"], []])
+def test_design_index(ds, variables):
+    index = scop.DesignIndex(ds, variables=variables)
+    conditions = {
+        "mass": (None, 5.0),
+        "stress": (-1.0, 1.0),
+        "count": [1, 3],
+        ds["material"].attrs["param"]: "wood",
+    }
+    mask = (
+        (ds["mass"] <= 5.0)
+        & (abs(ds["stress"]) <= 1.0)
+        & ds["count"].isin([1, 3])
+        & (ds["material"] == "wood")
+    ).values
+
+    np.testing.assert_array_equal(index.positions(conditions), np.flatnonzero(mask))
+    np.testing.assert_array_equal(
+        index.design_ids(conditions), ds[DESIGN_ID].values[mask]
+    )
+    assert index.query(conditions).sizes[DESIGN_ID] == mask.sum()
+    # NaN never matches
+    assert len(index.positions({"mass": (None, None)})) == 990
+    assert len(index.positions({"count": set()})) == 0
+    assert len(index.positions({})) == 1000
+
+
+def test_design_index_non_scalar(ds):
+    with pytest.raises(ValueError):
+        scop.DesignIndex(ds, variables=["shape"])
+    with pytest.raises(ValueError):
+        scop.DesignIndex(ds, variables=[]).positions({"shape": 0.0})
@@ -1,7 +1,12 @@
+import threading
+import time
+
 import numpy as np
 import openmdao.api as om
 import pandas as pd
+import xarray as xr
 import scop
+from scop import DESIGN_ID
 
 
 def test_recording_timestamps():
@@ -44,3 +49,261 @@ def test_recording_timestamps():
     assert ds["meta.timestamp"].max() <= post_timestamp
     # Make sure timestamps are monotonically increasing
     assert (ds["meta.timestamp"].diff("design") > np.timedelta64(0, "ns")).all()
+
+
+def test_run_statistics(tmp_path):
+    prob = om.Problem()
+    model = prob.model
+    model.add_subsystem(
+        "comp",
+        om.ExecComp(["f=(x-0.5)**2", "g=x", "h=[x, -x]"], h=np.zeros(2)),
+        promotes=["*"],
+    )
+    model.add_design_var("x")
+    model.add_objective("f")
+    # Scaled, to make sure the bounds are unscaled
+    model.add_constraint("g", upper=0.5, scaler=10.0, adder=1.0)
+    model.add_constraint("h", lower=-0.75, indices=[1])
+
+    xs = [0.0, 0.25, 0.5, 1.0]
+    driver = om.DOEDriver(om.ListGenerator([[("x", x)] for x in xs]))
+    snapshot_path = tmp_path / "stats.json"
+    recorder = scop.DatasetRecorder(snapshot_path=snapshot_path, snapshot_interval=0)
+    driver.add_recorder(recorder)
+    prob.driver = driver
+
+    prob.setup()
+    prob.run_driver()
+
+    stats = recorder.statistics()
+    assert stats.n_cases == stats.n_successful == 4
+    assert stats.n_feasible == 3
+    assert stats.feasible_fraction == 0.75
+    assert stats.rate > 0
+    np.testing.assert_allclose(stats.objective_min["comp.f"], 0.0)
+    np.testing.assert_allclose(stats.objective_max["comp.f"], 0.25)
+    # 0.5 above the upper bound of g, 0.25 below the lower bound of h[1]
+    np.testing.assert_allclose(stats.violation_max, 0.75)
+    np.testing.assert_allclose(stats.violation_mean, 0.75 / 4)
+    assert stats.violation_counts.sum() == 4
+
+    prob.cleanup()
+    snapshot = scop.read_run_statistics(snapshot_path)
+    (driver_snapshot,) = snapshot.values()
+    assert driver_snapshot["n_cases"] == 4
+    assert driver_snapshot["objectives"]["comp.f"]["argmin"] == [
+        recorder.assemble_dataset(driver)["design"].values[2]
+    ]
+
+
+def test_run_statistics_zero_bound():
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem("comp", om.ExecComp(["f=x", "g=x"]), promotes=["*"])
+    prob.model.add_design_var("x")
+    prob.model.add_objective("f")
+    prob.model.add_constraint("g", lower=0.0)
+    prob.driver = om.DOEDriver(om.ListGenerator([[("x", x)] for x in [-1.0, 1.0]]))
+    recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.setup()
+    # Infinite bounds are unscaled without multiplying 0 * inf
+    with np.errstate(invalid="raise"):
+        prob.run_driver()
+    prob.cleanup()
+
+    stats = recorder.statistics()
+    assert stats.n_feasible == 1
+    np.testing.assert_allclose(stats.violation_max, 1.0)
+
+
+def test_run_statistics_indexed_objective():
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem(
+        "comp", om.ExecComp("y=[x, 100*(1-2*x)]", y=np.zeros(2)), promotes=["*"]
+    )
+    prob.model.add_design_var("x")
+    prob.model.add_objective("y", index=0)
+    prob.driver = om.DOEDriver(om.ListGenerator([[("x", x)] for x in [0.0, 1.0]]))
+    recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.setup()
+    prob.run_driver()
+    prob.cleanup()
+
+    # Only the objective element of y
+    stats = recorder.statistics()
+    np.testing.assert_allclose(stats.objective_min["comp.y"], [0.0])
+    np.testing.assert_allclose(stats.objective_max["comp.y"], [1.0])
+
+
+def test_run_statistics_same_driver_class(tmp_path):
+    snapshot_path = tmp_path / "stats.json"
+    recorder = scop.DatasetRecorder(snapshot_path=snapshot_path, snapshot_interval=0)
+    problems = []
+    for n_cases in [2, 3]:
+        prob = om.Problem(reports=None)
+        prob.model.add_subsystem("comp", om.ExecComp("y=2*x"), promotes=["*"])
+        prob.model.add_design_var("x")
+        prob.model.add_objective("y")
+        prob.driver = om.DOEDriver(
+            om.ListGenerator([[("x", float(x))] for x in range(n_cases)])
+        )
+        prob.driver.add_recorder(recorder)
+        prob.setup()
+        prob.run_driver()
+        problems.append(prob)
+    for prob in problems:
+        prob.cleanup()
+
+    snapshot = scop.read_run_statistics(snapshot_path)
+    names = [f"{prob._name}/DOEDriver_List" for prob in problems]
+    assert sorted(snapshot) == sorted(names)
+    assert [snapshot[name]["n_cases"] for name in names] == [2, 3]
+
+
+def test_concurrent_requesters(tmp_path):
+    # Snapshots of all requesters are written while the others record
+    snapshot_path = tmp_path / "stats.json"
+    recorder = scop.DatasetRecorder(snapshot_path=snapshot_path, snapshot_interval=0)
+
+    def make_problem(name, n_cases):
+        prob = om.Problem(name=name, reports=None)
+        prob.model.add_subsystem(
+            name, om.ExecComp("y=2*x", y=np.zeros(2), x=np.zeros(2)), promotes=["*"]
+        )
+        prob.model.add_design_var("x")
+        prob.model.add_objective("y", index=0)
+        prob.driver = om.DOEDriver(
+            om.ListGenerator([[("x", np.full(2, float(i)))] for i in range(n_cases)])
+        )
+        prob.driver.add_recorder(recorder)
+        prob.setup()
+        return prob
+
+    problems = [make_problem(f"prob{idx}", 20 + idx) for idx in range(4)]
+    threads = [threading.Thread(target=prob.run_driver) for prob in problems]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for idx, prob in enumerate(problems):
+        ds = recorder.assemble_dataset(prob.driver)
+        assert ds[DESIGN_ID].values.tolist() == [
+            f"rank0:DOEDriver_List|{case}" for case in range(20 + idx)
+        ]
+        assert {name for name in ds.data_vars if not name.startswith("meta.")} == {
+            f"prob{idx}.y",
+            "_auto_ivc.v0",
+        }
+        np.testing.assert_array_equal(
+            ds[f"prob{idx}.y"].isel({f"prob{idx}.y_0": 0}), 2.0 * np.arange(20 + idx)
+        )
+        assert recorder.statistics(prob.driver).n_cases == 20 + idx
+        prob.cleanup()
+
+    snapshot = scop.read_run_statistics(snapshot_path)
+    assert [
+        snapshot[f"prob{idx}/DOEDriver_List"]["n_cases"] for idx in range(4)
+    ] == list(range(20, 24))
+
+
+def test_profiler():
+    @scop.func_comp(
+        inputs=[scop.Param(name="x", default=0.0)],
+        outputs=[scop.Param(name="y", default=0.0)],
+    )
+    def slow(x):
+        time.sleep(0.01)
+        return x
+
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem("slow", slow, promotes=["*"])
+    prob.model.add_design_var("x", lower=0.0, upper=1.0)
+    prob.model.add_objective("y")
+    prob.driver = om.DOEDriver(om.ListGenerator([[("x", 0.0)], [("x", 1.0)]]))
+    recorder = scop.DatasetRecorder()
+    other_recorder = scop.DatasetRecorder()
+    prob.driver.add_recorder(recorder)
+    prob.driver.add_recorder(other_recorder)
+
+    prob.setup()
+    profiler = scop.Profiler(memory=True).attach(prob)
+    prob.run_driver()
+    profiler.detach()
+    ds = recorder.assemble_dataset(prob.driver)
+
+    assert (ds["meta.time.slow"] >= 0.01).all()
+    # All recorders get the same measurements
+    np.testing.assert_array_equal(
+        other_recorder.assemble_dataset(prob.driver)["meta.time.slow"],
+        ds["meta.time.slow"],
+    )
+    assert (ds["meta.cpu_time.slow"] < ds["meta.time.slow"]).all()
+    assert (ds["meta.peak_memory.slow"] >= 0).all()
+    assert "_solve_nonlinear" not in vars(prob.model.slow)
+
+
+def test_derivatives(tmp_path):
+    prob = om.Problem(reports=None, coloring_dir=str(tmp_path / "coloring_files"))
+    model = prob.model
+    model.add_subsystem(
+        "comp",
+        om.ExecComp(["f=sum((x-0.5)**4)", "g=2*y"], x=np.ones(3), g=np.ones(2)),
+        promotes=["*"],
+    )
+    model.add_design_var("x", lower=-1.0, upper=1.0)
+    model.add_design_var("y", lower=-1.0, upper=1.0)
+    model.add_objective("f")
+    model.add_constraint("g", upper=0.0)
+    prob.driver = driver = om.ScipyOptimizeDriver(optimizer="SLSQP", maxiter=3)
+    driver.options["disp"] = False
+    driver.recording_options["record_derivatives"] = True
+    recorder = scop.DatasetRecorder()
+    driver.add_recorder(recorder)
+
+    prob.setup()
+    prob.run_driver()
+    scop.dump_zarr(recorder.assemble_derivatives(driver), tmp_path / "jac.zarr")
+    ds = scop.load_zarr(tmp_path / "jac.zarr")
+
+    assert ds.sizes[DESIGN_ID] > 1
+    # df/dx and dg/dy are the only non-zero blocks
+    assert ds.sizes["jac_nnz"] == 3 + 2
+    (x_name,) = set(ds["jac.wrt"].values) - {"_auto_ivc.v1"}
+    jac = scop.decode_jacobian(ds, -1).toarray()
+    assert jac.shape == (1 + 2, 3 + 1)
+    assert np.all(jac[1:, 3] == 2.0)
+    np.testing.assert_allclose(
+        scop.jacobian_block(ds, "comp.f", x_name)[-1, 0], jac[0, :3]
+    )
+    assert not scop.jacobian_block(ds, "comp.g", x_name).any()
+
+
+def test_assemble_chunked(tmp_path):
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem(
+        "comp", om.ExecComp(["y=2*x"], y=np.zeros(2)), promotes=["*"]
+    )
+    prob.model.add_design_var("x", lower=0.0, upper=1.0)
+    prob.model.add_objective("y", index=0)
+    prob.driver = driver = om.DOEDriver(
+        om.ListGenerator([[("x", 0.1 * idx)] for idx in range(10)])
+    )
+    recorder = scop.DatasetRecorder()
+    driver.add_recorder(recorder)
+    prob.setup()
+    prob.run_driver()
+
+    ds = recorder.assemble_dataset(driver)
+    for chunk_size in [1, 3]:
+        xr.testing.assert_identical(
+            recorder.assemble_dataset(driver, chunk_size=chunk_size), ds
+        )
+
+    spilled_ds = recorder.assemble_dataset(
+        driver, chunk_size=4, release=True, spill_to=tmp_path / "spill.scop"
+    )
+    assert not recorder.datasets[driver]
+    xr.testing.assert_equal(spilled_ds, ds)
+    assert spilled_ds.attrs["start_timestamp"] == ds.attrs["start_timestamp"]
@@ -0,0 +1,85 @@
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+import scop
+from scop import DESIGN_ID
+
+length = scop.Param(
+    name="length", default=1.0, space=scop.RealSpace(lower=0.5, upper=1.5)
+)
+width = scop.Param(
+    name="width", default=np.ones(2), space=scop.RealSpace(lower=0.0, upper=1.0)
+)
+count = scop.Param(
+    name="count", default=1, space=scop.IntegerSpace(lower=1, upper=3), discrete=True
+)
+area = scop.Param(name="area", default=np.zeros(2))
+total = scop.Param(name="total", default=0.0)
+
+
+def area_func(length, width, count):
+    area = length * width
+    return area, area.sum() + count
+
+
+def run(comp, generator):
+    prob = om.Problem(reports=None)
+    prob.model.add_subsystem("area", comp, promotes=["*"])
+    prob.model.add_design_var("length")
+    prob.model.add_design_var("width")
+    prob.model.add_design_var("count")
+    prob.driver = driver = om.DOEDriver(generator)
+    recorder = scop.DatasetRecorder()
+    driver.add_recorder(recorder)
+    driver.recording_options["includes"] = ["*"]
+    prob.setup()
+    prob.run_driver()
+    prob.cleanup()
+    return prob, recorder.assemble_dataset(driver)
+
+
+def test_surrogate_comp(tmp_path):
+    inputs = [length, width, count]
+    outputs = [area, total]
+    _, ds = run(
+        scop.func_comp(inputs=inputs, outputs=outputs)(area_func),
+        scop.LatinHypercubeGenerator(50, seed=0),
+    )
+
+    surrogate = scop.surrogate_comp(ds, inputs=inputs, outputs=outputs)
+    scop.dump_surrogate(surrogate, tmp_path / "area.pkl")
+    loaded_surrogate = scop.load_surrogate(tmp_path / "area.pkl")
+
+    # Quadratic functions are reproduced exactly by the default response surface
+    predicted_ds = loaded_surrogate.predict_dataset(ds)
+    np.testing.assert_allclose(predicted_ds["area"], ds["area.area"])
+    np.testing.assert_allclose(predicted_ds["total"], ds["area.total"])
+    assert (predicted_ds[DESIGN_ID] == ds[DESIGN_ID]).all()
+
+    predicted = surrogate.predict(
+        {"length": [1.0, 1.5], "width": [[0.5, 0.5], [1.0, 0.0]], "count": [2, 3]}
+    )
+    np.testing.assert_allclose(predicted["area"], [[0.5, 0.5], [1.5, 0.0]], atol=1e-9)
+    np.testing.assert_allclose(predicted["total"], [3.0, 4.5], atol=1e-9)
+    # Built once
+    assert surrogate.input_layout is surrogate.input_layout
+
+    # Drop-in replacement of the original component
+    prob, surrogate_ds = run(
+        loaded_surrogate,
+        scop.FullFactorialGenerator(levels=2),
+    )
+    assert surrogate_ds["area.total"].attrs["param"] is total
+    expected = [
+        area_func(length_, np.array(width_), count_)[1]
+        for length_, width_, count_ in zip(
+            surrogate_ds["area.length"].values,
+            surrogate_ds["area.width"].values,
+            surrogate_ds["area.count"].values,
+        )
+    ]
+    np.testing.assert_allclose(surrogate_ds["area.total"], expected, atol=1e-9)
+    assert len(surrogate_ds[DESIGN_ID]) == 2 * 2 * 2 * 3
+
+    assert_check_partials(prob.check_partials(out_stream=None), atol=1e-5, rtol=1e-5)